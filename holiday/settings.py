@@ -39,6 +39,7 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
 
     'rest_framework',
     'rest_framework_simplejwt.token_blacklist',
@@ -50,6 +51,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'holiday_module.middleware.MetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -57,6 +59,10 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'holiday_module.middleware.SettingsCacheMiddleware',
+    'holiday_module.middleware.QueryTracerMiddleware',
+    'holiday_module.middleware.ServerTimingMiddleware',
+    'holiday_module.middleware.ProfilingMiddleware',
 ]
 
 ROOT_URLCONF = 'holiday.urls'
@@ -86,6 +92,7 @@ if USE_S3 == "AWS_S3_BUCKET":
     AWS_ACCESS_KEY_ID = os.environ.get('AWS_ACCESS_KEY_ID')
     AWS_SECRET_ACCESS_KEY = os.environ.get('AWS_SECRET_ACCESS_KEY')
     AWS_STORAGE_BUCKET_NAME = os.environ.get('AWS_STORAGE_BUCKET_NAME')
+    AWS_S3_REGION_NAME = os.environ.get('AWS_S3_REGION_NAME')
     AWS_DEFAULT_ACL = None
     AWS_S3_CUSTOM_DOMAIN = f'{AWS_STORAGE_BUCKET_NAME}.s3.amazonaws.com'
     AWS_S3_OBJECT_PARAMETERS = {'CacheControl': 'max-age=86400'}
@@ -162,6 +169,24 @@ USE_TZ = True
 STATIC_URL = 'static/'
 STATIC_ROOT = os.path.join(BASE_DIR, 'static')
 expiration_time = 300  # Add expiration time in seconds
+HOLIDAY_PRESIGNED_URL_CACHE_SIZE = 1024  # presigned holiday image urls kept per process
+HOLIDAY_PUBLIC_PAYLOAD_TIMEOUT = 86400  # seconds a prebuilt public holiday list is kept in cache
+HOLIDAY_PUBLIC_CACHE_CONTROL = 'private, max-age=300'
+HOLIDAY_JOB_COLLAPSE_SECONDS = 5  # pending recalculation of a holiday date waits this long for further edits
+HOLIDAY_JOBS_EAGER = False  # apply holiday recalculation on commit of the edit instead of in process_holiday_jobs worker
+HOLIDAY_SETTINGS_CACHE_TTL = 300  # seconds company and attendance settings are cached per process
+HOLIDAY_QUERY_TRACER = os.environ.get('HOLIDAY_QUERY_TRACER') == 'true'  # log repeated queries of every request, serves async views through a thread while enabled
+HOLIDAY_QUERY_REPEAT_THRESHOLD = 3  # times one query shape may run from one call site before it is logged
+HOLIDAY_METRICS_DIR = os.environ.get('HOLIDAY_METRICS_DIR')  # metric files of every gunicorn worker, shared by the workers of one host only
+HOLIDAY_METRICS_FLUSH_SECONDS = 1  # seconds between two writes of metric file of a worker
+HOLIDAY_METRICS_TOKEN = os.environ.get('HOLIDAY_METRICS_TOKEN')  # bearer token required by metrics endpoint, 404 while unset
+HOLIDAY_SERVER_TIMING = os.environ.get('HOLIDAY_SERVER_TIMING') == 'true'  # Server-Timing header of holiday stages
+HOLIDAY_PROFILE_DIR = os.environ.get('HOLIDAY_PROFILE_DIR')  # collapsed stack files of profiled requests
+HOLIDAY_PROFILE_SAMPLE_RATE = float(os.environ.get('HOLIDAY_PROFILE_SAMPLE_RATE', 0))  # fraction of holiday requests profiled
+HOLIDAY_PROFILE_TOKEN = os.environ.get('HOLIDAY_PROFILE_TOKEN')  # X-Holiday-Profile header value profiling any request
+HOLIDAY_PROFILE_MAX_FILES = 200  # newest profiles kept in HOLIDAY_PROFILE_DIR
+HOLIDAY_PROFILE_INTERVAL = 0.005  # seconds between two stack samples of a profiled request
+HOLIDAY_ASYNC_IMAGE_URL_CONCURRENCY = 8  # presigned image urls generated at once by one async list request
 
 # Default primary key field type
 # https://docs.djangoproject.com/en/4.1/ref/settings/#default-auto-field
@@ -1,6 +1,22 @@
 # Register your models here.
 from django.contrib import admin
 
+from holiday.holiday_module.conditional import bump_holiday_data_version
 from holiday.holiday_module.models import Holidays
 
-admin.site.register(Holidays)
+
+@admin.register(Holidays)
+class HolidaysAdmin(admin.ModelAdmin):
+    """holiday admin which invalidates cached holiday responses on every change"""
+
+    def save_model(self, request, obj, form, change):
+        super().save_model(request, obj, form, change)
+        bump_holiday_data_version()
+
+    def delete_model(self, request, obj):
+        super().delete_model(request, obj)
+        bump_holiday_data_version()
+
+    def delete_queryset(self, request, queryset):
+        super().delete_queryset(request, queryset)
+        bump_holiday_data_version()
@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class HolidayModuleConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'holiday_module'
+
+    def ready(self):
+        """connect signal receivers"""
+        from holiday.holiday_module import signals  # noqa: F401
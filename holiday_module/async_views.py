@@ -0,0 +1,187 @@
+import asyncio
+from datetime import date
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.paginator import InvalidPage
+from django.http import HttpResponseNotAllowed
+from django.views import View
+from rest_framework.exceptions import NotFound
+from rest_framework.response import Response
+
+from holiday.holiday_module import views
+from holiday.holiday_module.constants import PUBLIC_ACCESS
+from holiday.holiday_module.metrics import SERIALIZATION_SECONDS
+from holiday.holiday_module.pagination import CustomPagination
+from holiday.holiday_module.public_payload import public_payload_key, cached_public_payload, store_public_payload, \
+    public_payload_response
+from holiday.holiday_module.serializers import HolidaysListCreateSerializer, HolidayPublicSerializer, \
+    DashboardHolidayListSerializer
+from holiday.holiday_module.utils import get_aws_holiday_image_url, holiday_month_counts, month_date_range
+
+
+def image_url_concurrency():
+    """presigned image urls generated at once by one async request, HOLIDAY_ASYNC_IMAGE_URL_CONCURRENCY setting"""
+    return getattr(settings, 'HOLIDAY_ASYNC_IMAGE_URL_CONCURRENCY', 8)
+
+
+async def holiday_image_urls(holidays):
+    """
+    presigned image url of every holiday with an image keyed by id, generated in worker threads with at most
+    `image_url_concurrency()` in flight so a page of images does not wait on one presign after another
+    """
+    semaphore = asyncio.Semaphore(image_url_concurrency())
+    image_url = sync_to_async(get_aws_holiday_image_url, thread_sensitive=False)
+
+    async def holiday_image_url(holiday):
+        async with semaphore:
+            return holiday.id, await image_url(holiday)
+
+    return dict(await asyncio.gather(*(holiday_image_url(holiday) for holiday in holidays if holiday.holiday_image)))
+
+
+class AsyncHolidayReadView(View):
+    """
+    Async GET of a holiday read endpoint for ASGI deployments.
+
+    Authentication, permissions, throttling and conditional GET are those of `sync_view_class`, run together in
+    one worker thread by `check_request`, so both paths answer a request with the same status and headers. Rows
+    are then read with the async ORM and the response is serialized and rendered by the sync view in one more
+    worker thread.
+    """
+    sync_view_class = None
+
+    async def get(self, request, *args, **kwargs):
+        view, response = await sync_to_async(self.check_request)(request, *args, **kwargs)
+        if response is not None:
+            return response
+        try:
+            response = await self.read(view)
+        except Exception as exc:
+            response = exc
+        return await sync_to_async(self.finalize)(view, response)
+
+    async def http_method_not_allowed(self, request, *args, **kwargs):
+        """405 for methods other than GET, awaitable as django 4.1.0 only makes options async"""
+        return HttpResponseNotAllowed(self._allowed_methods())
+
+    def check_request(self, request, *args, **kwargs):
+        """
+        sync view initialized for request and the rendered response ending the request early, None when
+        rows have to be read
+        """
+        view = self.sync_view_class()
+        view.setup(request, *args, **kwargs)
+        view.request = view.initialize_request(request, *args, **kwargs)
+        view.headers = view.default_response_headers
+        try:
+            view.initial(view.request, *args, **kwargs)
+            response = self.early_response(view)
+        except Exception as exc:
+            response = exc
+        if response is None:
+            return view, None
+        return view, self.finalize(view, response)
+
+    def early_response(self, view):
+        """response ending the request before rows are read, e.g. 304, after access checks passed"""
+        return view.not_modified_response(view.request)
+
+    async def read(self, view):
+        """response of view built from rows read with the async orm"""
+        raise NotImplementedError
+
+    def finalize(self, view, response):
+        """render response, or exception through the exception handler, as the sync view would"""
+        if isinstance(response, Exception):
+            response = view.handle_exception(response)
+        response = view.finalize_response(view.request, response, *view.args, **view.kwargs)
+        if isinstance(response, Response):
+            response.render()
+        return response
+
+
+class AsyncHolidayListView(AsyncHolidayReadView):
+    """
+    async holiday list and public holiday list, same query parameters as ListCreateAPIView get
+    """
+    sync_view_class = views.ListCreateAPIView
+
+    def early_response(self, view):
+        """public payload from cache or 304, and holiday queryset to read otherwise"""
+        request = view.request
+        if request.GET.get(PUBLIC_ACCESS) == "true":
+            self.public_key = public_payload_key(request.GET)
+            if cached := cached_public_payload(self.public_key):
+                return public_payload_response(request, *cached)
+        elif not_modified := view.not_modified_response(request):
+            return not_modified
+        self.queryset = view.filter_list_queryset(request)
+        return None
+
+    async def read(self, view):
+        if view.request.GET.get(PUBLIC_ACCESS) == "true":
+            rows = [row async for row in self.queryset.aiterator()]
+            payload, etag = await sync_to_async(self.build_public_payload)(rows)
+            return public_payload_response(view.request, payload, etag)
+        if isinstance(view.paginator, CustomPagination):
+            holidays = await self.paginate(view)
+        else:
+            # keyset pages are a single query that needs no count, read them in a worker thread
+            holidays = await sync_to_async(view.paginate_queryset)(self.queryset)
+        month_counts, image_urls = await asyncio.gather(
+            sync_to_async(holiday_month_counts)([holiday.date for holiday in holidays]),
+            holiday_image_urls(holidays))
+        return await sync_to_async(self.list_response)(view, holidays, month_counts, image_urls)
+
+    async def paginate(self, view):
+        """
+        holidays of requested page counted with acount and read with aiterator, the paginator of view keeps
+        the page for its paginated response
+        """
+        paginator, request = view.paginator, view.request
+        paginator.request = request
+        django_paginator = paginator.django_paginator_class(self.queryset, paginator.get_page_size(request))
+        # counted here so Paginator never runs the sync count query
+        django_paginator.count = await self.queryset.acount()
+        page_number = paginator.get_page_number(request, django_paginator)
+        try:
+            paginator.page = django_paginator.page(page_number)
+        except InvalidPage as exc:
+            raise NotFound(paginator.invalid_page_message.format(page_number=page_number, message=str(exc)))
+        paginator.page.object_list = [holiday async for holiday in paginator.page.object_list.aiterator()]
+        return paginator.page.object_list
+
+    def build_public_payload(self, rows):
+        """render and cache public payload of rows"""
+        return store_public_payload(self.public_key, HolidayPublicSerializer(rows, many=True).data)
+
+    @staticmethod
+    def list_response(view, holidays, month_counts, image_urls):
+        """paginated response of holidays with month counts and image urls built ahead"""
+        context = dict(view.get_serializer_context(), month_counts=month_counts, image_urls=image_urls)
+        serializer = HolidaysListCreateSerializer(holidays, many=True, context=context)
+        with SERIALIZATION_SECONDS.time(view='list_create_holidays'):
+            data = serializer.data
+        return view.get_paginated_response(data)
+
+
+class AsyncDashboardCurrentMonthHolidayListView(AsyncHolidayReadView):
+    """
+    async list of current month holidays for dashboard
+    """
+    sync_view_class = views.DashboardCurrentMonthHolidayListAPIView
+
+    async def read(self, view):
+        month_start, next_month_start = month_date_range(date.today())
+        queryset = view.get_queryset().filter(date__gte=month_start, date__lt=next_month_start)
+        holidays = [holiday async for holiday in queryset.aiterator()]
+        image_urls = await holiday_image_urls(holidays)
+        return await sync_to_async(self.dashboard_response)(view, holidays, image_urls)
+
+    @staticmethod
+    def dashboard_response(view, holidays, image_urls):
+        """count and data of current month holidays with image urls built ahead"""
+        context = dict(view.get_serializer_context(), image_urls=image_urls)
+        serializer = DashboardHolidayListSerializer(holidays, many=True, context=context)
+        return Response({'count': len(holidays), 'data': serializer.data})
@@ -0,0 +1,225 @@
+"""
+Requests per second of holiday read endpoints served by gunicorn with the sync views (WSGI) against uvicorn with
+the async views (ASGI). uvicorn serving the sync views is measured too, to tell the server apart from the views.
+
+    python -m holiday.holiday_module.benchmarks.bench_asgi [--holidays 1000] [--image-ratio 0] [--workers 2]
+        [--concurrency 32] [--duration 10] [--output bench_asgi.json]
+
+Needs gunicorn and uvicorn installed. A throwaway test database is seeded with `--holidays` holidays centred on
+today, every holiday of `--image-ratio` gets an image so list and dashboard presign urls (set AWS credentials in
+the environment to sign them offline), and every server is started on that database through DB_NAME with
+`--workers` worker processes. Each endpoint is loaded by `--concurrency` keep-alive connections for `--duration`
+seconds, authenticated with a JWT access token of a superuser and without If-None-Match. The load generator runs
+on the same machine as the servers, so only compare runs made on one machine.
+
+Results are written as JSON, `{"meta": {...}, "results": {run: {endpoint: {rps, p50, p99, requests, errors}}}}`.
+"""
+import argparse
+import asyncio
+import datetime
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+from urllib.parse import urlencode
+
+from holiday.holiday_module.benchmarks.common import setup, benchmark_database
+from holiday.holiday_module.benchmarks.seed import seed_dataset
+
+HOST = '127.0.0.1'
+# run name: server, views
+RUNS = {
+    'wsgi_sync': ('gunicorn', 'sync'),
+    'asgi_sync': ('uvicorn', 'sync'),
+    'asgi_async': ('uvicorn', 'async'),
+}
+# endpoint name: sync url name, async url name, query
+ENDPOINTS = {
+    'list': ('list_create_holidays', 'async_list_holidays', {}),
+    'list_public': ('list_create_holidays', 'async_list_holidays', {'public_access': 'true'}),
+    'dashboard_month': ('current_month_holiday', 'async_current_month_holiday', {}),
+}
+
+
+def server_command(server, port, workers):
+    """command line starting server on port with workers processes"""
+    if server == 'gunicorn':
+        return [sys.executable, '-m', 'gunicorn', 'holiday.wsgi:application', '--bind', f'{HOST}:{port}',
+                '--workers', str(workers), '--log-level', 'warning']
+    return [sys.executable, '-m', 'uvicorn', 'holiday.asgi:application', '--host', HOST, '--port', str(port),
+            '--workers', str(workers), '--log-level', 'warning', '--no-access-log']
+
+
+def free_port():
+    """tcp port nothing listens on"""
+    with socket.socket() as sock:
+        sock.bind((HOST, 0))
+        return sock.getsockname()[1]
+
+
+def wait_for_port(port, process, timeout=30):
+    """block until server accepts connections"""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise SystemExit(f'server exited with status {process.returncode}')
+        try:
+            socket.create_connection((HOST, port), timeout=1).close()
+            return
+        except OSError:
+            time.sleep(0.2)
+    raise SystemExit(f'server did not listen on port {port} within {timeout}s')
+
+
+async def read_response(reader):
+    """status code of one http/1.1 response and whether connection stays open, body is read and dropped"""
+    head = (await reader.readuntil(b'\r\n\r\n')).decode('latin-1').split('\r\n')
+    status = int(head[0].split()[1])
+    headers = {name.strip().lower(): value.strip() for name, value in
+               (line.split(':', 1) for line in head[1:] if line)}
+    if headers.get('transfer-encoding') == 'chunked':
+        while size := int((await reader.readuntil(b'\r\n')).strip(), 16):
+            await reader.readexactly(size + 2)
+        await reader.readuntil(b'\r\n')
+    else:
+        await reader.readexactly(int(headers.get('content-length', 0)))
+    return status, headers.get('connection', '').lower() != 'close'
+
+
+async def load(port, path, token, concurrency, duration):
+    """requests per second and latency of path under concurrency connections for duration seconds"""
+    request = (f'GET {path} HTTP/1.1\r\nHost: {HOST}:{port}\r\nAuthorization: Bearer {token}\r\n'
+               f'Accept: application/json\r\n\r\n').encode('latin-1')
+    latencies, errors = [], 0
+    deadline = time.perf_counter() + duration
+
+    async def connection():
+        nonlocal errors
+        reader = writer = None
+        while time.perf_counter() < deadline:
+            if writer is None:
+                reader, writer = await asyncio.open_connection(HOST, port)
+            started = time.perf_counter()
+            try:
+                writer.write(request)
+                status, keep_alive = await read_response(reader)
+            except (OSError, ValueError, asyncio.IncompleteReadError):
+                errors += 1
+                keep_alive = False
+            else:
+                latencies.append((time.perf_counter() - started) * 1000)
+                errors += status != 200
+            if not keep_alive:
+                # gunicorn sync workers close the connection after every response
+                writer.close()
+                writer = None
+        if writer is not None:
+            writer.close()
+
+    started = time.perf_counter()
+    await asyncio.gather(*(connection() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    latencies.sort()
+    return {
+        'rps': len(latencies) / elapsed,
+        'p50': statistics.median(latencies) if latencies else None,
+        'p99': latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))] if latencies else None,
+        'requests': len(latencies),
+        'errors': errors,
+    }
+
+
+def endpoint_paths(views):
+    """path of every endpoint for sync or async views"""
+    from rest_framework.reverse import reverse
+
+    paths = {}
+    for name, (sync_url, async_url, query) in ENDPOINTS.items():
+        path = reverse(async_url if views == 'async' else sync_url)
+        paths[name] = f'{path}?{urlencode(query)}' if query else path
+    return paths
+
+
+def run_server(server, views, token, args, env):
+    """load every endpoint of views served by server"""
+    port = free_port()
+    process = subprocess.Popen(server_command(server, port, args.workers), env=env)
+    try:
+        wait_for_port(port, process)
+        results = {}
+        for name, path in endpoint_paths(views).items():
+            # warm up workers, connections and public payload cache
+            asyncio.run(load(port, path, token, args.workers, 1))
+            results[name] = asyncio.run(load(port, path, token, args.concurrency, args.duration))
+            stats = results[name]
+            print(f"{server:<9} {views:<6} {name:<16} {stats['rps']:>8.1f} req/s  p50={stats['p50'] or 0:.2f}ms  "
+                  f"p99={stats['p99'] or 0:.2f}ms  errors={stats['errors']}")
+        return results
+    finally:
+        process.terminate()
+        process.wait(timeout=30)
+
+
+def seed_images(ratio):
+    """give every holiday of ratio an image so its url is presigned"""
+    from holiday.holiday_module.models import Holidays
+
+    if ratio <= 0:
+        return
+    step = max(1, round(1 / ratio))
+    holiday_ids = list(Holidays.objects.order_by('id').values_list('id', flat=True)[::step])
+    Holidays.objects.filter(id__in=holiday_ids).update(holiday_image='holiday/benchmark.png')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--holidays', type=int, default=1000)
+    parser.add_argument('--image-ratio', type=float, default=0)
+    parser.add_argument('--workers', type=int, default=2)
+    parser.add_argument('--concurrency', type=int, default=32)
+    parser.add_argument('--duration', type=float, default=10)
+    parser.add_argument('--output', default='bench_asgi.json')
+    args = parser.parse_args()
+    setup()
+
+    from django.contrib.auth import get_user_model
+    from rest_framework_simplejwt.tokens import AccessToken
+
+    results = {}
+    with benchmark_database() as connection:
+        _, user_ids = seed_dataset(args.holidays, 1, 0)
+        seed_images(args.image_ratio)
+        admin = get_user_model().objects.get(id=user_ids[0])
+        admin.is_superuser = True
+        admin.save(update_fields=['is_superuser'])
+        token = str(AccessToken.for_user(admin))
+        env = dict(os.environ, DB_NAME=connection.settings_dict['NAME'])
+        # servers open their own connections to the test database
+        connection.close()
+        for run, (server, views) in RUNS.items():
+            results[run] = run_server(server, views, token, args, env)
+    for name in ENDPOINTS:
+        baseline = results['wsgi_sync'][name]['rps'] or float('nan')
+        print(f"{name:<16} asgi_async / wsgi_sync {results['asgi_async'][name]['rps'] / baseline:.2f}x  "
+              f"asgi_sync / wsgi_sync {results['asgi_sync'][name]['rps'] / baseline:.2f}x")
+    report = {
+        'meta': {
+            'created_at': datetime.datetime.now(datetime.timezone.utc).isoformat(),
+            'holidays': args.holidays,
+            'image_ratio': args.image_ratio,
+            'workers': args.workers,
+            'concurrency': args.concurrency,
+            'duration': args.duration,
+        },
+        'results': results,
+    }
+    with open(args.output, 'w') as output:
+        json.dump(report, output, indent=2, sort_keys=True)
+    print(f'results written to {args.output}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,148 @@
+"""
+Latency and query count of holiday endpoints at realistic data scale.
+
+    python -m holiday.holiday_module.benchmarks.bench_endpoints [--scales 1000 10000 100000] [--repeat 50]
+        [--users N] [--requests-per-user K] [--output bench_endpoints.json] [--baseline baseline.json] [--threshold 10]
+
+Every scale runs against its own throwaway test database seeded with `scale` holidays centred on today,
+`--users` users (scale / 100 by default) and `--requests-per-user` leave and work from home requests each
+(100 by default). Requests go through the full middleware stack with the test client, authenticated as a
+superuser, without If-None-Match so conditional GET never short cuts them. The public list serves its cached
+payload after the first call, mutations only enqueue the holiday recalculation which bench_recompute measures.
+
+Results are written as JSON, `{"meta": {...}, "results": {scale: {endpoint: {p50, p95, mean, count, queries}}}}`.
+With `--baseline` every endpoint is compared against a stored result file and the run exits with status 1 when
+p50 latency grows more than `--threshold` percent or the query count grows at all.
+"""
+import argparse
+import datetime
+import itertools
+import json
+import sys
+
+from holiday.holiday_module.benchmarks.common import setup, benchmark_database, measure, count_queries, print_stats
+from holiday.holiday_module.benchmarks.seed import seed_dataset
+
+
+def endpoint_calls(client, holiday_ids):
+    """name and call of every benchmarked endpoint, each call asserts a successful response"""
+    from rest_framework.reverse import reverse
+    from holiday.holiday_module.models import Holidays
+
+    list_url = reverse('list_create_holidays')
+    put_holiday = Holidays.objects.get(id=holiday_ids[0])
+    put_names = (f'Benchmark holiday {index}' for index in itertools.count())
+    delete_ids = iter(holiday_ids[1:])
+
+    def get(url, params=None):
+        def call():
+            response = client.get(url, params)
+            assert response.status_code == 200, (url, response.status_code)
+        return call
+
+    def put():
+        response = client.put(reverse('retrieve_update_destroy_holidays', kwargs={'id': put_holiday.id}),
+                              {'name': next(put_names), 'date': put_holiday.date.isoformat(), 'is_active': True},
+                              format='json')
+        assert response.status_code == 200, ('put', response.status_code)
+
+    def delete():
+        response = client.delete(reverse('retrieve_update_destroy_holidays', kwargs={'id': next(delete_ids)}))
+        assert response.status_code == 200, ('delete', response.status_code)
+
+    return [
+        ('list', get(list_url)),
+        ('list_search', get(list_url, {'search': 'day'})),
+        ('list_public', get(list_url, {'public_access': 'true'})),
+        ('put', put),
+        ('delete', delete),
+        ('dashboard_month', get(reverse('current_month_holiday'))),
+    ]
+
+
+def run_scale(scale, users, requests_per_user, repeat):
+    """statistics of every endpoint against a database seeded for scale"""
+    from django.contrib.auth import get_user_model
+    from django.contrib.auth.models import Permission
+    from rest_framework.test import APIClient
+    from holiday.holiday_module.models import Holidays
+
+    results = {}
+    with benchmark_database():
+        _, user_ids = seed_dataset(scale, users, requests_per_user)
+        admin = get_user_model().objects.get(id=user_ids[0])
+        admin.is_superuser = True
+        admin.save(update_fields=['is_superuser'])
+        admin.user_permissions.add(*Permission.objects.filter(content_type__app_label='holiday_module'))
+        client = APIClient()
+        client.force_authenticate(user=admin)
+        # one holiday to update and enough future holidays to delete one per call
+        holiday_ids = list(Holidays.objects.filter(date__gt=datetime.date.today()).order_by('date')
+                           .values_list('id', flat=True)[:repeat + 3])
+        if len(holiday_ids) < repeat + 3:
+            raise SystemExit(f'scale {scale} has too few future holidays for --repeat {repeat}')
+        for name, call in endpoint_calls(client, holiday_ids):
+            call()
+            queries = count_queries(call)
+            results[name] = dict(measure(call, repeat), queries=queries)
+            print_stats(f'{scale} {name}', results[name])
+    return results
+
+
+def compare(results, baseline, threshold):
+    """print change of every endpoint against baseline, return number of regressions"""
+    regressions = 0
+    for scale, endpoints in results.items():
+        for name, stats in endpoints.items():
+            before = baseline.get(scale, {}).get(name)
+            if before is None:
+                continue
+            change = (stats['p50'] - before['p50']) / before['p50'] * 100
+            regressed = change > threshold or stats['queries'] > before['queries']
+            regressions += regressed
+            print(f"{'REGRESSED' if regressed else 'ok':<10} {scale:>7} {name:<20} p50 {before['p50']:.2f} -> "
+                  f"{stats['p50']:.2f}ms ({change:+.1f}%)  queries {before['queries']} -> {stats['queries']}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--scales', type=int, nargs='+', default=[1000, 10000, 100000])
+    parser.add_argument('--repeat', type=int, default=50)
+    parser.add_argument('--users', type=int)
+    parser.add_argument('--requests-per-user', type=int, default=100)
+    parser.add_argument('--output', default='bench_endpoints.json')
+    parser.add_argument('--baseline')
+    parser.add_argument('--threshold', type=float, default=10)
+    args = parser.parse_args()
+    setup()
+
+    from django.db import connection
+    from django.test.utils import setup_test_environment
+    setup_test_environment()
+
+    results = {}
+    for scale in args.scales:
+        users = args.users or max(1, scale // 100)
+        results[str(scale)] = run_scale(scale, users, args.requests_per_user, args.repeat)
+    report = {
+        'meta': {
+            'created_at': datetime.datetime.now(datetime.timezone.utc).isoformat(),
+            'database': connection.vendor,
+            'repeat': args.repeat,
+            'users': args.users or 'scale / 100',
+            'requests_per_user': args.requests_per_user,
+        },
+        'results': results,
+    }
+    with open(args.output, 'w') as output:
+        json.dump(report, output, indent=2, sort_keys=True)
+    print(f'results written to {args.output}')
+    if args.baseline:
+        with open(args.baseline) as baseline:
+            if compare(results, json.load(baseline)['results'], args.threshold):
+                sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
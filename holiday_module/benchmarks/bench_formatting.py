@@ -0,0 +1,86 @@
+"""
+Benchmark of company format rendering for holiday rows, old string re-parse path against native formatter.
+
+    python -m holiday.holiday_module.benchmarks.bench_formatting [--rows 10000]
+
+Renders created_at, modified_at, deleted_at and date of every row. Company settings are served from
+memory for both paths so only the formatting work is measured.
+"""
+import argparse
+import datetime
+import os
+import time
+from types import SimpleNamespace
+from unittest import mock
+
+import django
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'holiday.settings')
+
+
+def build_rows(count):
+    """holiday like rows with date and three date time fields"""
+    now = datetime.datetime.now(datetime.timezone.utc)
+    return [
+        SimpleNamespace(
+            date=(now + datetime.timedelta(days=index)).date(),
+            created_at=now - datetime.timedelta(minutes=index),
+            modified_at=now - datetime.timedelta(seconds=index),
+            deleted_at=None if index % 2 else now,
+        )
+        for index in range(count)
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--rows', type=int, default=10000)
+    args = parser.parse_args()
+    django.setup()
+
+    from rest_framework import serializers
+    from holiday.holiday_module import utils
+    from holiday.holiday_module.settings_cache import start_request_memo, end_request_memo
+
+    company_settings = SimpleNamespace(
+        date_format=SimpleNamespace(date_format='%d-%m-%Y'),
+        time_format=SimpleNamespace(time_format='%H:%M:%S'),
+        time_type='12 Hour',
+    )
+    rows = build_rows(args.rows)
+    datetime_field = serializers.DateTimeField()
+    date_field = serializers.DateField()
+
+    def old_path(row):
+        return (
+            utils.convert_datetime_format(datetime_field.to_representation(row.created_at)),
+            utils.convert_datetime_format(datetime_field.to_representation(row.modified_at)),
+            utils.convert_datetime_format(
+                datetime_field.to_representation(row.deleted_at) if row.deleted_at else None),
+            utils.convert_date_format(date_field.to_representation(row.date)),
+        )
+
+    def new_path(row):
+        return (
+            utils.format_datetime(row.created_at),
+            utils.format_datetime(row.modified_at),
+            utils.format_datetime(row.deleted_at),
+            utils.format_date(row.date),
+        )
+
+    with mock.patch.object(utils, 'get_company_settings', return_value=company_settings):
+        token = start_request_memo()
+        try:
+            results = {}
+            for name, render in (('old', old_path), ('new', new_path)):
+                started = time.perf_counter()
+                results[name] = [render(row) for row in rows]
+                elapsed = time.perf_counter() - started
+                print(f'{name:<4} {len(rows)} rows in {elapsed:.3f}s  {elapsed / len(rows) * 1e6:.1f} us/row')
+        finally:
+            end_request_memo(token)
+    print('identical output:', results['old'] == results['new'])
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,51 @@
+"""
+Microbenchmark of holiday image url presigning, boto3 against the offline sigv4 presigner.
+
+    python -m holiday.holiday_module.benchmarks.bench_presign [--urls 10000]
+
+Runs without network, credentials are fake and the urls are never requested.
+"""
+import argparse
+import time
+
+import boto3
+from botocore.config import Config
+
+from holiday.holiday_module.sigv4 import SigV4Presigner
+
+ACCESS_KEY = 'AKIDEXAMPLE'
+SECRET_KEY = 'wJalrXUtnFEMI/K7MDENG+bPxRfiCYEXAMPLEKEY'
+BUCKET = 'holiday-bucket'
+REGION = 'ap-south-1'
+EXPIRATION = 300
+
+
+def bench(name, presign, keys):
+    """time presign over keys and print urls per second"""
+    started = time.perf_counter()
+    for key in keys:
+        presign(key)
+    elapsed = time.perf_counter() - started
+    print(f'{name:<10} {len(keys)} urls in {elapsed:.3f}s  {len(keys) / elapsed:,.0f} urls/s  '
+          f'{elapsed / len(keys) * 1e6:.1f} us/url')
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--urls', type=int, default=10000)
+    args = parser.parse_args()
+
+    keys = [f'media/holiday_img/holiday_{index}.png' for index in range(args.urls)]
+    s3_client = boto3.client('s3', aws_access_key_id=ACCESS_KEY, aws_secret_access_key=SECRET_KEY,
+                             region_name=REGION, config=Config(signature_version='s3v4'))
+    presigner = SigV4Presigner(ACCESS_KEY, SECRET_KEY, BUCKET, REGION)
+
+    boto3_time = bench('boto3', lambda key: s3_client.generate_presigned_url(
+        'get_object', Params={'Bucket': BUCKET, 'Key': key}, ExpiresIn=EXPIRATION), keys)
+    sigv4_time = bench('sigv4', lambda key: presigner.presign_get_object(key, EXPIRATION), keys)
+    print(f'speedup    {boto3_time / sigv4_time:.1f}x')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,60 @@
+"""
+Benchmark of public_access holiday list, cold payload build against warm cached payload.
+
+    python -m holiday.holiday_module.benchmarks.bench_public_payload [--holidays 365] [--repeat 200]
+
+Runs against a throwaway test database. Cold requests bump holiday data version before every call so
+the payload is rebuilt from database, warm requests reuse the payload stored in cache backend.
+"""
+import argparse
+import datetime
+from types import SimpleNamespace
+from unittest import mock
+
+from holiday.holiday_module.benchmarks.common import setup, benchmark_database, authenticated_user, measure, \
+    print_stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--holidays', type=int, default=365)
+    parser.add_argument('--repeat', type=int, default=200)
+    args = parser.parse_args()
+    setup()
+
+    from rest_framework.test import APIRequestFactory, force_authenticate
+    from holiday.holiday_module import views
+    from holiday.holiday_module.conditional import _incr_holiday_data_version
+    from holiday.holiday_module.models import Holidays
+
+    today = datetime.date.today()
+    company_settings = SimpleNamespace(financial_year_start_date=today,
+                                       financial_year_end_date=today + datetime.timedelta(days=args.holidays))
+    view = views.ListCreateAPIView.as_view()
+    factory = APIRequestFactory()
+    user = authenticated_user()
+
+    def public_list():
+        request = factory.get('/holiday/', {'public_access': 'true'})
+        force_authenticate(request, user=user)
+        response = view(request)
+        assert response.status_code == 200, response.status_code
+
+    def cold_public_list():
+        _incr_holiday_data_version()
+        public_list()
+
+    with benchmark_database(), mock.patch.object(views, 'get_company_settings', return_value=company_settings):
+        Holidays.objects.bulk_create(
+            Holidays(name=f'Holiday {index}', date=today + datetime.timedelta(days=index))
+            for index in range(args.holidays))
+        public_list()
+        cold = measure(cold_public_list, args.repeat)
+        warm = measure(public_list, args.repeat)
+    print_stats('cold', cold)
+    print_stats('warm', warm)
+    print(f"p50 speedup  {cold['p50'] / warm['p50']:.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,50 @@
+"""
+Throughput of the full history duration recompute with 1, 4 and 8 worker processes.
+
+    python -m holiday.holiday_module.benchmarks.bench_recompute [--users 500] [--requests 200000] [--workers 1 4 8]
+
+Runs against a throwaway test database seeded with users, leave allocations, leave and work from home
+requests. Every stored duration is reset before each run so every run rewrites the same rows.
+"""
+import argparse
+import datetime
+
+from holiday.holiday_module.benchmarks.common import setup, benchmark_database
+from holiday.holiday_module.benchmarks.seed import seed_settings, seed_holidays, seed_users, seed_requests
+
+
+def seed(users, requests):
+    """users with one allocation each and requests spread over two years"""
+    seed_settings()
+    seed_holidays(40, datetime.date.today(), step=17)
+    seed_requests(seed_users(users), max(1, requests // users))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--users', type=int, default=500)
+    parser.add_argument('--requests', type=int, default=200000)
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 4, 8])
+    parser.add_argument('--users-per-range', type=int, default=25)
+    args = parser.parse_args()
+    setup()
+
+    from leaves.models import Leave
+    from work_from_home.models import WorkFromHome
+    from holiday.holiday_module.parallel_recompute import run_parallel_recompute
+    from holiday.holiday_module.working_calendar import WorkingCalendar
+
+    with benchmark_database():
+        seed(args.users, args.requests)
+        calendar = WorkingCalendar.load()
+        for workers in args.workers:
+            Leave.objects.update(duration=0)
+            WorkFromHome.objects.update(duration=0)
+            totals, elapsed = run_parallel_recompute(calendar, workers=workers,
+                                                     users_per_range=args.users_per_range)
+            rows = sum(checked for checked, _ in totals.values())
+            print(f'workers={workers:<2} {rows} rows in {elapsed:.2f}s  {rows / elapsed:,.0f} rows/s')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,50 @@
+"""
+Benchmark of holiday name search, icontains `get_query` fallback against trigram search backend.
+
+    python -m holiday.holiday_module.benchmarks.bench_search [--holidays 100000] [--repeat 100]
+
+Runs against a throwaway PostgreSQL test database with every migration applied, so the trigram index of
+migration 0004 exists. Each query fetches the first page of results the way the holiday list does.
+"""
+import argparse
+import datetime
+
+from holiday.holiday_module.benchmarks.common import setup, benchmark_database, measure, print_stats
+from holiday.holiday_module.benchmarks.seed import seed_holidays
+
+SEARCHES = [('substring', 'festiv', False), ('words', 'good fri', False), ('prefix', 'gan', True),
+            ('typo', 'chrismas day', False)]
+PAGE_SIZE = 10
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--holidays', type=int, default=100000)
+    parser.add_argument('--repeat', type=int, default=100)
+    args = parser.parse_args()
+    setup()
+
+    from django.db import connection
+    from common.search import get_query
+    from holiday.holiday_module.models import Holidays
+    from holiday.holiday_module.search import search_holidays
+
+    with benchmark_database():
+        if connection.vendor != 'postgresql':
+            raise SystemExit('trigram search benchmark needs PostgreSQL')
+        seed_holidays(args.holidays, datetime.date(1900, 1, 1))
+        with connection.cursor() as cursor:
+            cursor.execute(f'ANALYZE "{Holidays._meta.db_table}"')
+        queryset = Holidays.objects.order_by('-id')
+        for name, search, prefix in SEARCHES:
+            fallback = measure(lambda: list(queryset.filter(get_query(search, ['name']))[:PAGE_SIZE]), args.repeat)
+            trigram = measure(lambda: list(search_holidays(queryset, search, prefix=prefix)[:PAGE_SIZE]), args.repeat)
+            print(f'{name}: {search!r}  matches icontains={queryset.filter(get_query(search, ["name"])).count()} '
+                  f'trigram={search_holidays(queryset, search, prefix=prefix, rank=False).count()}')
+            print_stats('  icontains', fallback)
+            print_stats('  trigram', trigram)
+            print(f"  p50 speedup {fallback['p50'] / trigram['p50']:.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,62 @@
+import os
+import statistics
+import time
+from contextlib import contextmanager
+from types import SimpleNamespace
+
+import django
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'holiday.settings')
+
+
+def setup():
+    """configure django for a benchmark script"""
+    django.setup()
+
+
+@contextmanager
+def benchmark_database():
+    """throwaway test database with every migration applied, destroyed on exit"""
+    from django.db import connection
+    old_name = connection.settings_dict['NAME']
+    connection.creation.create_test_db(verbosity=0, autoclobber=True)
+    try:
+        yield connection
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+
+
+def authenticated_user(user_id=1):
+    """minimal authenticated user for force_authenticate, enough for IsAuthenticated"""
+    return SimpleNamespace(id=user_id, pk=user_id, is_authenticated=True, is_active=True)
+
+
+def measure(call, repeat):
+    """run call repeat times and return latency statistics in milliseconds"""
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        call()
+        timings.append((time.perf_counter() - started) * 1000)
+    timings.sort()
+    return {
+        'count': repeat,
+        'p50': statistics.median(timings),
+        'p95': timings[min(repeat - 1, int(repeat * 0.95))],
+        'mean': statistics.fmean(timings),
+    }
+
+
+def count_queries(call):
+    """number of database queries of one call"""
+    from django.db import connection
+    from django.test.utils import CaptureQueriesContext
+    with CaptureQueriesContext(connection) as context:
+        call()
+    return len(context.captured_queries)
+
+
+def print_stats(name, stats):
+    """one line of latency statistics"""
+    print(f"{name:<12} n={stats['count']:<5} p50={stats['p50']:.2f}ms  p95={stats['p95']:.2f}ms  "
+          f"mean={stats['mean']:.2f}ms")
@@ -0,0 +1,114 @@
+"""
+Seeded data generator for benchmarks: company and attendance settings, N holidays around today, M users with a
+leave allocation each and K leave and work from home requests per user. Same seed always builds the same rows.
+"""
+import datetime
+import random
+
+HOLIDAY_WORDS = ['new', 'year', 'republic', 'independence', 'good', 'friday', 'christmas', 'day', 'diwali', 'holi',
+                 'eid', 'pongal', 'onam', 'gandhi', 'jayanti', 'labour', 'harvest', 'festival', 'founders', 'national']
+BATCH_SIZE = 5000
+
+
+def seed_settings(user_id=None):
+    """attendance settings with weekend off and company settings with financial year starting today"""
+    from settings.models import CompanySettings, SettingsTimeZone, SettingsDateFormat, SettingsCurrency, \
+        AttendanceSettings, SettingsTimeFormat
+
+    today = datetime.date.today()
+    AttendanceSettings.objects.create(created_by_id=user_id, monday=True, tuesday=True, wednesday=True, thursday=True,
+                                      friday=True, saturday=False, sunday=False, daily_working_hours="8:00")
+    time_format = SettingsTimeFormat.objects.create(created_by_id=user_id, time_format="%H:%M:%S", is_active=True)
+    return CompanySettings.objects.create(
+        created_by_id=user_id,
+        company_name="Benchmark",
+        company_email="admin@example.com",
+        company_address="Benchmark address",
+        company_phone_number="+919601457841",
+        company_website="www.example.com",
+        financial_year_start_date=today,
+        financial_year_end_date=today + datetime.timedelta(days=365),
+        file_size=10,
+        file_type="MB",
+        image_size=10,
+        image_type="MB",
+        time_zone=SettingsTimeZone.objects.create(created_by_id=user_id, time_zone="Asia/Kolkata", is_active=True),
+        time_format=time_format,
+        date_format=SettingsDateFormat.objects.create(created_by_id=user_id, date_format="%d-%m-%Y", is_active=True),
+        currency=SettingsCurrency.objects.create(created_by_id=user_id, currency="INR", is_active=True),
+        daily_sod_defaulter_execution_time=datetime.time(12).strftime(time_format.time_format),
+        is_active=True,
+    )
+
+
+def holiday_name(rng):
+    """title cased name of one to three holiday words"""
+    return ' '.join(rng.sample(HOLIDAY_WORDS, rng.randint(1, 3))).title()
+
+
+def seed_holidays(count, start, step=1, rng=None):
+    """count holidays on every step days from start, one in seven inactive"""
+    from holiday.holiday_module.models import Holidays
+
+    rng = rng or random.Random(0)
+    Holidays.objects.bulk_create(
+        (Holidays(name=holiday_name(rng), date=start + datetime.timedelta(days=index * step), is_active=bool(index % 7))
+         for index in range(count)), batch_size=BATCH_SIZE)
+
+
+def seed_users(count, prefix='user'):
+    """count active users of one role with a two year leave allocation each, returns their ids"""
+    from django.contrib.auth import get_user_model
+    from leaves.models import LeaveAllocations
+    from roles.models import Role
+
+    today = datetime.date.today()
+    role = Role.objects.create(name='Benchmark', code='BM', type='benchmark')
+    user_model = get_user_model()
+    user_model.objects.bulk_create(
+        (user_model(email=f'{prefix}{index}@example.com', username=f'{prefix}{index}', role=role, is_active=True)
+         for index in range(count)), batch_size=BATCH_SIZE)
+    user_ids = list(user_model.objects.filter(username__startswith=prefix).values_list('id', flat=True))
+    LeaveAllocations.objects.bulk_create(
+        (LeaveAllocations(user_id=user_id, total_leave=24, allocated_leave=24, allocated_year=today.year,
+                          leave_allocation_start_date=today,
+                          leave_allocation_end_date=today.replace(year=today.year + 2),
+                          remaining_leave=24, used_leave=0, exceed_leave=0, is_active=True)
+         for user_id in user_ids), batch_size=BATCH_SIZE)
+    return user_ids
+
+
+def seed_requests(user_ids, requests_per_user, rng=None):
+    """requests_per_user requests of every user over next two years, alternating leave and work from home"""
+    from leaves.models import Leave
+    from work_from_home.models import WorkFromHome
+
+    rng = rng or random.Random(0)
+    today = datetime.date.today()
+    leaves, work_from_homes = [], []
+    for user_id in user_ids:
+        for index in range(requests_per_user):
+            start_date = today + datetime.timedelta(days=rng.randint(0, 700))
+            common = dict(requested_by_id=user_id, request_from_id=user_id, type=rng.choice(["full", "half"]),
+                          start_date=start_date, end_date=start_date + datetime.timedelta(days=rng.randint(0, 6)),
+                          reason="benchmark", duration=0, status=rng.choice(["approved", "pending"]))
+            if index % 2:
+                leaves.append(Leave(isadhoc_leave=False, available_on_phone=False, available_on_city=False,
+                                    emergency_contact="+919877665456", **common))
+            else:
+                work_from_homes.append(WorkFromHome(isadhoc_wfh=False, **common))
+    Leave.objects.bulk_create(leaves, batch_size=BATCH_SIZE)
+    WorkFromHome.objects.bulk_create(work_from_homes, batch_size=BATCH_SIZE)
+
+
+def seed_dataset(holidays, users, requests_per_user, seed=0):
+    """
+    settings, holidays centred on today so the current financial year and month always have rows, users and
+    their requests
+    """
+    rng = random.Random(seed)
+    company_settings = seed_settings()
+    seed_holidays(holidays, datetime.date.today() - datetime.timedelta(days=holidays // 2), rng=rng)
+    user_ids = seed_users(users)
+    seed_requests(user_ids, requests_per_user, rng=rng)
+    return company_settings, user_ids
@@ -0,0 +1,69 @@
+import numpy
+
+DATE_DTYPE = 'datetime64[D]'
+ONE_DAY = numpy.timedelta64(1, 'D')
+
+
+def numpy_calendar(calendar, extra_holidays=()):
+    """
+    build numpy business day calendar from working calendar weekmask and holidays
+    """
+    weekmask = [day not in calendar.off_days for day in range(7)]
+    holidays = numpy.array(sorted(calendar.holiday_set.union(extra_holidays)), dtype=DATE_DTYPE)
+    return numpy.busdaycalendar(weekmask=weekmask, holidays=holidays)
+
+
+def to_dates(values):
+    """convert sequence of dates to numpy day array"""
+    return numpy.array(values, dtype=DATE_DTYPE)
+
+
+def compute_durations(calendar, start_dates, end_dates, types):
+    """
+    compute request durations for arrays of start date, end date and type in one pass,
+    full day request count one per working day and half day request count half.
+    """
+    busdaycal = numpy_calendar(calendar)
+    working_days = numpy.busday_count(to_dates(start_dates), to_dates(end_dates) + ONE_DAY, busdaycal=busdaycal)
+    weights = numpy.where(numpy.asarray(types) == "half", 0.5, 1.0)
+    return working_days * weights
+
+
+def compute_return_dates(calendar, return_dates, types, half_day_statuses, skip_dates=()):
+    """
+    compute return dates for arrays of return date, type and half day status in one pass.
+    return date is moved forward to first working day, skipping skip dates as well,
+    except first half requests which return on same day.
+    """
+    return_dates = to_dates(return_dates)
+    busdaycal = numpy_calendar(calendar, skip_dates)
+    moved = numpy.busday_offset(return_dates, 0, roll='forward', busdaycal=busdaycal)
+    same_day = (numpy.asarray(types) == "half") & (numpy.asarray(half_day_statuses) == "firsthalf")
+    return numpy.where(same_day, return_dates, moved)
+
+
+def batch_return_dates(rows, dates, calendar):
+    """
+    take rows of (id, return date, type, half day status) and return {id: new return date}
+    for rows whose return date has to move because of holidays on dates
+    """
+    if not rows:
+        return {}
+    ids, return_dates, types, half_day_statuses = zip(*rows)
+    new_dates = compute_return_dates(calendar, return_dates, types, half_day_statuses, skip_dates=dates)
+    return {
+        row_id: new_date
+        for row_id, old_date, new_date in zip(ids, return_dates, new_dates.astype(object))
+        if new_date != old_date
+    }
+
+
+def compute_request_return_dates(calendar, end_dates, types, half_day_statuses):
+    """
+    compute return dates of requests from their end dates in one pass, first working day after
+    end date except first half requests which return on their end date.
+    """
+    end_dates = to_dates(end_dates)
+    next_working_days = numpy.busday_offset(end_dates + ONE_DAY, 0, roll='forward', busdaycal=numpy_calendar(calendar))
+    same_day = (numpy.asarray(types) == "half") & (numpy.asarray(half_day_statuses) == "firsthalf")
+    return numpy.where(same_day, end_dates, next_working_days)
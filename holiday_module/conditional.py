@@ -0,0 +1,86 @@
+import datetime
+import hashlib
+import time
+
+from django.db import transaction
+from django.utils.http import parse_etags
+from rest_framework import status
+from rest_framework.response import Response
+
+from holiday.holiday_module.settings_cache import settings_version, data_version, increment_version, \
+    HOLIDAY_VERSION
+from holiday.holiday import settings
+
+
+def holiday_data_version():
+    """monotonically increasing version of holiday data shared by every process"""
+    return data_version(HOLIDAY_VERSION)
+
+
+def bump_holiday_data_version():
+    """increase holiday data version once current transaction is committed"""
+    transaction.on_commit(_incr_holiday_data_version)
+
+
+def _incr_holiday_data_version():
+    increment_version(HOLIDAY_VERSION)
+
+
+def etag_matches(request, etag, exists=None):
+    """
+    True when If-None-Match header of request matches etag, `*` only matches while a current representation
+    exists, checked with exists() when given
+    """
+    if_none_match = request.META.get('HTTP_IF_NONE_MATCH')
+    if not if_none_match:
+        return False
+    client_etags = [client_etag[2:] if client_etag.startswith('W/') else client_etag
+                    for client_etag in parse_etags(if_none_match)]
+    if etag in client_etags:
+        return True
+    return '*' in client_etags and (exists is None or exists())
+
+
+class HolidayConditionalGetMixin:
+    """
+    Conditional GET for holiday read endpoints.
+
+    The ETag is built from holiday data version and company settings version, so a matching
+    If-None-Match is answered with 304 before the queryset or serializer run. Views set
+    `etag_includes_image_urls` when the response carries presigned image urls, which change
+    once per expiration bucket, and `etag_includes_today` when the response depends on today.
+    """
+    etag_includes_image_urls = True
+    etag_includes_today = False
+
+    def get_etag(self, request):
+        """strong ETag of response for current data version and request"""
+        parts = [self.__class__.__name__, request.get_full_path()]
+        if self.etag_includes_image_urls:
+            parts.append(str(int(time.time() // settings.expiration_time)))
+        if self.etag_includes_today:
+            parts.append(datetime.date.today().isoformat())
+        digest = hashlib.sha1('|'.join(parts).encode('utf-8')).hexdigest()[:16]
+        return f'"h{holiday_data_version()}-s{settings_version()}-{digest}"'
+
+    def representation_exists(self):
+        """True when GET of view has a current representation to match `If-None-Match: *`"""
+        return True
+
+    def not_modified_response(self, request):
+        """
+        return 304 response when If-None-Match matches current ETag, otherwise remember ETag
+        for the full response and return None
+        """
+        self.etag = self.get_etag(request)
+        if self.etag and etag_matches(request, self.etag, self.representation_exists):
+            return Response(status=status.HTTP_304_NOT_MODIFIED, headers={'ETag': self.etag})
+        return None
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        """add ETag to successful GET response"""
+        response = super().finalize_response(request, response, *args, **kwargs)
+        etag = getattr(self, 'etag', None)
+        if etag and request.method == 'GET' and response.status_code == status.HTTP_200_OK:
+            response['ETag'] = etag
+        return response
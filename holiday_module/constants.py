@@ -14,4 +14,26 @@ NAME_ERROR = "Holiday with Same Name already Exists."
 HOLIDAY_MODULE_NOT_FOUND = "Holidays Module Not Found."
 CONTENT_TYPE = "multipart/form-data"
 PUBLIC_ACCESS = "public_access"
-BYTES = 1024
\ No newline at end of file
+BYTES = 1024
+IMPORT = "import"
+IMPORT_FILE_REQUIRED = "Upload a .csv or .ics File to Import Holidays."
+IMPORT_FILE_TYPE = "Import File must be .csv or .ics!"
+IMPORT_CSV_COLUMNS = "CSV File must have name and date Columns."
+IMPORT_ENCODING = "Import File must be UTF-8 Encoded."
+IMPORT_DATE_FORMAT = "Date must be in YYYY-MM-DD Format."
+IMPORT_NAME_REQUIRED = "Holiday Name is Required."
+IMPORT_NAME_LENGTH = "Holiday Name must have at most {max_length} Characters."
+IMPORT_DATE_EXISTS = "Holiday on this Date already Exists."
+IMPORT_EMPTY = "Import File does not contain any Holiday."
+HOLIDAYS_IMPORTED = "Holidays Imported Successfully."
+HOLIDAY_ORDERING_FIELDS = ['id', 'date', 'name', '-date', '-id', '-name', 'is_active', '-is_active']
+DEFAULT_HOLIDAY_ORDERING = '-id'
+PAGINATION = "pagination"
+CURSOR_PAGINATION = "cursor"
+INVALID_CURSOR = "Invalid Cursor."
+COUNT_EXACT = "exact"
+COUNT_APPROX = "approx"
+COUNT_NONE = "none"
+
+SEARCH_PREFIX = "search_prefix"
+METRICS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
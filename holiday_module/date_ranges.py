@@ -0,0 +1,78 @@
+from django.db import connections
+from django.db.models import BooleanField, F, Func, Q, Value
+
+# GiST expression index added by migration 0003 and guarded by migration 0007 on leave and work from home
+# tables, queries must build the range with the same expression for the planner to use it. daterange() raises
+# when end date is before start date, such a request gets an empty range which overlaps nothing.
+REQUEST_DATE_RANGE_SQL = ("CASE WHEN start_date <= end_date THEN daterange(start_date, end_date, '[]') "
+                          "ELSE 'empty'::daterange END")
+MULTIRANGE_MIN_VERSION = 140000
+
+
+class RequestDateRange(Func):
+    """inclusive date range of a request as REQUEST_DATE_RANGE_SQL, empty when end date is before start date"""
+    template = ("CASE WHEN %(start_date)s <= %(end_date)s THEN daterange(%(start_date)s, %(end_date)s, '[]') "
+                "ELSE 'empty'::daterange END")
+
+    def __init__(self, **extra):
+        super().__init__(F('start_date'), F('end_date'), **extra)
+
+    def as_sql(self, compiler, connection, **extra_context):
+        (start_date, start_params), (end_date, end_params) = (
+            compiler.compile(expression) for expression in self.get_source_expressions())
+        return self.template % {'start_date': start_date, 'end_date': end_date}, (
+            *start_params, *end_params, *start_params, *end_params)
+
+
+class DateRangeOfDate(Func):
+    """single day range of date, daterange(date, date, '[]')"""
+    function = 'daterange'
+    template = "%(function)s(%(expressions)s, '[]')"
+
+    def __init__(self, date, **extra):
+        super().__init__(Value(date), Value(date), **extra)
+
+
+class DateMultirange(Func):
+    """multirange of single day ranges of dates"""
+    function = 'datemultirange'
+
+    def __init__(self, dates, **extra):
+        super().__init__(*[DateRangeOfDate(date) for date in dates], **extra)
+
+
+class RangeOverlaps(Func):
+    """lhs && rhs"""
+    arg_joiner = ' && '
+    template = '(%(expressions)s)'
+    output_field = BooleanField()
+
+
+class AnyOf(Func):
+    """true when any of boolean expressions is true"""
+    arg_joiner = ' OR '
+    template = '(%(expressions)s)'
+    output_field = BooleanField()
+
+
+def supports_range_index(connection):
+    """True on PostgreSQL where migration 0003 created the GiST date range indexes"""
+    return connection.vendor == 'postgresql'
+
+
+def overlapping_dates_filter(queryset, dates):
+    """
+    filter requests of queryset whose start_date..end_date contains any of dates. On PostgreSQL 14+ it is one
+    `range && datemultirange(...)` predicate, older PostgreSQL ORs one `range && daterange` per date, both
+    answered by the GiST index. Other databases compare start and end date.
+    """
+    dates = sorted(set(dates))
+    connection = connections[queryset.db]
+    if not supports_range_index(connection):
+        query = Q()
+        for date in dates:
+            query |= Q(start_date__lte=date, end_date__gte=date)
+        return queryset.filter(query)
+    if connection.pg_version >= MULTIRANGE_MIN_VERSION:
+        return queryset.filter(RangeOverlaps(RequestDateRange(), DateMultirange(dates)))
+    return queryset.filter(AnyOf(*[RangeOverlaps(RequestDateRange(), DateRangeOfDate(date)) for date in dates]))
@@ -1,8 +1,9 @@
 import django_filters
 from django_filters import CharFilter
 
+from holiday.holiday_module.constants import HOLIDAY_ORDERING_FIELDS
 from holiday.holiday_module.models import Holidays
-from settings.models import CompanySettings
+from holiday.holiday_module.settings_cache import get_company_settings
 
 
 class YearFilter(django_filters.FilterSet):
@@ -13,22 +14,21 @@ class YearFilter(django_filters.FilterSet):
 
     def filter_startyear(self, queryset, start_year, value):
         """filter start year according to company settings of start year"""
-        company_settings = CompanySettings.objects.first()
+        company_settings = get_company_settings()
         self.queryset = self.queryset.filter(
             date__gte=f'{value}-{company_settings.financial_year_start_date.month}-{company_settings.financial_year_start_date.day}')
         return self.queryset
 
     def filter_endyear(self, queryset, end_year, value):
         """filter start year according to company settings of end year"""
-        company_settings = CompanySettings.objects.first()
+        company_settings = get_company_settings()
         self.queryset = self.queryset.filter(
             date__lte=f'{value}-{company_settings.financial_year_end_date.month}-{company_settings.financial_year_end_date.day}')
         return self.queryset
 
     def filter_ordering(self, queryset, ordering, value):
         """filter used for ordering the holiday fields"""
-        holiday_fields = ['id', 'date', 'name', '-date', '-id', '-name', 'is_active', '-is_active']
-        if value in holiday_fields:
+        if value in HOLIDAY_ORDERING_FIELDS:
             self.queryset = self.queryset.order_by(value)
         return self.queryset
 
@@ -0,0 +1,130 @@
+import csv
+import datetime
+import io
+import os
+import re
+
+from django.db import transaction
+from rest_framework.exceptions import ValidationError
+
+from holiday.holiday_module.conditional import bump_holiday_data_version
+from holiday.holiday_module.constants import IMPORT_FILE_TYPE, IMPORT_CSV_COLUMNS, IMPORT_DATE_FORMAT, IMPORT_EMPTY, \
+    IMPORT_ENCODING
+from holiday.holiday_module.jobs import enqueue_holiday_changes
+from holiday.holiday_module.models import Holidays, HolidayChangeJob
+from holiday.holiday_module.utils import strip_string
+from holiday.holiday_module.validations import validate_holiday_import_rows
+
+CSV_EXTENSION = '.csv'
+ICS_EXTENSION = '.ics'
+
+
+def parse_csv(text):
+    """
+    parse csv with name and date columns, return (row number, name, date text) rows,
+    row number counts header as first row
+    """
+    reader = csv.DictReader(io.StringIO(text))
+    columns = {column.strip().lower(): column for column in reader.fieldnames or []}
+    if 'name' not in columns or 'date' not in columns:
+        raise ValidationError({"file": IMPORT_CSV_COLUMNS})
+    return [
+        (reader.line_num, row[columns['name']] or '', (row[columns['date']] or '').strip())
+        for row in reader
+        if any(value and value.strip() for value in row.values() if isinstance(value, str))
+    ]
+
+
+def unfold_ics_lines(text):
+    """join folded icalendar content lines"""
+    lines = []
+    for line in text.splitlines():
+        if line[:1] in (' ', '\t') and lines:
+            lines[-1] += line[1:]
+        elif line:
+            lines.append(line)
+    return lines
+
+
+def unescape_ics_text(value):
+    """unescape icalendar text value"""
+    return re.sub(r'\\([\\;,nN])', lambda match: ' ' if match.group(1) in 'nN' else match.group(1), value)
+
+
+def parse_ics(text):
+    """
+    parse SUMMARY and DTSTART of every VEVENT, return (event number, name, date text) rows,
+    date text is the YYYYMMDD part of DTSTART
+    """
+    rows = []
+    event = None
+    for line in unfold_ics_lines(text):
+        prop, _, value = line.partition(':')
+        prop_name = prop.split(';', 1)[0].upper()
+        if prop_name == 'BEGIN' and value.upper() == 'VEVENT':
+            event = {}
+        elif prop_name == 'END' and value.upper() == 'VEVENT' and event is not None:
+            rows.append((len(rows) + 1, event.get('SUMMARY', ''), event.get('DTSTART', '')))
+            event = None
+        elif event is not None and prop_name == 'SUMMARY':
+            event['SUMMARY'] = unescape_ics_text(value)
+        elif event is not None and prop_name == 'DTSTART':
+            event['DTSTART'] = value.strip()[:8]
+    return rows
+
+
+def parse_date(value):
+    """date of ISO YYYY-MM-DD or icalendar YYYYMMDD text, None when invalid"""
+    for date_format in ('%Y-%m-%d', '%Y%m%d'):
+        try:
+            return datetime.datetime.strptime(value, date_format).date()
+        except ValueError:
+            continue
+    return None
+
+
+def parse_holiday_file(file_name, content):
+    """
+    parse uploaded csv or ics file into (row number, name, date) rows,
+    raise ValidationError when file is not utf-8 and with errors of every row whose date is invalid
+    """
+    extension = os.path.splitext(file_name)[1].lower()
+    if isinstance(content, bytes):
+        try:
+            content = content.decode('utf-8-sig')
+        except UnicodeDecodeError:
+            raise ValidationError({"file": IMPORT_ENCODING})
+    if extension == CSV_EXTENSION:
+        raw_rows = parse_csv(content)
+    elif extension == ICS_EXTENSION:
+        raw_rows = parse_ics(content)
+    else:
+        raise ValidationError({"file": IMPORT_FILE_TYPE})
+    if not raw_rows:
+        raise ValidationError({"file": IMPORT_EMPTY})
+    rows, row_errors = [], {}
+    for row_number, name, date_text in raw_rows:
+        date = parse_date(date_text)
+        if date is None:
+            row_errors[row_number] = {'date': IMPORT_DATE_FORMAT}
+        else:
+            rows.append((row_number, strip_string(name), date))
+    return rows, row_errors
+
+
+def import_holidays(file_name, content, created_by_id=None):
+    """
+    validate every row of holiday file in one pass, insert holidays with one bulk insert and queue
+    leave and work from home recalculation once for the whole date set, return created holidays
+    """
+    rows, row_errors = parse_holiday_file(file_name, content)
+    with transaction.atomic():
+        row_errors.update(validate_holiday_import_rows(rows))
+        if row_errors:
+            raise ValidationError(
+                {"rows": {str(row_number): errors for row_number, errors in sorted(row_errors.items())}})
+        holidays = Holidays.objects.bulk_create(
+            Holidays(name=name, date=date, created_by_id=created_by_id) for _, name, date in rows)
+        enqueue_holiday_changes({holiday.date: HolidayChangeJob.ADDED for holiday in holidays})
+        bump_holiday_data_version()
+    return holidays
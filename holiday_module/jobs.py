@@ -0,0 +1,81 @@
+import datetime
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from holiday.holiday_module.metrics import REGISTRY, RECALCULATION_SECONDS
+from holiday.holiday_module.models import HolidayChangeJob
+from holiday.holiday_module.validations import apply_holiday_changes
+from holiday.holiday_module.working_calendar import WorkingCalendar
+
+
+def collapse_window():
+    """seconds a pending job waits for further edits of the same date"""
+    return getattr(settings, 'HOLIDAY_JOB_COLLAPSE_SECONDS', 5)
+
+
+def jobs_eager():
+    """True when jobs are applied once the enqueuing transaction commits instead of by the worker, used by tests"""
+    return getattr(settings, 'HOLIDAY_JOBS_EAGER', False)
+
+
+def enqueue_holiday_change(date, change):
+    """record holiday added or removed on date in current transaction"""
+    enqueue_holiday_changes({date: change})
+
+
+def enqueue_holiday_changes(date_changes):
+    """
+    record holidays added or removed on dates in current transaction. an edit of a date which already
+    has a pending job is folded into that job and pushes it back by the collapse window.
+    """
+    available_at = timezone.now() + datetime.timedelta(seconds=collapse_window())
+    with transaction.atomic():
+        pending_jobs = {}
+        for job in HolidayChangeJob.objects.select_for_update().filter(
+                date__in=list(date_changes), status=HolidayChangeJob.PENDING).order_by('-id'):
+            pending_jobs[job.date] = job
+        new_jobs = []
+        for date, change in date_changes.items():
+            if job := pending_jobs.get(date):
+                job.change += change
+                job.available_at = available_at
+                job.save(update_fields=['change', 'available_at'])
+            else:
+                new_jobs.append(HolidayChangeJob(date=date, change=change, available_at=available_at))
+        HolidayChangeJob.objects.bulk_create(new_jobs)
+    if jobs_eager():
+        # after commit, so recalculation never runs inside the caller's transaction nor for a rolled back edit
+        transaction.on_commit(lambda: process_holiday_jobs(ignore_window=True))
+
+
+def enqueue_holiday_move(old_date, new_date):
+    """record holiday moved from old date to new date"""
+    if old_date != new_date:
+        enqueue_holiday_changes({old_date: HolidayChangeJob.REMOVED, new_date: HolidayChangeJob.ADDED})
+
+
+def process_holiday_jobs(batch_size=100, ignore_window=False):
+    """
+    apply ready jobs as one batch and mark them done in the same transaction, so a job is applied once
+    even when several workers run or a worker dies half way. returns number of jobs processed.
+    """
+    with transaction.atomic():
+        jobs = HolidayChangeJob.objects.select_for_update(skip_locked=True).filter(
+            status=HolidayChangeJob.PENDING)
+        if not ignore_window:
+            jobs = jobs.filter(available_at__lte=timezone.now())
+        jobs = list(jobs.order_by('id')[:batch_size])
+        if not jobs:
+            return 0
+        date_changes = defaultdict(int)
+        for job in jobs:
+            date_changes[job.date] += job.change
+        with RECALCULATION_SECONDS.time():
+            apply_holiday_changes(date_changes, WorkingCalendar.load())
+        HolidayChangeJob.objects.filter(id__in=[job.id for job in jobs]).update(
+            status=HolidayChangeJob.DONE, processed_at=timezone.now())
+    REGISTRY.flush()
+    return len(jobs)
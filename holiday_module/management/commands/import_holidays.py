@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.exceptions import ValidationError
+
+from holiday.holiday_module.importers import import_holidays
+
+
+class Command(BaseCommand):
+    """import holidays from csv or ics file"""
+    help = 'Import holidays from a .csv file with name and date columns or from an .ics calendar.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='path of .csv or .ics file')
+        parser.add_argument('--user-id', type=int, default=None, help='id of user recorded as creator')
+
+    def handle(self, *args, **options):
+        with open(options['path'], 'rb') as holiday_file:
+            content = holiday_file.read()
+        try:
+            holidays = import_holidays(options['path'], content, options['user_id'])
+        except ValidationError as error:
+            raise CommandError(error.detail)
+        self.stdout.write(self.style.SUCCESS(f'imported {len(holidays)} holidays'))
@@ -0,0 +1,25 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from holiday.holiday_module.jobs import process_holiday_jobs
+
+
+class Command(BaseCommand):
+    """worker applying queued holiday change jobs"""
+    help = 'Apply queued leave and work from home recalculations of holiday changes.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help='process ready jobs and exit')
+        parser.add_argument('--batch-size', type=int, default=100)
+        parser.add_argument('--sleep', type=float, default=1.0, help='seconds to wait when queue is empty')
+
+    def handle(self, *args, **options):
+        while True:
+            processed = process_holiday_jobs(batch_size=options['batch_size'])
+            if processed:
+                self.stdout.write(f'processed {processed} holiday jobs')
+                continue
+            if options['once']:
+                return
+            time.sleep(options['sleep'])
@@ -0,0 +1,51 @@
+import datetime
+
+from django.core.management.base import BaseCommand
+
+from holiday.holiday_module.parallel_recompute import run_parallel_recompute
+from holiday.holiday_module.recompute import recompute_all
+from holiday.holiday_module.working_calendar import WorkingCalendar
+
+
+class Command(BaseCommand):
+    """recompute request durations, return dates and leave allocations from the working calendar"""
+    help = ('Recompute duration and return date of leave and work from home requests from scratch and book '
+            'duration changes of approved leaves on used, remaining and exceed leave of allocations. Safe to run '
+            'again.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--since', type=datetime.date.fromisoformat, default=None, help='only requests ending on or after YYYY-MM-DD')
+        parser.add_argument('--user', type=int, action='append', dest='user_ids', help='only requests of user id')
+        parser.add_argument('--chunk-size', type=int, default=1000)
+        parser.add_argument('--dry-run', action='store_true', help='report changes without writing them')
+        parser.add_argument('--workers', type=int, default=1,
+                            help='worker processes, users are split into id ranges shared between them')
+        parser.add_argument('--users-per-range', type=int, default=200)
+        parser.add_argument('--checkpoint', default=None,
+                            help='json file recording finished user id ranges, an interrupted run resumes from it')
+
+    def handle(self, *args, **options):
+        if options['workers'] > 1 or options['checkpoint']:
+            return self.handle_parallel(options)
+        results = recompute_all(WorkingCalendar.load(), since=options['since'], user_ids=options['user_ids'],
+                                chunk_size=options['chunk_size'], dry_run=options['dry_run'])
+        for name, result in results.items():
+            if options['verbosity'] > 1:
+                for change in result.changes:
+                    self.stdout.write(' '.join(str(value) for value in change))
+            self.stdout.write(f'{name}: checked {result.checked}, '
+                              f'{"would change" if options["dry_run"] else "changed"} {result.changed}')
+
+    def handle_parallel(self, options):
+        """recompute user id ranges in worker processes and report throughput"""
+        totals, elapsed = run_parallel_recompute(
+            WorkingCalendar.load(), workers=options['workers'], since=options['since'], user_ids=options['user_ids'],
+            users_per_range=options['users_per_range'], chunk_size=options['chunk_size'],
+            dry_run=options['dry_run'], checkpoint_path=options['checkpoint'])
+        rows = 0
+        for name, (checked, changed) in totals.items():
+            rows += checked
+            self.stdout.write(f'{name}: checked {checked}, '
+                              f'{"would change" if options["dry_run"] else "changed"} {changed}')
+        self.stdout.write(f'{rows} rows in {elapsed:.1f}s, {rows / elapsed if elapsed else 0:,.0f} rows/s '
+                          f'with {options["workers"]} workers')
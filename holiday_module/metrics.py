@@ -0,0 +1,301 @@
+import atexit
+import fcntl
+import glob
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+from django.conf import settings
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+FILE_PREFIX = 'holiday_metrics_'
+# samples of exited processes folded together, see MetricsRegistry.compact
+AGGREGATE_FILE = f'{FILE_PREFIX}aggregate.json'
+COMPACT_LOCK_FILE = f'{FILE_PREFIX}compact.lock'
+
+
+def metrics_dir():
+    """directory shared by every worker process for metric files, None keeps metrics in this process only"""
+    return getattr(settings, 'HOLIDAY_METRICS_DIR', None)
+
+
+def flush_interval():
+    """seconds between two writes of metric file of a process"""
+    return getattr(settings, 'HOLIDAY_METRICS_FLUSH_SECONDS', 1)
+
+
+def file_pid(file_name):
+    """pid of process which wrote metric file holiday_metrics_<pid>_<ns>.json"""
+    return int(file_name[len(FILE_PREFIX):].split('_', 1)[0])
+
+
+def process_alive(pid):
+    """True while process pid runs on this host"""
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def write_file(path, text):
+    """write text to path atomically"""
+    with open(f'{path}.tmp', 'w') as metric_file:
+        metric_file.write(text)
+    os.replace(f'{path}.tmp', path)
+
+
+class MetricsRegistry:
+    """
+    Process local counters and histograms with no external service.
+
+    Every process keeps its samples in memory and writes them to its own json file in `metrics_dir()`, at most
+    once per `flush_interval()` seconds and at exit. Exposition sums the files of every process, including
+    processes that already exited, so counters stay monotonic when gunicorn restarts or runs several workers.
+    Files of exited processes are folded into one aggregate file on exposition, so the directory holds one file
+    per running process. Liveness is checked by pid, the directory must only be shared by processes of one host.
+    """
+
+    def __init__(self):
+        self.metrics = {}
+        self.lock = threading.Lock()
+        self.reset_process()
+
+    def reset_process(self):
+        """start empty samples for current process, forked workers must not count samples of their parent"""
+        self.pid = os.getpid()
+        self.file_name = f'{FILE_PREFIX}{self.pid}_{time.time_ns()}.json'
+        self.samples = {}
+        self.flushed_at = 0.0
+
+    def register(self, metric):
+        """add metric once, return the registered one"""
+        with self.lock:
+            return self.metrics.setdefault(metric.name, metric)
+
+    def update(self, name, labels, update):
+        """apply update to sample of metric name with labels"""
+        with self.lock:
+            if os.getpid() != self.pid:
+                self.reset_process()
+            samples = self.samples.setdefault(name, {})
+            key = tuple(sorted(labels.items()))
+            samples[key] = update(samples.get(key))
+
+    def flush(self, force=False):
+        """write samples of this process to its metric file when flush interval passed"""
+        directory = metrics_dir()
+        now = time.monotonic()
+        if not directory or (not force and now - self.flushed_at < flush_interval()):
+            return
+        with self.lock:
+            if os.getpid() != self.pid:
+                self.reset_process()
+            data = json.dumps({name: [[dict(key), value] for key, value in values.items()]
+                               for name, values in self.samples.items()})
+            self.flushed_at = now
+        os.makedirs(directory, exist_ok=True)
+        write_file(os.path.join(directory, self.file_name), data)
+
+    def read_files(self, directory):
+        """
+        aggregate file content and {file name: samples} of every process file, leaving out files already folded
+        into aggregate file
+        """
+        files = {}
+        for path in glob.glob(os.path.join(directory, f'{FILE_PREFIX}*.json')):
+            try:
+                with open(path) as metric_file:
+                    files[os.path.basename(path)] = json.load(metric_file)
+            except (OSError, ValueError):
+                continue
+        aggregate = files.pop(AGGREGATE_FILE, None) or {'folded': [], 'samples': {}}
+        for file_name in aggregate['folded']:
+            files.pop(file_name, None)
+        return aggregate, files
+
+    def merge_samples(self, merged, samples):
+        """add file samples of registered metrics to merged {name: {labels key: value}}"""
+        for name, values in samples.items():
+            metric = self.metrics.get(name)
+            if metric is None:
+                continue
+            merged_values = merged.setdefault(name, {})
+            for labels, value in values:
+                key = tuple(sorted(labels.items()))
+                merged_values[key] = metric.merge(merged_values.get(key), value)
+        return merged
+
+    def compact(self, directory):
+        """
+        fold files of exited processes into aggregate file and remove them. aggregate file lists the files it
+        holds until they are gone, so a compaction stopped half way never counts a file twice. runs in one
+        process at a time, others skip it.
+        """
+        with open(os.path.join(directory, COMPACT_LOCK_FILE), 'a') as lock_file:
+            try:
+                fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except OSError:
+                return
+            aggregate, files = self.read_files(directory)
+            exited = sorted(file_name for file_name in files if not process_alive(file_pid(file_name)))
+            folded = [file_name for file_name in aggregate['folded']
+                      if os.path.exists(os.path.join(directory, file_name))]
+            if not exited and folded == aggregate['folded']:
+                return
+            merged = self.merge_samples({}, aggregate['samples'])
+            for file_name in exited:
+                self.merge_samples(merged, files[file_name])
+            write_file(os.path.join(directory, AGGREGATE_FILE), json.dumps({
+                'folded': folded + exited,
+                'samples': {name: [[dict(key), value] for key, value in values.items()]
+                            for name, values in merged.items()},
+            }))
+            for file_name in exited:
+                try:
+                    os.remove(os.path.join(directory, file_name))
+                except FileNotFoundError:
+                    pass
+
+    def collect(self):
+        """samples of every process summed per metric and labels"""
+        directory = metrics_dir()
+        if not directory:
+            with self.lock:
+                return {name: dict(values) for name, values in self.samples.items()}
+        self.flush(force=True)
+        self.compact(directory)
+        aggregate, files = self.read_files(directory)
+        merged = self.merge_samples({}, aggregate['samples'])
+        for samples in files.values():
+            self.merge_samples(merged, samples)
+        return merged
+
+    def render(self):
+        """prometheus text exposition format of every registered metric"""
+        samples = self.collect()
+        lines = []
+        for name, metric in sorted(self.metrics.items()):
+            lines.append(f'# HELP {metric.sample_name} {metric.documentation}')
+            lines.append(f'# TYPE {metric.sample_name} {metric.type}')
+            for key, value in sorted(samples.get(name, {}).items()):
+                lines.extend(metric.render(dict(key), value))
+        return '\n'.join(lines) + '\n'
+
+
+def format_labels(labels):
+    """`{name="value",...}` of labels, empty string without labels"""
+    if not labels:
+        return ''
+    escaped = (name + '="' + str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') + '"'
+               for name, value in labels.items())
+    return '{' + ','.join(escaped) + '}'
+
+
+def format_value(value):
+    """prometheus sample value"""
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    """monotonically increasing count"""
+    type = 'counter'
+
+    def __init__(self, name, documentation, registry=None):
+        self.name = name
+        self.documentation = documentation
+        self.registry = registry or REGISTRY
+        self.registry.register(self)
+
+    @property
+    def sample_name(self):
+        return f'{self.name}_total'
+
+    def inc(self, amount=1, **labels):
+        """add amount to count of labels"""
+        self.registry.update(self.name, labels, lambda value: (value or 0) + amount)
+
+    @staticmethod
+    def merge(value, other):
+        """sum of counts of two processes"""
+        return (value or 0) + other
+
+    def render(self, labels, value):
+        """sample lines of labels"""
+        return [f'{self.sample_name}{format_labels(labels)} {format_value(value)}']
+
+
+class Histogram:
+    """distribution of observed values in cumulative buckets with their sum and count"""
+    type = 'histogram'
+
+    def __init__(self, name, documentation, buckets=DEFAULT_BUCKETS, registry=None):
+        self.name = name
+        self.documentation = documentation
+        self.buckets = tuple(buckets)
+        self.registry = registry or REGISTRY
+        self.registry.register(self)
+
+    @property
+    def sample_name(self):
+        return self.name
+
+    def observe(self, value, **labels):
+        """count value in its bucket, sum and count of labels"""
+        def update(sample):
+            counts, total, count = sample or ([0] * len(self.buckets), 0.0, 0)
+            counts = list(counts)
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[index] += 1
+                    break
+            return [counts, total + value, count + 1]
+        self.registry.update(self.name, labels, update)
+
+    @contextmanager
+    def time(self, **labels):
+        """observe seconds spent in block"""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    @staticmethod
+    def merge(value, other):
+        """bucket counts, sum and count of two processes added up"""
+        if value is None:
+            return other
+        return [[count + other_count for count, other_count in zip(value[0], other[0])], value[1] + other[1],
+                value[2] + other[2]]
+
+    def render(self, labels, value):
+        """cumulative bucket, sum and count lines of labels"""
+        counts, total, count = value
+        lines, cumulative = [], 0
+        for bound, bucket_count in zip(self.buckets, counts):
+            cumulative += bucket_count
+            lines.append(f'{self.name}_bucket{format_labels({**labels, "le": format_value(float(bound))})} {cumulative}')
+        lines.append(f'{self.name}_bucket{format_labels({**labels, "le": "+Inf"})} {count}')
+        lines.append(f'{self.name}_sum{format_labels(labels)} {format_value(float(total))}')
+        lines.append(f'{self.name}_count{format_labels(labels)} {count}')
+        return lines
+
+
+REGISTRY = MetricsRegistry()
+atexit.register(REGISTRY.flush, force=True)
+
+REQUEST_SECONDS = Histogram('holiday_request_duration_seconds', 'Latency of holiday API requests per view and method.')
+RECALCULATION_SECONDS = Histogram('holiday_recalculation_duration_seconds',
+                                  'Time spent recalculating leave and work from home requests per job batch.')
+HOLIDAY_CHANGES = Counter('holiday_changes', 'Holiday dates added or removed and recalculated.')
+RECALCULATED_ROWS = Counter('holiday_recalculated_rows',
+                            'Leave, work from home and leave allocation rows updated by holiday recalculation.')
+SERIALIZATION_SECONDS = Histogram('holiday_serialization_duration_seconds',
+                                  'Time spent serializing holiday responses per view.')
+S3_SECONDS = Histogram('holiday_s3_duration_seconds', 'Time spent in S3 presign and delete calls.')
+CACHE_REQUESTS = Counter('holiday_cache_requests', 'Cache lookups per cache and result, hit or miss.')
@@ -0,0 +1,184 @@
+import asyncio
+import logging
+import os
+import threading
+import time
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+
+from holiday.holiday_module.metrics import REGISTRY, REQUEST_SECONDS
+from holiday.holiday_module.profiling import StackSampler, profile_dir, profile_sample_rate, profile_token, \
+    profile_interval, profile_max_files, should_profile, write_profile, PROFILE_HEADER
+from holiday.holiday_module.query_tracer import trace_queries
+from holiday.holiday_module.server_timing import server_timing_enabled, start_stage_timings, stop_stage_timings, \
+    server_timing_header
+from holiday.holiday_module.settings_cache import start_request_memo, end_request_memo
+
+logger = logging.getLogger(__name__)
+
+
+class HolidayMiddleware:
+    """
+    base of holiday middlewares that run natively under WSGI and ASGI. `__call__` goes to `__acall__` when the
+    next handler is a coroutine, so async views are not pushed through a thread by a sync only middleware.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.is_async = asyncio.iscoroutinefunction(get_response)
+        if self.is_async:
+            # django tells async handlers apart with asyncio.iscoroutinefunction, as MiddlewareMixin does
+            self._is_coroutine = asyncio.coroutines._is_coroutine
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        return self.handle(request)
+
+    def handle(self, request):
+        raise NotImplementedError
+
+    async def __acall__(self, request):
+        raise NotImplementedError
+
+
+class SettingsCacheMiddleware(HolidayMiddleware):
+    """
+    keep company and attendance settings memo for the duration of one request
+    """
+
+    def handle(self, request):
+        token = start_request_memo()
+        try:
+            return self.get_response(request)
+        finally:
+            end_request_memo(token)
+
+    async def __acall__(self, request):
+        token = start_request_memo()
+        try:
+            return await self.get_response(request)
+        finally:
+            end_request_memo(token)
+
+
+class QueryTracerMiddleware:
+    """
+    trace queries of every request and log query shapes repeated from one call site, enabled by
+    HOLIDAY_QUERY_TRACER setting. sync only, since the trace wraps the connection of the thread running the request:
+    django then serves async views through async_to_sync, so their async orm queries run in that same thread.
+    """
+
+    def __init__(self, get_response):
+        if not getattr(settings, 'HOLIDAY_QUERY_TRACER', False):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        with trace_queries(label=f'{request.method} {request.path}'):
+            return self.get_response(request)
+
+
+class MetricsMiddleware(HolidayMiddleware):
+    """
+    record latency of every request per url name, method and status class, and write metrics of the
+    process for the metrics endpoint
+    """
+
+    def handle(self, request):
+        started = time.perf_counter()
+        response = self.get_response(request)
+        self.observe(request, response, started)
+        return response
+
+    async def __acall__(self, request):
+        started = time.perf_counter()
+        response = await self.get_response(request)
+        self.observe(request, response, started)
+        return response
+
+    @staticmethod
+    def observe(request, response, started):
+        """record latency of request started at perf counter `started`"""
+        resolver_match = getattr(request, 'resolver_match', None)
+        REQUEST_SECONDS.observe(time.perf_counter() - started,
+                                view=resolver_match.url_name if resolver_match else 'unmatched',
+                                method=request.method, status=f'{response.status_code // 100}xx')
+        REGISTRY.flush()
+
+
+class ServerTimingMiddleware(HolidayMiddleware):
+    """
+    collect stage timings of every request, report them in Server-Timing header and a debug log line,
+    enabled by HOLIDAY_SERVER_TIMING setting
+    """
+
+    def __init__(self, get_response):
+        if not server_timing_enabled():
+            raise MiddlewareNotUsed
+        super().__init__(get_response)
+
+    def handle(self, request):
+        started = time.perf_counter()
+        token = start_stage_timings()
+        try:
+            response = self.get_response(request)
+        finally:
+            timings = stop_stage_timings(token)
+        return self.add_header(request, response, timings, started)
+
+    async def __acall__(self, request):
+        started = time.perf_counter()
+        token = start_stage_timings()
+        try:
+            response = await self.get_response(request)
+        finally:
+            timings = stop_stage_timings(token)
+        return self.add_header(request, response, timings, started)
+
+    @staticmethod
+    def add_header(request, response, timings, started):
+        """set Server-Timing header of stage timings and total since perf counter `started`"""
+        header = server_timing_header(timings, total=time.perf_counter() - started)
+        response['Server-Timing'] = header
+        logger.debug('server timing %s %s %s', request.method, request.path, header)
+        return response
+
+
+class ProfilingMiddleware:
+    """
+    sample stacks of a HOLIDAY_PROFILE_SAMPLE_RATE fraction of holiday view requests and of every request with
+    X-Holiday-Profile header equal to HOLIDAY_PROFILE_TOKEN, written as collapsed stack files to the ring buffer
+    in HOLIDAY_PROFILE_DIR. requests that are not sampled only pay for the sampling decision. sync only, since
+    stacks are sampled from the thread running the view, so async views are served through a thread while enabled.
+    """
+
+    def __init__(self, get_response):
+        self.directory = profile_dir()
+        self.sample_rate = profile_sample_rate()
+        self.token = profile_token()
+        if not self.directory or not (self.sample_rate or self.token):
+            raise MiddlewareNotUsed
+        self.interval = profile_interval()
+        self.max_files = profile_max_files()
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        sampler = getattr(request, 'holiday_stack_sampler', None)
+        if sampler is not None:
+            elapsed = sampler.stop()
+            path = write_profile(self.directory, f'{request.method} {request.path}', sampler.stacks,
+                                 self.max_files)
+            response[PROFILE_HEADER] = os.path.basename(path)
+            logger.debug('profiled %s %s in %.1fms, %s', request.method, request.path, elapsed * 1000, path)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        """start sampler once view of request is known"""
+        if should_profile(request, view_func, self.sample_rate, self.token):
+            request.holiday_stack_sampler = StackSampler(threading.get_ident(), self.interval).start()
+        return None
@@ -0,0 +1,51 @@
+# Generated by Django 4.1 on 2026-10-18 09:55
+
+from django.db import migrations, models
+
+# indexes on tables of leaves and work_from_home apps, shaped to holiday recalculation queries:
+# requests overlapping a holiday date (end_date >= d AND start_date <= d), requests returning on a date and
+# the active allocation of a user.
+# they live here and not in the owning apps because only holiday recalculation runs these queries and those
+# apps are maintained outside this package. RunPython creates them in the database without adding them to
+# the migration state of leaves and work_from_home, so makemigrations of those apps never tries to drop them.
+# dependencies are pinned to concrete migrations of those apps: '__latest__' resolves to whatever migration
+# is newest when migrate runs, so a database that applied this one would fail the consistency check.
+REQUEST_INDEXES = [
+    ('leaves', 'Leave', models.Index(fields=['end_date', 'start_date'], name='leave_end_start_date_idx')),
+    ('leaves', 'Leave', models.Index(fields=['return_date'], name='leave_return_date_idx')),
+    ('work_from_home', 'WorkFromHome', models.Index(fields=['end_date', 'start_date'], name='wfh_end_start_date_idx')),
+    ('work_from_home', 'WorkFromHome', models.Index(fields=['return_date'], name='wfh_return_date_idx')),
+    ('leaves', 'LeaveAllocations', models.Index(fields=['user'], condition=models.Q(is_active=True),
+                                                name='leave_alloc_active_user_idx')),
+]
+
+
+def add_request_indexes(apps, schema_editor):
+    for app_label, model_name, index in REQUEST_INDEXES:
+        schema_editor.add_index(apps.get_model(app_label, model_name), index)
+
+
+def remove_request_indexes(apps, schema_editor):
+    for app_label, model_name, index in REQUEST_INDEXES:
+        schema_editor.remove_index(apps.get_model(app_label, model_name), index)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('holiday_module', '0001_initial'),
+        ('leaves', '0001_initial'),
+        ('work_from_home', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='holidays',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['date'], name='holidays_active_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='holidays',
+            index=models.Index(fields=['name', 'date'], name='holidays_name_date_idx'),
+        ),
+        migrations.RunPython(add_request_indexes, remove_request_indexes),
+    ]
@@ -0,0 +1,36 @@
+from django.db import migrations
+
+# GiST expression indexes on inclusive request date range, used by date_ranges.overlapping_dates_filter.
+# an expression index keeps leave and work from home tables free of columns their own apps do not know about.
+DATE_RANGE_INDEXES = [
+    ('leaves', 'Leave', 'leave_date_range_gist_idx'),
+    ('work_from_home', 'WorkFromHome', 'wfh_date_range_gist_idx'),
+]
+
+
+def add_date_range_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for app_label, model_name, index_name in DATE_RANGE_INDEXES:
+        table = apps.get_model(app_label, model_name)._meta.db_table
+        schema_editor.execute(
+            f"CREATE INDEX IF NOT EXISTS {schema_editor.quote_name(index_name)} ON {schema_editor.quote_name(table)} "
+            f"USING gist (daterange(start_date, end_date, '[]'))")
+
+
+def remove_date_range_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for _, _, index_name in DATE_RANGE_INDEXES:
+        schema_editor.execute(f"DROP INDEX IF EXISTS {schema_editor.quote_name(index_name)}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('holiday_module', '0002_request_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(add_date_range_indexes, remove_date_range_indexes),
+    ]
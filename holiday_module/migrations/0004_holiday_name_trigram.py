@@ -0,0 +1,32 @@
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations
+
+# GIN trigram index on UPPER(name), used by search.search_holidays for icontains, istartswith and similarity
+NAME_TRIGRAM_INDEX = 'holidays_name_trgm_idx'
+
+
+def add_name_trigram_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    table = apps.get_model('holiday_module', 'Holidays')._meta.db_table
+    schema_editor.execute(
+        f"CREATE INDEX IF NOT EXISTS {schema_editor.quote_name(NAME_TRIGRAM_INDEX)} ON {schema_editor.quote_name(table)} "
+        f"USING gin (UPPER(name) gin_trgm_ops)")
+
+
+def remove_name_trigram_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute(f"DROP INDEX IF EXISTS {schema_editor.quote_name(NAME_TRIGRAM_INDEX)}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('holiday_module', '0003_request_date_range_gist'),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        migrations.RunPython(add_name_trigram_index, remove_name_trigram_index),
+    ]
@@ -0,0 +1,32 @@
+import time
+
+from django.db import migrations, models
+
+SETTINGS_VERSION = 'settings_version'
+
+
+def add_settings_version(apps, schema_editor):
+    DataVersion = apps.get_model('holiday_module', 'DataVersion')
+    # start from current time so versions never go back to one a process cached before the row existed
+    DataVersion.objects.get_or_create(name=SETTINGS_VERSION, defaults={'version': int(time.time())})
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('holiday_module', '0004_holiday_name_trigram'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DataVersion',
+            fields=[
+                ('name', models.CharField(max_length=50, primary_key=True, serialize=False)),
+                ('version', models.BigIntegerField()),
+            ],
+            options={
+                'db_table': 'HolidayDataVersions',
+            },
+        ),
+        migrations.RunPython(add_settings_version, migrations.RunPython.noop),
+    ]
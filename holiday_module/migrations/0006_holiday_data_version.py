@@ -0,0 +1,22 @@
+import time
+
+from django.db import migrations
+
+HOLIDAY_VERSION = 'holiday_version'
+
+
+def add_holiday_version(apps, schema_editor):
+    DataVersion = apps.get_model('holiday_module', 'DataVersion')
+    # start from current time so versions never go back to one a process cached before the row existed
+    DataVersion.objects.get_or_create(name=HOLIDAY_VERSION, defaults={'version': int(time.time())})
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('holiday_module', '0005_data_version'),
+    ]
+
+    operations = [
+        migrations.RunPython(add_holiday_version, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,42 @@
+from django.db import migrations
+
+# rebuild GiST date range indexes of migration 0003 on an expression which cannot raise: daterange() fails on
+# a request whose end date is before its start date, which made inserting such a row and any query scanning
+# it fail. such a request gets an empty range, overlapping no date, as date_ranges.RequestDateRange builds it.
+DATE_RANGE_INDEXES = [
+    ('leaves', 'Leave', 'leave_date_range_gist_idx'),
+    ('work_from_home', 'WorkFromHome', 'wfh_date_range_gist_idx'),
+]
+GUARDED_DATE_RANGE = ("CASE WHEN start_date <= end_date THEN daterange(start_date, end_date, '[]') "
+                      "ELSE 'empty'::daterange END")
+DATE_RANGE = "daterange(start_date, end_date, '[]')"
+
+
+def rebuild_date_range_indexes(apps, schema_editor, expression):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for app_label, model_name, index_name in DATE_RANGE_INDEXES:
+        table = apps.get_model(app_label, model_name)._meta.db_table
+        schema_editor.execute(f"DROP INDEX IF EXISTS {schema_editor.quote_name(index_name)}")
+        schema_editor.execute(
+            f"CREATE INDEX {schema_editor.quote_name(index_name)} ON {schema_editor.quote_name(table)} "
+            f"USING gist (({expression}))")
+
+
+def guard_date_range_indexes(apps, schema_editor):
+    rebuild_date_range_indexes(apps, schema_editor, GUARDED_DATE_RANGE)
+
+
+def unguard_date_range_indexes(apps, schema_editor):
+    rebuild_date_range_indexes(apps, schema_editor, DATE_RANGE)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('holiday_module', '0006_holiday_data_version'),
+    ]
+
+    operations = [
+        migrations.RunPython(guard_date_range_indexes, unguard_date_range_indexes),
+    ]
@@ -0,0 +1,33 @@
+from django.db import migrations, models
+import django.utils.timezone
+
+# queue table of holiday_module.jobs. kept out of 0001, which databases created before the app shipped migrations
+# fake, so it is created on those databases too.
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('holiday_module', '0007_guard_request_date_range'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='HolidayChangeJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('change', models.SmallIntegerField()),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('done', 'Done')], default='pending', max_length=10)),
+                ('available_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('processed_at', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'db_table': 'HolidayChangeJobs',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='holidaychangejob',
+            index=models.Index(fields=['status', 'available_at'], name='holiday_job_status_idx'),
+        ),
+    ]
@@ -40,6 +40,50 @@ class Holidays(Common):
         permissions = [
             ("list_holidays", "Can list holidays")
         ]
+        indexes = [
+            # active holidays of a date range, used by calendar, public list and financial year list
+            models.Index(fields=['date'], condition=models.Q(is_active=True), name='holidays_active_date_idx'),
+            # duplicate name check inside a financial year
+            models.Index(fields=['name', 'date'], name='holidays_name_date_idx'),
+        ]
 
     def __str__(self):
         return self.name
+
+
+class HolidayChangeJob(models.Model):
+    """queued recalculation of leave and work from home requests for a holiday added or removed on date"""
+    PENDING = 'pending'
+    DONE = 'done'
+    STATUS_CHOICES = [(PENDING, 'Pending'), (DONE, 'Done')]
+    ADDED = 1
+    REMOVED = -1
+
+    date = models.DateField()
+    # net holiday change on date, 1 when added, -1 when removed, 0 when edits cancelled each other
+    change = models.SmallIntegerField()
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=PENDING)
+    available_at = models.DateTimeField(default=timezone.now)
+    created_at = models.DateTimeField(default=timezone.now)
+    processed_at = models.DateTimeField(blank=True, null=True)
+
+    class Meta:
+        db_table = 'HolidayChangeJobs'
+        indexes = [
+            models.Index(fields=['status', 'available_at'], name='holiday_job_status_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.date} {self.change:+d} {self.status}'
+
+
+class DataVersion(models.Model):
+    """version of cached data shared by every process, increased whenever the data changes"""
+    name = models.CharField(max_length=50, primary_key=True)
+    version = models.BigIntegerField()
+
+    class Meta:
+        db_table = 'HolidayDataVersions'
+
+    def __str__(self):
+        return f'{self.name} {self.version}'
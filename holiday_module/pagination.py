@@ -1,4 +1,18 @@
-from rest_framework.pagination import PageNumberPagination
+import base64
+import binascii
+import json
+from urllib.parse import urlencode
+
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db import connections
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+
+from holiday.holiday_module.constants import HOLIDAY_ORDERING_FIELDS, DEFAULT_HOLIDAY_ORDERING, INVALID_CURSOR, \
+    COUNT_EXACT, COUNT_APPROX, COUNT_NONE
 
 
 class CustomPagination(PageNumberPagination):
@@ -6,3 +20,111 @@ class CustomPagination(PageNumberPagination):
     custom pagination for list API
     """
     page_size_query_param = 'page_size'
+
+
+def estimated_count(queryset):
+    """row estimate of query planner, exact count on databases without EXPLAIN estimates"""
+    connection = connections[queryset.db]
+    if connection.vendor != 'postgresql':
+        return queryset.count()
+    sql, params = queryset.order_by().query.sql_with_params()
+    with connection.cursor() as cursor:
+        cursor.execute(f'EXPLAIN (FORMAT JSON) {sql}', params)
+        plan = cursor.fetchone()[0]
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]['Plan']['Plan Rows'])
+
+
+class HolidayKeysetPagination(BasePagination):
+    """
+    keyset pagination for holiday list ordered by an allowed ordering field with id as tie breaker.
+
+    next page is read with `(field, id)` greater or less than the last row of previous page so deep
+    pages cost the same as the first one. `count` query parameter selects total: exact (default),
+    approx from query planner estimate or none. Any ordering of queryset is replaced, so searches are not
+    ranked by similarity in this mode.
+    """
+    page_size = api_settings.PAGE_SIZE
+    page_size_query_param = 'page_size'
+    max_page_size = 1000
+    cursor_query_param = 'cursor'
+    ordering_query_param = 'ordering'
+    count_query_param = 'count'
+
+    def get_ordering(self, request):
+        """ordering field name and direction of request"""
+        ordering = request.query_params.get(self.ordering_query_param)
+        if ordering not in HOLIDAY_ORDERING_FIELDS:
+            ordering = DEFAULT_HOLIDAY_ORDERING
+        return ordering.lstrip('-'), ordering.startswith('-')
+
+    def get_page_size(self, request):
+        try:
+            page_size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        return min(page_size, self.max_page_size) if page_size > 0 else self.page_size
+
+    def decode_cursor(self, request, queryset):
+        """(value, id) of last row of previous page, None on first page"""
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            cursor = json.loads(base64.urlsafe_b64decode(encoded.encode('ascii')))
+            if cursor['o'] != self.ordering:
+                raise ValueError
+            field = queryset.model._meta.get_field(self.field)
+            return field.to_python(cursor['v']), int(cursor['id'])
+        except (TypeError, ValueError, KeyError, binascii.Error, DjangoValidationError):
+            raise NotFound(INVALID_CURSOR)
+
+    def encode_cursor(self, row):
+        value = row[self.field] if isinstance(row, dict) else getattr(row, self.field)
+        row_id = row['id'] if isinstance(row, dict) else row.id
+        if hasattr(value, 'isoformat'):
+            value = value.isoformat()
+        cursor = json.dumps({'o': self.ordering, 'v': value, 'id': row_id}, separators=(',', ':'))
+        return base64.urlsafe_b64encode(cursor.encode('utf-8')).decode('ascii')
+
+    def get_count(self, queryset, request):
+        count_mode = request.query_params.get(self.count_query_param, COUNT_EXACT)
+        if count_mode == COUNT_NONE:
+            return None
+        if count_mode == COUNT_APPROX:
+            return estimated_count(queryset)
+        return queryset.count()
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.field, descending = self.get_ordering(request)
+        self.ordering = f"{'-' if descending else ''}{self.field}"
+        self.count = self.get_count(queryset, request)
+        prefix = '-' if descending else ''
+        queryset = queryset.order_by(f'{prefix}{self.field}', f'{prefix}id')
+        cursor = self.decode_cursor(request, queryset)
+        if cursor is not None:
+            value, last_id = cursor
+            lookup = 'lt' if descending else 'gt'
+            queryset = queryset.filter(
+                Q(**{f'{self.field}__{lookup}': value}) | Q(**{self.field: value, f'id__{lookup}': last_id}))
+        page_size = self.get_page_size(request)
+        rows = list(queryset[:page_size + 1])
+        self.next_cursor = self.encode_cursor(rows[page_size - 1]) if len(rows) > page_size else None
+        return rows[:page_size]
+
+    def get_next_link(self):
+        if self.next_cursor is None:
+            return None
+        query_params = self.request.query_params.copy()
+        query_params[self.cursor_query_param] = self.next_cursor
+        query = urlencode(sorted(query_params.lists()), doseq=True)
+        return self.request.build_absolute_uri(f'{self.request.path}?{query}')
+
+    def get_paginated_response(self, data):
+        return Response({
+            'count': self.count,
+            'next': self.get_next_link(),
+            'results': data,
+        })
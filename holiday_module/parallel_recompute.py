@@ -0,0 +1,134 @@
+import json
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import django
+
+_worker_calendar = None
+
+
+def user_id_ranges(since=None, user_ids=None, users_per_range=200):
+    """split sorted ids of users in recompute scope into inclusive (first id, last id) ranges"""
+    from holiday.holiday_module.recompute import REQUEST_MODELS, request_queryset
+
+    ids = set()
+    for model in REQUEST_MODELS:
+        ids.update(request_queryset(model, since, user_ids).values_list('request_from', flat=True).distinct())
+    ids = sorted(ids)
+    return [[ids[index], ids[min(index + users_per_range, len(ids)) - 1]]
+            for index in range(0, len(ids), users_per_range)]
+
+
+class Checkpoint:
+    """
+    json file holding user id ranges of a run and the ones already recomputed, so an interrupted
+    run resumes with the remaining ranges. a file written for other options is ignored.
+    """
+
+    def __init__(self, path, options):
+        self.path = path
+        self.options = options
+        self.ranges = None
+        self.done = {}
+        if path and os.path.exists(path):
+            with open(path) as checkpoint_file:
+                state = json.load(checkpoint_file)
+            if state.get('options') == options:
+                self.ranges = state['ranges']
+                self.done = state['done']
+
+    def is_done(self, user_range):
+        return self.key(user_range) in self.done
+
+    def mark_done(self, user_range, counts):
+        """record finished range with its counts and write file atomically"""
+        self.done[self.key(user_range)] = counts
+        self.save()
+
+    def save(self):
+        if not self.path:
+            return
+        temporary_path = f'{self.path}.tmp'
+        with open(temporary_path, 'w') as checkpoint_file:
+            json.dump({'options': self.options, 'ranges': self.ranges, 'done': self.done}, checkpoint_file)
+        os.replace(temporary_path, self.path)
+
+    def remove(self):
+        """drop checkpoint file of a finished run"""
+        if self.path and os.path.exists(self.path):
+            os.remove(self.path)
+
+    @staticmethod
+    def key(user_range):
+        return f'{user_range[0]}-{user_range[1]}'
+
+
+def init_worker(holiday_dates, off_days, database_name):
+    """
+    set up django in worker process with its own connection and a read only calendar built from
+    plain dates, as the calendar class can only be imported once django is set up
+    """
+    global _worker_calendar
+    django.setup()
+    from django.db import connections
+    from holiday.holiday_module.working_calendar import WorkingCalendar
+    connections['default'].settings_dict['NAME'] = database_name
+    _worker_calendar = WorkingCalendar(holiday_dates, off_days)
+
+
+def recompute_user_range(user_range, since, chunk_size, dry_run, calendar=None):
+    """recompute every request and allocation of users in range, return range and {name: [checked, changed]}"""
+    from holiday.holiday_module.recompute import recompute_all
+
+    results = recompute_all(calendar or _worker_calendar, since=since, chunk_size=chunk_size, dry_run=dry_run,
+                            user_range=tuple(user_range))
+    return user_range, {name: [result.checked, result.changed] for name, result in results.items()}
+
+
+def run_parallel_recompute(calendar, workers=1, since=None, user_ids=None, users_per_range=200, chunk_size=1000,
+                           dry_run=False, checkpoint_path=None, progress=None):
+    """
+    recompute durations with users partitioned into id ranges processed by a pool of worker processes,
+    return ({name: [checked, changed]}, elapsed seconds). every range is written in chunks of chunk_size
+    and recorded in checkpoint file once finished, unless dry run. checkpoint file is removed when every
+    range is finished.
+    """
+    from django.db import connections
+
+    options = {'since': since.isoformat() if since else None, 'user_ids': sorted(user_ids or []),
+               'users_per_range': users_per_range}
+    checkpoint = Checkpoint(None if dry_run else checkpoint_path, options)
+    if checkpoint.ranges is None:
+        checkpoint.ranges = user_id_ranges(since, user_ids, users_per_range)
+        checkpoint.save()
+    pending_ranges = [user_range for user_range in checkpoint.ranges if not checkpoint.is_done(user_range)]
+    totals = {}
+    started = time.perf_counter()
+
+    def collect(user_range, counts):
+        for name, (checked, changed) in counts.items():
+            total = totals.setdefault(name, [0, 0])
+            total[0] += checked
+            total[1] += changed
+        if not dry_run:
+            checkpoint.mark_done(user_range, counts)
+        if progress:
+            progress(user_range, counts)
+
+    if workers <= 1:
+        for user_range in pending_ranges:
+            collect(*recompute_user_range(user_range, since, chunk_size, dry_run, calendar))
+    else:
+        database_name = connections['default'].settings_dict['NAME']
+        connections.close_all()
+        with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn'),
+                                 initializer=init_worker,
+                                 initargs=(calendar.holidays, sorted(calendar.off_days), database_name)) as executor:
+            futures = [executor.submit(recompute_user_range, user_range, since, chunk_size, dry_run)
+                       for user_range in pending_ranges]
+            for future in as_completed(futures):
+                collect(*future.result())
+    checkpoint.remove()
+    return totals, time.perf_counter() - started
@@ -0,0 +1,117 @@
+import os
+import random
+import sys
+import threading
+import time
+from collections import Counter
+
+from django.conf import settings
+from django.utils.crypto import constant_time_compare
+
+PROFILE_SUFFIX = '.folded'
+PROFILE_HEADER = 'X-Holiday-Profile'
+PROFILE_META_KEY = 'HTTP_X_HOLIDAY_PROFILE'
+PACKAGE = __name__.rsplit('.', 1)[0]
+
+
+def profile_dir():
+    """directory of collapsed stack files, HOLIDAY_PROFILE_DIR setting"""
+    return getattr(settings, 'HOLIDAY_PROFILE_DIR', None)
+
+
+def profile_max_files():
+    """number of newest profiles kept in profile directory"""
+    return getattr(settings, 'HOLIDAY_PROFILE_MAX_FILES', 200)
+
+
+def profile_sample_rate():
+    """fraction of holiday requests profiled"""
+    return getattr(settings, 'HOLIDAY_PROFILE_SAMPLE_RATE', 0.0)
+
+
+def profile_token():
+    """token of X-Holiday-Profile header that profiles any request, HOLIDAY_PROFILE_TOKEN setting"""
+    return getattr(settings, 'HOLIDAY_PROFILE_TOKEN', None)
+
+
+def profile_interval():
+    """seconds between two stack samples of a profiled request"""
+    return getattr(settings, 'HOLIDAY_PROFILE_INTERVAL', 0.005)
+
+
+def frame_name(frame):
+    """`module:function` of frame"""
+    return f"{frame.f_globals.get('__name__', '?')}:{frame.f_code.co_name}"
+
+
+def collapse_stack(frame):
+    """frames from outermost to frame joined with `;`, the collapsed stack format of flamegraph tools"""
+    names = []
+    while frame is not None:
+        names.append(frame_name(frame))
+        frame = frame.f_back
+    return ';'.join(reversed(names))
+
+
+class StackSampler:
+    """
+    Sample stack of one thread every `interval` seconds from a background thread and count collapsed stacks.
+    Only profiled requests start a sampler, other requests never pay for it.
+    """
+
+    def __init__(self, thread_id, interval):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks = Counter()
+        self.stopped = threading.Event()
+        self.thread = threading.Thread(target=self.run, name='holiday-stack-sampler', daemon=True)
+
+    def start(self):
+        """start sampling thread, returns self"""
+        self.started = time.perf_counter()
+        self.thread.start()
+        return self
+
+    def run(self):
+        """count collapsed stack of sampled thread until stopped"""
+        while not self.stopped.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is not None:
+                self.stacks[collapse_stack(frame)] += 1
+
+    def stop(self):
+        """stop sampling, returns seconds sampled"""
+        self.stopped.set()
+        self.thread.join()
+        return time.perf_counter() - self.started
+
+
+def write_profile(directory, label, stacks, max_files):
+    """
+    write stacks under root frame label as a new collapsed stack file and drop oldest files above max_files,
+    so the directory is a bounded ring buffer shared by every worker process
+    """
+    os.makedirs(directory, exist_ok=True)
+    safe_label = ''.join(char if char.isalnum() else '_' for char in label).strip('_')[:80]
+    path = os.path.join(directory, f'{time.time_ns()}_{os.getpid()}_{safe_label}{PROFILE_SUFFIX}')
+    root = label.replace(';', '_').replace(' ', '_')
+    with open(f'{path}.tmp', 'w') as profile_file:
+        profile_file.writelines(f'{root};{stack} {count}\n' for stack, count in stacks.items())
+    os.replace(f'{path}.tmp', path)
+    profiles = sorted(name for name in os.listdir(directory) if name.endswith(PROFILE_SUFFIX))
+    for name in profiles[:max(0, len(profiles) - max_files)]:
+        try:
+            os.remove(os.path.join(directory, name))
+        except FileNotFoundError:
+            # another worker pruned it first
+            pass
+    return path
+
+
+def should_profile(request, view_func, sample_rate, token):
+    """profile requests to holiday views at sample rate and every request carrying the profile token"""
+    header = request.META.get(PROFILE_META_KEY)
+    if token and header is not None:
+        return constant_time_compare(header, token)
+    return bool(sample_rate) and getattr(view_func, '__module__', '').startswith(PACKAGE) and \
+        random.random() < sample_rate
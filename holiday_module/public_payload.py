@@ -0,0 +1,85 @@
+import hashlib
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpResponse, HttpResponseNotModified
+from rest_framework.renderers import JSONRenderer
+
+from holiday.holiday_module.conditional import holiday_data_version, etag_matches
+from holiday.holiday_module.constants import HOLIDAY_ORDERING_FIELDS
+from holiday.holiday_module.metrics import CACHE_REQUESTS
+from holiday.holiday_module.settings_cache import settings_version
+
+
+def public_query(query_params):
+    """
+    query parameters public holiday list reads, as ListCreateAPIView.filter_list_queryset does, None when the
+    payload is not cached: searches and years that are not numbers would each fill a cache entry of their own
+    """
+    if query_params.get('search'):
+        return None
+    start_year, end_year = query_params.get('start_year'), query_params.get('end_year')
+    if not (start_year and end_year):
+        # financial year list ignores every other parameter
+        return {}
+    if not (start_year.isdigit() and end_year.isdigit()):
+        return None
+    query = {'start_year': int(start_year), 'end_year': int(end_year)}
+    # YearFilter only runs when both years are given
+    if date := query_params.get('date'):
+        query['date'] = date
+    if (ordering := query_params.get('ordering')) in HOLIDAY_ORDERING_FIELDS:
+        query['ordering'] = ordering
+    return query
+
+
+def public_payload_key(query_params):
+    """
+    cache key of public holiday payload for current data version, settings version and the parameters
+    the list reads, None when the payload is not cached
+    """
+    query = public_query(query_params)
+    if query is None:
+        return None
+    digest = hashlib.sha1(urlencode(sorted(query.items())).encode('utf-8')).hexdigest()
+    return f'holiday_module:public_payload:{holiday_data_version()}:{settings_version()}:{digest}'
+
+
+def cached_public_payload(key):
+    """rendered payload and ETag cached under key, None when it has not been built yet or is not cached"""
+    if key is None:
+        return None
+    if cached := cache.get(key):
+        CACHE_REQUESTS.inc(cache='public_payload', result='hit')
+        return cached
+    CACHE_REQUESTS.inc(cache='public_payload', result='miss')
+    return None
+
+
+def store_public_payload(key, data):
+    """render data as json, cache payload with its ETag under key unless key is None and return both"""
+    payload = JSONRenderer().render(data)
+    etag = f'"p{hashlib.sha1(payload).hexdigest()[:20]}"'
+    if key is not None:
+        cache.set(key, (payload, etag), getattr(settings, 'HOLIDAY_PUBLIC_PAYLOAD_TIMEOUT', 86400))
+    return payload, etag
+
+
+def get_public_payload(query_params, build_data):
+    """
+    return rendered json payload of public holiday list and its ETag.
+    payload is built with build_data once per holiday data version, company settings version
+    (financial year window) and query, then served from cache backend. searched lists are built every time.
+    """
+    key = public_payload_key(query_params)
+    return cached_public_payload(key) or store_public_payload(key, build_data())
+
+
+def public_payload_response(request, payload, etag):
+    """response of public holiday list, 304 when If-None-Match matches payload ETag"""
+    response = HttpResponseNotModified() if etag_matches(request, etag) else HttpResponse(
+        payload, content_type='application/json')
+    response['ETag'] = etag
+    response['Cache-Control'] = settings.HOLIDAY_PUBLIC_CACHE_CONTROL
+    return response
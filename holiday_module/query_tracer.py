@@ -0,0 +1,99 @@
+import json
+import logging
+import os
+import re
+import sys
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+logger = logging.getLogger(__name__)
+
+PACKAGE_DIR = os.path.dirname(os.path.abspath(__file__))
+TRACER_FILE = os.path.abspath(__file__)
+STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+NUMBER_LITERAL = re.compile(r'\b\d+(?:\.\d+)?\b')
+PLACEHOLDER_LIST = re.compile(r'\bIN \((?:\s*%s\s*,)*\s*%s\s*\)', re.IGNORECASE)
+WHITESPACE = re.compile(r'\s+')
+
+
+def repeat_threshold():
+    """number of times one query shape may run from one call site before it is reported"""
+    return getattr(settings, 'HOLIDAY_QUERY_REPEAT_THRESHOLD', 3)
+
+
+def normalize_sql(sql):
+    """shape of sql with literals replaced and placeholder lists of any length folded into one"""
+    sql = STRING_LITERAL.sub('?', sql)
+    sql = NUMBER_LITERAL.sub('?', sql)
+    sql = PLACEHOLDER_LIST.sub('IN (...)', sql)
+    return WHITESPACE.sub(' ', sql).strip()
+
+
+def call_site():
+    """`path:line function` of innermost frame of this package outside of the tracer, None when there is none"""
+    frame = sys._getframe(2)
+    while frame is not None:
+        file_name = frame.f_code.co_filename
+        if file_name.startswith(PACKAGE_DIR) and file_name != TRACER_FILE:
+            return f'{os.path.relpath(file_name, PACKAGE_DIR)}:{frame.f_lineno} {frame.f_code.co_name}'
+        frame = frame.f_back
+    return None
+
+
+class QueryTracer:
+    """
+    execute wrapper grouping every query by normalized sql and holiday module call site, so a serializer method
+    field or validation helper running the same query once per row shows up as one repeated shape
+    """
+
+    def __init__(self, threshold=None):
+        self.threshold = repeat_threshold() if threshold is None else threshold
+        self.shapes = defaultdict(lambda: [0, 0.0])
+        self.count = 0
+        self.duration = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed = time.perf_counter() - started
+            shape = self.shapes[(normalize_sql(sql), call_site())]
+            shape[0] += 1
+            shape[1] += elapsed
+            self.count += 1
+            self.duration += elapsed
+
+    def repeated(self):
+        """query shapes run more than threshold times from one call site, most frequent first"""
+        return sorted(
+            ({'sql': sql, 'site': site, 'count': count, 'ms': round(duration * 1000, 2)}
+             for (sql, site), (count, duration) in self.shapes.items() if count > self.threshold),
+            key=lambda shape: -shape['count'])
+
+    def report(self, label=None):
+        """compact summary of traced queries with repeated shapes"""
+        return {
+            'label': label,
+            'queries': self.count,
+            'ms': round(self.duration * 1000, 2),
+            'shapes': len(self.shapes),
+            'repeated': self.repeated(),
+        }
+
+
+@contextmanager
+def trace_queries(label=None, threshold=None, using=DEFAULT_DB_ALIAS, log=True):
+    """
+    trace queries run on database `using` inside the block, log the report as one json line when a shape
+    repeats more than threshold times
+    """
+    tracer = QueryTracer(threshold)
+    with connections[using].execute_wrapper(tracer):
+        yield tracer
+    if log and tracer.repeated():
+        logger.warning('repeated queries %s', json.dumps(tracer.report(label), separators=(',', ':')))
@@ -0,0 +1,152 @@
+from dataclasses import dataclass, field
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Min
+
+from holiday.holiday_module.busday import compute_durations, compute_request_return_dates
+from leaves.models import Leave, LeaveAllocations
+from work_from_home.models import WorkFromHome
+
+REQUEST_MODELS = (Leave, WorkFromHome)
+REQUEST_FIELDS = ('id', 'start_date', 'end_date', 'type', 'half_day_status', 'duration', 'return_date')
+ZERO = Decimal(0)
+
+
+@dataclass
+class RecomputeResult:
+    """number of rows read and rows whose stored values differ from recomputed ones, changes kept on dry run"""
+    checked: int = 0
+    changed: int = 0
+    changes: list = field(default_factory=list)
+
+    def add(self, other):
+        self.checked += other.checked
+        self.changed += other.changed
+        self.changes.extend(other.changes)
+
+
+def request_queryset(model, since=None, user_ids=None, user_range=None):
+    """requests of model to recompute, cancelled requests are left as they are"""
+    queryset = model.objects.exclude(status="cancelled")
+    if since:
+        queryset = queryset.filter(end_date__gte=since)
+    if user_ids:
+        queryset = queryset.filter(request_from__in=user_ids)
+    if user_range:
+        queryset = queryset.filter(request_from__gte=user_range[0], request_from__lte=user_range[1])
+    return queryset
+
+
+def recompute_request_rows(rows, calendar):
+    """
+    take rows of REQUEST_FIELDS and return [(id, duration, return date)] of rows whose stored
+    duration or return date differ from values computed from their own date range and calendar
+    """
+    if not rows:
+        return []
+    ids, start_dates, end_dates, types, half_day_statuses, durations, return_dates = zip(*rows)
+    new_durations = compute_durations(calendar, start_dates, end_dates, types)
+    new_return_dates = compute_request_return_dates(calendar, end_dates, types, half_day_statuses).astype(object)
+    changed = []
+    for row_id, duration, return_date, new_duration, new_return_date in zip(
+            ids, durations, return_dates, new_durations, new_return_dates):
+        new_duration = Decimal(float(new_duration))
+        if duration != new_duration or return_date != new_return_date:
+            changed.append((row_id, new_duration, new_return_date))
+    return changed
+
+
+def book_leave_changes(leave_changes, dry_run=False):
+    """
+    book duration changes [(leave id, user id, change)] of approved leaves, in leave id order, against first active
+    allocation of their user as holiday changes do in `adjust_leaves_one_by_one`: on remaining leave while exceed
+    leave is zero, on exceed leave while it is above zero and not at all while it is below zero. allocations only
+    move by the change, days booked without a leave row and allocation periods are left as they are.
+    """
+    if not leave_changes:
+        return RecomputeResult()
+    allocations = {allocation.user_id: allocation for allocation in LeaveAllocations.objects.filter(
+        id__in=LeaveAllocations.objects.filter(
+            is_active=True, user__in={user_id for _, user_id, _ in leave_changes}).order_by().values('user').annotate(
+            first_id=Min('id')).values('first_id'))}
+    changed = {}
+    for _, user_id, change in sorted(leave_changes):
+        allocation = allocations.get(user_id)
+        if allocation is None or allocation.exceed_leave < 0:
+            continue
+        if allocation.exceed_leave == 0:
+            allocation.remaining_leave -= change
+        else:
+            allocation.exceed_leave += change
+        allocation.used_leave += change
+        changed[allocation.id] = allocation
+    if changed and not dry_run:
+        LeaveAllocations.objects.bulk_update(changed.values(), ['used_leave', 'remaining_leave', 'exceed_leave'])
+    changes = [('LeaveAllocations', allocation.id, allocation.used_leave, allocation.remaining_leave,
+                allocation.exceed_leave) for allocation in changed.values()] if dry_run else []
+    return RecomputeResult(len(allocations), len(changed), changes)
+
+
+def recompute_request_chunk(model, queryset, calendar, after_id, chunk_size, dry_run=False):
+    """
+    recompute next chunk of requests with id greater than after_id in one transaction, duration changes of
+    approved leaves are booked against allocations in the same transaction.
+    return (result, allocation result, last id) where last id is None when no rows are left
+    """
+    with transaction.atomic():
+        rows = list(queryset.filter(id__gt=after_id).order_by('id').values_list(*REQUEST_FIELDS)[:chunk_size])
+        if not rows:
+            return RecomputeResult(), RecomputeResult(), None
+        changed = recompute_request_rows(rows, calendar)
+        if changed and not dry_run:
+            model.objects.bulk_update(
+                [model(id=row_id, duration=duration, return_date=return_date)
+                 for row_id, duration, return_date in changed],
+                ['duration', 'return_date'])
+        allocation_result = RecomputeResult()
+        if model is Leave:
+            old_durations = {row[0]: row[5] for row in rows}
+            duration_changes = {row_id: duration - old_durations[row_id] for row_id, duration, _ in changed
+                                if duration != old_durations[row_id]}
+            approved_leaves = Leave.objects.filter(id__in=duration_changes, status="approved").values_list(
+                'id', 'request_from') if duration_changes else []
+            allocation_result = book_leave_changes(
+                [(row_id, user_id, duration_changes[row_id]) for row_id, user_id in approved_leaves], dry_run)
+    changes = [(model.__name__, *change) for change in changed] if dry_run else []
+    return RecomputeResult(len(rows), len(changed), changes), allocation_result, rows[-1][0]
+
+
+def recompute_requests(model, calendar, since=None, user_ids=None, chunk_size=1000, dry_run=False, user_range=None,
+                       allocation_result=None):
+    """
+    recompute duration and return date of every request of model in chunks of chunk_size ordered by id,
+    running it again once values are fixed changes nothing. allocations booked for leaves are added to
+    allocation_result when given.
+    """
+    queryset = request_queryset(model, since, user_ids, user_range)
+    result, after_id = RecomputeResult(), 0
+    while after_id is not None:
+        chunk_result, chunk_allocation_result, after_id = recompute_request_chunk(
+            model, queryset, calendar, after_id, chunk_size, dry_run)
+        result.add(chunk_result)
+        if allocation_result is not None:
+            allocation_result.add(chunk_allocation_result)
+    return result
+
+
+def recompute_all(calendar, since=None, user_ids=None, chunk_size=1000, dry_run=False, user_range=None):
+    """
+    recompute leave and work from home requests, booking duration changes of approved leaves against leave
+    allocations, return {name: RecomputeResult}. on dry run allocations are booked chunk by chunk from stored
+    values, so a user with leaves in several chunks may be reported more than once.
+    user_range limits every step to request_from ids between its two bounds, both inclusive.
+    """
+    allocation_result = RecomputeResult()
+    results = {
+        model.__name__: recompute_requests(model, calendar, since, user_ids, chunk_size, dry_run, user_range,
+                                           allocation_result)
+        for model in REQUEST_MODELS
+    }
+    results['LeaveAllocations'] = allocation_result
+    return results
@@ -0,0 +1,118 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+
+import boto3
+from botocore.config import Config
+from django.conf import settings
+
+from holiday.holiday_module.metrics import S3_SECONDS, CACHE_REQUESTS
+from holiday.holiday_module.sigv4 import SigV4Presigner
+
+_s3_client = None
+_s3_presigner = None
+_s3_client_lock = threading.Lock()
+
+
+def get_s3_client():
+    """
+    lazily created s3 client shared by every thread of the process
+    """
+    global _s3_client
+    if _s3_client is None:
+        with _s3_client_lock:
+            if _s3_client is None:
+                _s3_client = boto3.client(
+                    's3',
+                    aws_access_key_id=os.environ.get('AWS_ACCESS_KEY_ID'),
+                    aws_secret_access_key=os.environ.get('AWS_SECRET_ACCESS_KEY'),
+                    region_name=get_region_name(),
+                    config=Config(signature_version='s3v4'),
+                )
+    return _s3_client
+
+
+def get_presigner():
+    """
+    offline sigv4 presigner shared by the process, None when credentials are not in environment
+    """
+    global _s3_presigner
+    if _s3_presigner is None:
+        access_key = os.environ.get('AWS_ACCESS_KEY_ID')
+        secret_key = os.environ.get('AWS_SECRET_ACCESS_KEY')
+        if not (access_key and secret_key):
+            return None
+        with _s3_client_lock:
+            if _s3_presigner is None:
+                _s3_presigner = SigV4Presigner(access_key, secret_key, get_bucket_name(), get_region_name(),
+                                               os.environ.get('AWS_SESSION_TOKEN'))
+    return _s3_presigner
+
+
+def get_bucket_name():
+    """bucket holding holiday images"""
+    return os.environ.get('AWS_STORAGE_BUCKET_NAME')
+
+
+def get_region_name():
+    """region of bucket holding holiday images"""
+    return os.environ.get('AWS_S3_REGION_NAME') or 'us-east-1'
+
+
+def presign_get_object(key, expiration):
+    """presigned get_object url of key, signed offline when credentials allow it"""
+    with S3_SECONDS.time(operation='presign'):
+        if presigner := get_presigner():
+            return presigner.presign_get_object(key, expiration)
+        return get_s3_client().generate_presigned_url(
+            'get_object',
+            Params={
+                'Bucket': get_bucket_name(),
+                'Key': key,
+            },
+            ExpiresIn=expiration,
+        )
+
+
+class PresignedUrlCache:
+    """
+    Bounded LRU cache of presigned get_object urls.
+
+    Time is split into buckets of `expiration` seconds and a url is reused for every request
+    of the bucket it was signed in. Urls are signed for two buckets so every url handed out
+    stays valid for at least `expiration` seconds.
+    """
+
+    def __init__(self, max_size):
+        self.max_size = max_size
+        self.urls = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get_url(self, key, expiration):
+        """return cached presigned url of key, signing a new one when bucket changed"""
+        bucket = int(time.time() // expiration)
+        cache_key = (key, expiration, bucket)
+        with self.lock:
+            url = self.urls.get(cache_key)
+            if url is not None:
+                self.urls.move_to_end(cache_key)
+                CACHE_REQUESTS.inc(cache='presigned_url', result='hit')
+                return url
+        CACHE_REQUESTS.inc(cache='presigned_url', result='miss')
+        url = presign_get_object(key, expiration * 2)
+        with self.lock:
+            self.urls[cache_key] = url
+            self.urls.move_to_end(cache_key)
+            while len(self.urls) > self.max_size:
+                self.urls.popitem(last=False)
+        return url
+
+    def invalidate(self, key):
+        """drop every cached url of key"""
+        with self.lock:
+            for cache_key in [cache_key for cache_key in self.urls if cache_key[0] == key]:
+                del self.urls[cache_key]
+
+
+presigned_url_cache = PresignedUrlCache(getattr(settings, 'HOLIDAY_PRESIGNED_URL_CACHE_SIZE', 1024))
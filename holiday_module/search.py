@@ -0,0 +1,37 @@
+from django.contrib.postgres.search import TrigramSimilarity
+from django.db import connections
+from django.db.models import Q
+from django.db.models.functions import Upper
+
+from common.search import get_query
+
+
+def supports_trigram_search(connection):
+    """True on PostgreSQL where migration 0004 created pg_trgm extension and holiday name index"""
+    return connection.vendor == 'postgresql'
+
+
+def search_holidays(queryset, search, prefix=False, rank=True):
+    """
+    filter holidays of queryset whose name matches every word of search, as substring or as word prefix when
+    `prefix` is set, or is similar to whole search. On PostgreSQL every predicate is answered by the trigram index
+    and rows are ranked by similarity when `rank` is set, other databases fall back to `get_query`.
+    """
+    connection = connections[queryset.db]
+    if not supports_trigram_search(connection):
+        return queryset.filter(get_query(search, ['name']))
+    term = ' '.join(search.split()).upper()
+    words = Q()
+    for word in term.split():
+        if prefix:
+            # prefix of any word of name, not only of the first one
+            words &= Q(name__istartswith=word) | Q(name__icontains=f' {word}')
+        else:
+            words &= Q(name__icontains=word)
+    # trigram index of migration 0004 is built on UPPER(name), the expression django uses for icontains and
+    # istartswith on PostgreSQL, so substring, prefix and similarity predicates share one index
+    queryset = queryset.alias(search_name=Upper('name')).filter(words | Q(search_name__trigram_similar=term))
+    if not rank:
+        return queryset
+    ordering = queryset.query.order_by
+    return queryset.annotate(similarity=TrigramSimilarity(Upper('name'), term)).order_by('-similarity', *ordering)
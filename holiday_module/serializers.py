@@ -3,15 +3,33 @@ from rest_framework import serializers
 from rest_framework.exceptions import ValidationError
 from holiday.holiday_module.constants import IMAGE_EXTENSION, IMAGE_SIZE
 from holiday.holiday_module.models import Holidays
-from holiday.holiday_module.utils import get_aws_holiday_image_url, strip_string,convert_date_format, convert_datetime_format
+from holiday.holiday_module.server_timing import stage
+from holiday.holiday_module.utils import get_aws_holiday_image_url, strip_string, format_date, format_datetime, \
+    holiday_month_counts
 from holiday.holiday_module.validations import (validate_image_size, validate_image_extension, check_weekday,
-                                                create_holiday_reduce_duration_wfh, update_holiday_update_duration_wfh,
                                                 date_before_today,
-                                                create_holiday_reduce_duration_leave,
-                                                update_holiday_update_duration_leave,
                                                 check_holiday_already_exists_or_not)
 
 
+def validate_holiday_image(data):
+    """check extension and size of uploaded holiday image"""
+    if not validate_image_extension(data):
+        raise ValidationError({"holiday_image": IMAGE_EXTENSION})
+
+    file_size = validate_image_size(data)
+
+    if not file_size['status']:
+        raise ValidationError({"holiday_image": f"{IMAGE_SIZE} {file_size['size']}{file_size['type']}!"})
+
+
+def holiday_image_url(serializer, obj):
+    """presigned image url of holiday, taken from `image_urls` of serializer context when the view built them ahead"""
+    image_urls = serializer.context.get('image_urls')
+    if image_urls is not None:
+        return image_urls.get(obj.id)
+    return get_aws_holiday_image_url(obj)
+
+
 class HolidaysListCreateSerializer(serializers.ModelSerializer):
     """
     Serializer to View List of holidays and Add holiday
@@ -32,38 +50,32 @@ class HolidaysListCreateSerializer(serializers.ModelSerializer):
     def to_representation(self, instance):
         """function  to convert date according to company setting"""
         rep = super(HolidaysListCreateSerializer, self).to_representation(instance)
-        rep['created_at'] = convert_datetime_format(rep['created_at'])
-        rep['modified_at'] = convert_datetime_format(rep['modified_at'])
-        rep['deleted_at'] = convert_datetime_format(rep['deleted_at'])
-        rep['date'] = convert_date_format(rep['date'])
+        rep['created_at'] = format_datetime(instance.created_at)
+        rep['modified_at'] = format_datetime(instance.modified_at)
+        rep['deleted_at'] = format_datetime(instance.deleted_at)
+        rep['date'] = format_date(instance.date)
         return rep
 
     def validate(self, data):
         """ function to check week day, check holiday already exist or not,
-        validate image extension, check file size, create holiday reduce
-        duration with work from home and leave
+        validate image extension, check file size
         """
         data['name'] = strip_string(data.get('name'))
 
-        check_weekday(data['date'])
-
-        check_holiday_already_exists_or_not(data['name'], data['date'])
-
-        if not validate_image_extension(data):
-            raise ValidationError({"holiday_image": IMAGE_EXTENSION})
+        with stage('check_weekday'):
+            check_weekday(data['date'])
 
-        file_size = validate_image_size(data)
+        with stage('check_holiday_exists'):
+            check_holiday_already_exists_or_not(data['name'], data['date'])
 
-        if not file_size['status']:
-            raise ValidationError({"holiday_image": f"{IMAGE_SIZE} {file_size['size']}{file_size['type']}!"})
-        create_holiday_reduce_duration_wfh(data['date'])
-        create_holiday_reduce_duration_leave(data['date'])
+        with stage('validate_image'):
+            validate_holiday_image(data)
 
         return data
 
     def get_holiday_image_data(self, obj):
         """used to update holiday image link of aws"""
-        return get_aws_holiday_image_url(obj)
+        return holiday_image_url(self, obj)
 
     def get_month(self, obj):
         """ get month name"""
@@ -79,12 +91,10 @@ class HolidaysListCreateSerializer(serializers.ModelSerializer):
 
     def get_count(self, obj):
         """return count of holidays in month"""
-        return {
-            "active": Holidays.objects.filter(date__year=obj.date.year, date__month=obj.date.month,
-                                              is_active=True).count(),
-            "inactive": Holidays.objects.filter(date__year=obj.date.year, date__month=obj.date.month,
-                                                is_active=False).count()
-             }
+        month_counts = self.context.get('month_counts')
+        if month_counts is not None:
+            return dict(month_counts[(obj.date.year, obj.date.month)])
+        return holiday_month_counts([obj.date]).get((obj.date.year, obj.date.month), {"active": 0, "inactive": 0})
 
 
 class HolidayPublicSerializer(serializers.ModelSerializer):
@@ -107,23 +117,18 @@ class HolidaysRetrieveUpdateSerializer(serializers.ModelSerializer):
 
     def validate(self, data):
         """ function to check financial year, date before today, check week day, check holiday already exist or not,
-            validate image extension, check file size, update holiday update duration with work from home and leave"""
+            validate image extension, check file size"""
         old_date = self.instance.date
         data['name'] = strip_string(data.get('name'))
         if old_date != data['date']:
             date_before_today(data['date'])
-            check_weekday(data['date'])
-            check_holiday_already_exists_or_not(data['name'], data['date'], self.instance.id)
+            with stage('check_weekday'):
+                check_weekday(data['date'])
+            with stage('check_holiday_exists'):
+                check_holiday_already_exists_or_not(data['name'], data['date'], self.instance.id)
 
-        if not validate_image_extension(data):
-            raise ValidationError({"holiday_image": IMAGE_EXTENSION})
-
-        file_size = validate_image_size(data)
-
-        if not file_size['status']:
-            raise ValidationError({"holiday_image": f"{IMAGE_SIZE} {file_size['size']}{file_size['type']}!"})
-        update_holiday_update_duration_wfh(old_date, data['date'])
-        update_holiday_update_duration_leave(old_date, data['date'])
+        with stage('validate_image'):
+            validate_holiday_image(data)
         return data
 
     def get_holiday_image_data(self, obj):
@@ -133,7 +138,7 @@ class HolidaysRetrieveUpdateSerializer(serializers.ModelSerializer):
     def to_representation(self, instance):
         """function  to convert date according to company setting"""
         rep = super(HolidaysRetrieveUpdateSerializer, self).to_representation(instance)
-        rep['date'] = convert_date_format(rep['date'])
+        rep['date'] = format_date(instance.date)
         return rep
 
 
@@ -159,10 +164,10 @@ class DashboardHolidayListSerializer(serializers.ModelSerializer):
 
     def get_holiday_image(self, obj):
         """used to update holiday image link of aws"""
-        return get_aws_holiday_image_url(obj)
+        return holiday_image_url(self, obj)
 
     def to_representation(self, instance):
         """function to convert date according to company setting"""
         rep = super(DashboardHolidayListSerializer, self).to_representation(instance)
-        rep['date'] = convert_date_format(rep['date'])
+        rep['date'] = format_date(instance.date)
         return rep
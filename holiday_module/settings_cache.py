@@ -0,0 +1,134 @@
+import threading
+import time
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db.models import F
+
+from holiday.holiday_module.metrics import CACHE_REQUESTS
+from holiday.holiday_module.models import DataVersion
+from settings.models import CompanySettings, AttendanceSettings
+
+SETTINGS_VERSION = 'settings_version'
+HOLIDAY_VERSION = 'holiday_version'
+# DataVersion rows read together once per request
+DATA_VERSIONS = (SETTINGS_VERSION, HOLIDAY_VERSION)
+COMPANY_SETTINGS = 'company_settings'
+ATTENDANCE_SETTINGS = 'attendance_settings'
+COMPANY_FORMATS = 'company_formats'
+WEEK_DAYS = ('monday', 'tuesday', 'wednesday', 'thursday', 'friday', 'saturday', 'sunday')
+
+_request_memo = ContextVar('holiday_settings_request_memo', default=None)
+_process_cache = {}
+_process_cache_lock = threading.Lock()
+
+
+def cache_ttl():
+    """seconds a process level settings entry is trusted before reloading it"""
+    return getattr(settings, 'HOLIDAY_SETTINGS_CACHE_TTL', 300)
+
+
+def start_request_memo():
+    """start per request memo, returns token used to reset it"""
+    return _request_memo.set({})
+
+
+def end_request_memo(token):
+    """drop per request memo"""
+    _request_memo.reset(token)
+
+
+def load_versions(names):
+    """
+    {name: version} of DataVersion rows, a missing row is created from current time so a lost row never goes
+    back to an old version
+    """
+    versions = dict(DataVersion.objects.filter(name__in=names).values_list('name', 'version'))
+    for name in set(names) - versions.keys():
+        versions[name] = DataVersion.objects.get_or_create(name=name, defaults={'version': int(time.time())})[0].version
+    return versions
+
+
+def increment_version(name):
+    """increase version of name for every process"""
+    if not DataVersion.objects.filter(name=name).update(version=F('version') + 1):
+        DataVersion.objects.get_or_create(name=name, defaults={'version': int(time.time())})
+    memo = _request_memo.get()
+    if memo is not None:
+        memo.pop(name, None)
+
+
+def data_version(name):
+    """current version of name shared by every process through database, memoized per request"""
+    memo = _request_memo.get()
+    if memo is not None and name in memo:
+        return memo[name]
+    versions = load_versions(DATA_VERSIONS)
+    if memo is not None:
+        memo.update(versions)
+    return versions[name]
+
+
+def settings_version():
+    """current settings version shared by every process"""
+    return data_version(SETTINGS_VERSION)
+
+
+def bump_settings_version():
+    """invalidate cached settings in every process, with the change when it runs in a transaction"""
+    increment_version(SETTINGS_VERSION)
+    memo = _request_memo.get()
+    if memo is not None:
+        memo.clear()
+
+
+def cached_setting(key, loader):
+    """
+    return setting from per request memo, then from process cache while its ttl and version are valid,
+    otherwise load it from database
+    """
+    memo = _request_memo.get()
+    if memo is not None and key in memo:
+        return memo[key]
+    version = settings_version()
+    now = time.monotonic()
+    entry = _process_cache.get(key)
+    if entry and entry[1] == version and entry[2] > now:
+        value = entry[0]
+        CACHE_REQUESTS.inc(cache='settings', result='hit')
+    else:
+        CACHE_REQUESTS.inc(cache='settings', result='miss')
+        value = loader()
+        with _process_cache_lock:
+            _process_cache[key] = (value, version, now + cache_ttl())
+    if memo is not None:
+        memo[key] = value
+    return value
+
+
+def load_company_settings():
+    """company settings with date and time format"""
+    return CompanySettings.objects.select_related('date_format', 'time_format').first()
+
+
+def load_attendance_settings():
+    """attendance week days, True for working day"""
+    return AttendanceSettings.objects.values(*WEEK_DAYS).first()
+
+
+def get_company_settings():
+    """cached company settings, None when not configured"""
+    return cached_setting(COMPANY_SETTINGS, load_company_settings)
+
+
+def get_attendance_settings():
+    """cached attendance week days, None when not configured"""
+    return cached_setting(ATTENDANCE_SETTINGS, load_attendance_settings)
+
+
+def get_off_days():
+    """weekday numbers of off days, None when attendance settings are not configured"""
+    active_days = get_attendance_settings()
+    if active_days is None:
+        return None
+    return [weekday for weekday, day in enumerate(WEEK_DAYS) if not active_days[day]]
@@ -0,0 +1,14 @@
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from holiday.holiday_module.settings_cache import bump_settings_version
+from settings.models import CompanySettings, AttendanceSettings, SettingsDateFormat, SettingsTimeFormat
+
+
+@receiver([post_save, post_delete], sender=CompanySettings)
+@receiver([post_save, post_delete], sender=AttendanceSettings)
+@receiver([post_save, post_delete], sender=SettingsDateFormat)
+@receiver([post_save, post_delete], sender=SettingsTimeFormat)
+def invalidate_settings_cache(sender, **kwargs):
+    """drop cached company and attendance settings when they change"""
+    bump_settings_version()
@@ -0,0 +1,81 @@
+import datetime
+import itertools
+
+from django.test import SimpleTestCase
+
+from holiday.holiday_module.busday import compute_durations, compute_return_dates, batch_return_dates, \
+    compute_request_return_dates
+from holiday.holiday_module.working_calendar import WorkingCalendar
+
+# friday 2024-03-01 to sunday 2024-03-31, saturday and sunday off
+START = datetime.date(2024, 3, 1)
+DAYS = [START + datetime.timedelta(days=offset) for offset in range(31)]
+OFF_DAYS = [5, 6]
+HOLIDAYS = [datetime.date(2024, 3, 8), datetime.date(2024, 3, 11), datetime.date(2024, 3, 25)]
+TYPES = ['full', 'half']
+HALF_DAY_STATUSES = ['firsthalf', 'secondhalf']
+
+
+class TestBusinessDayBatches(SimpleTestCase):
+    """test cases to check numpy batches against WorkingCalendar on weekends, holidays and half days"""
+
+    def setUp(self):
+        self.calendar = WorkingCalendar(HOLIDAYS, OFF_DAYS)
+
+    def test_compute_durations(self):
+        """test cases to count every start and end date pair as WorkingCalendar, half day counting half"""
+        rows = [(start, end, type_) for start, end in itertools.combinations_with_replacement(DAYS[:15], 2)
+                for type_ in TYPES]
+        start_dates, end_dates, types = zip(*rows)
+        durations = compute_durations(self.calendar, start_dates, end_dates, types)
+        expected = [self.calendar.count_working_days(start, end) * (0.5 if type_ == 'half' else 1)
+                    for start, end, type_ in rows]
+        self.assertEqual(list(durations), expected)
+
+    def test_compute_durations_on_weekend_and_holiday(self):
+        """test cases to count nothing for a request only on weekend or holiday"""
+        durations = compute_durations(self.calendar, [datetime.date(2024, 3, 9), datetime.date(2024, 3, 8)],
+                                      [datetime.date(2024, 3, 10), datetime.date(2024, 3, 8)], ['full', 'half'])
+        self.assertEqual(list(durations), [0, 0])
+
+    def test_compute_return_dates(self):
+        """test cases to move return dates to first working day except first half requests"""
+        skip_dates = [datetime.date(2024, 3, 12)]
+        skip_calendar = WorkingCalendar(HOLIDAYS + skip_dates, OFF_DAYS)
+        rows = list(itertools.product(DAYS[:25], TYPES, HALF_DAY_STATUSES))
+        return_dates, types, half_day_statuses = zip(*rows)
+        new_dates = compute_return_dates(self.calendar, return_dates, types, half_day_statuses, skip_dates)
+        expected = [
+            date if (type_ == 'half' and status == 'firsthalf') or skip_calendar.is_working_day(date)
+            else skip_calendar.next_working_day(date)
+            for date, type_, status in rows
+        ]
+        self.assertEqual(list(new_dates.astype(object)), expected)
+
+    def test_batch_return_dates(self):
+        """test cases to return only rows whose return date moves"""
+        rows = [
+            (1, datetime.date(2024, 3, 8), 'full', None),
+            (2, datetime.date(2024, 3, 9), 'half', 'secondhalf'),
+            (3, datetime.date(2024, 3, 8), 'half', 'firsthalf'),
+            (4, datetime.date(2024, 3, 13), 'full', None),
+            (5, datetime.date(2024, 3, 12), 'full', None),
+        ]
+        new_dates = batch_return_dates(rows, [datetime.date(2024, 3, 12)], self.calendar)
+        self.assertEqual(new_dates, {
+            1: datetime.date(2024, 3, 13),
+            2: datetime.date(2024, 3, 13),
+            5: datetime.date(2024, 3, 13),
+        })
+        self.assertEqual(batch_return_dates([], [], self.calendar), {})
+
+    def test_compute_request_return_dates(self):
+        """test cases to return on first working day after end date except first half requests"""
+        rows = list(itertools.product(DAYS[:25], TYPES, HALF_DAY_STATUSES))
+        end_dates, types, half_day_statuses = zip(*rows)
+        return_dates = compute_request_return_dates(self.calendar, end_dates, types, half_day_statuses)
+        expected = [
+            date if type_ == 'half' and status == 'firsthalf' else self.calendar.next_working_day(date)
+            for date, type_, status in rows
+        ]
+        self.assertEqual(list(return_dates.astype(object)), expected)
@@ -1,9 +1,13 @@
+import json
 import os
+from contextlib import contextmanager
 
 from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import DEFAULT_DB_ALIAS
 from dotenv import load_dotenv
 
 from holiday.holiday_module.constants import CONTENT_TYPE
+from holiday.holiday_module.query_tracer import trace_queries
 
 load_dotenv()
 
@@ -38,3 +42,21 @@ def upload_image_favicon():
     with open(os.environ.get('RIGHT_IMAGE_PATH_FAVICON'), 'rb') as favicon_image:
         mock_policy_file = SimpleUploadedFile('favicon_company_web.png', favicon_image.read(), content_type=CONTENT_TYPE)
     return mock_policy_file
+
+
+def upload_holiday_file(name, content, encoding='utf-8'):
+    """test case to upload holiday import file"""
+    return SimpleUploadedFile(name, content.encode(encoding), content_type=CONTENT_TYPE)
+
+
+class QueryBudgetMixin:
+    """query budget assertion for api test cases"""
+
+    @contextmanager
+    def assertMaxQueries(self, number, using=DEFAULT_DB_ALIAS):
+        """fail when block runs more than number queries, listing every query shape with its call site"""
+        with trace_queries(threshold=0, using=using, log=False) as tracer:
+            yield tracer
+        if tracer.count > number:
+            self.fail(f"{tracer.count} queries executed, at most {number} expected\n"
+                      f"{json.dumps(tracer.report(), indent=2)}")
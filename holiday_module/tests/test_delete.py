@@ -8,13 +8,13 @@ from holiday.holiday_module.models import Holidays
 from roles.models import Role
 from settings.models import (CompanySettings, AttendanceSettings, SettingsCurrency, SettingsDateFormat,
                              SettingsTimeZone, SettingsTimeFormat, ModuleSettings)
-from holiday.holiday_module.tests.test_common import upload_image_company_logo, upload_image_favicon
+from holiday.holiday_module.tests.test_common import upload_image_company_logo, upload_image_favicon, QueryBudgetMixin
 from holiday.holiday_module.tests.constants import EMAIL, USERNAME, USER_PASS, DELETE_PERMISSION
 
 TODAY = date.today()
 
 
-class TestDeleteHolidays(APITestCase):
+class TestDeleteHolidays(QueryBudgetMixin, APITestCase):
     """test cases to delete holidays"""
     email = EMAIL
     username = USERNAME
@@ -108,8 +108,21 @@ class TestDeleteHolidays(APITestCase):
         """test cases to delete holidays with valid id"""
         self.user.user_permissions.add(self.delete_permission)
         self.client.force_authenticate(user=self.user)
-        response = self.client.delete(self.holidays_url)
+        with self.assertMaxQueries(10):
+            response = self.client.delete(self.holidays_url)
+        self.assertEquals(response.status_code, 200)
+
+    def test_delete_holidays_with_future_date(self):
+        """test cases to delete holidays of a future working day within a query budget"""
+        self.user.user_permissions.add(self.delete_permission)
+        self.client.force_authenticate(user=self.user)
+        holiday_date = TODAY + timedelta(days=40)
+        holiday_date += timedelta(days=(4 - holiday_date.weekday()) % 7)
+        holiday = Holidays.objects.create(created_by_id=self.user.id, name="dussehra", date=holiday_date)
+        with self.assertMaxQueries(10):
+            response = self.client.delete(reverse('retrieve_update_destroy_holidays', kwargs={'id': holiday.id}))
         self.assertEquals(response.status_code, 200)
+        self.assertFalse(Holidays.objects.filter(id=holiday.id).exists())
 
     def test_delete_holidays_with_invalid_id(self):
         """test cases to delete holidays with invalid id"""
@@ -1,11 +1,18 @@
 import datetime
+import os
+import tempfile
 from datetime import date, timedelta
 
 from django.contrib.auth import get_user_model
 from django.contrib.auth.models import Permission
+from django.test import override_settings, TransactionTestCase
 from rest_framework.reverse import reverse
 from rest_framework.test import APITestCase
 from holiday.holiday_module.models import Holidays
+from holiday.holiday_module.benchmarks.seed import seed_settings, seed_holidays, seed_users, seed_requests
+from holiday.holiday_module.parallel_recompute import run_parallel_recompute, Checkpoint, user_id_ranges
+from holiday.holiday_module.recompute import recompute_all
+from holiday.holiday_module.working_calendar import WorkingCalendar
 from leaves.models import Leave, LeaveRequestDefaultRole, LeaveAllocations
 from roles.models import Role
 from settings.models import CompanySettings, AttendanceSettings, SettingsCurrency, SettingsDateFormat, SettingsTimeZone, \
@@ -15,6 +22,7 @@ from holiday.holiday_module.tests.constants import EMAIL, USERNAME, USER_PASS, D
 TODAY = date.today()
 
 
+@override_settings(HOLIDAY_JOBS_EAGER=True)
 class TestLeaveDurationsOfHolidays(APITestCase):
     """test cases to create,delete,update leave duration accroding to Holiday """
     email = EMAIL
@@ -148,7 +156,8 @@ class TestLeaveDurationsOfHolidays(APITestCase):
         """when holiday is deleted then increase leave duration """
         self.user.user_permissions.add(self.delete_permission)
         self.client.force_authenticate(user=self.user)
-        self.client.delete(self.holidays_url)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.delete(self.holidays_url)
         leave = Leave.objects.get(id=self.leave.id)
         leave_allocation = LeaveAllocations.objects.get(id=self.leave_allocation.id)
         self.assertEquals(leave.duration, 5.5)
@@ -159,7 +168,8 @@ class TestLeaveDurationsOfHolidays(APITestCase):
         """when holiday is deleted then increase leave duration """
         self.user.user_permissions.add(self.delete_permission)
         self.client.force_authenticate(user=self.user)
-        self.client.delete(self.holidays_url1)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.delete(self.holidays_url1)
         leave = Leave.objects.get(id=self.leave.id)
         leave_allocation = LeaveAllocations.objects.get(id=self.leave_allocation.id)
         self.assertEquals(leave.duration, 5.00)
@@ -170,7 +180,8 @@ class TestLeaveDurationsOfHolidays(APITestCase):
         """when holiday is deleted then increase leave duration """
         self.user.user_permissions.add(self.delete_permission)
         self.client.force_authenticate(user=self.user)
-        self.client.delete(self.holidays_url2)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.delete(self.holidays_url2)
         leave = Leave.objects.get(id=self.leave.id)
         leave_allocation = LeaveAllocations.objects.get(id=self.leave_allocation.id)
         self.assertEquals(leave.duration, 5.00)
@@ -186,7 +197,8 @@ class TestLeaveDurationsOfHolidays(APITestCase):
             "name": "test",
             "date": TODAY + timedelta(days=4)
         }
-        self.client.post(self.holidays_add_url, data)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(self.holidays_add_url, data)
         leave = Leave.objects.get(id=self.leave.id)
         leave_allocation = LeaveAllocations.objects.get(id=self.leave_allocation.id)
         self.assertEquals(leave.duration, 5.00)
@@ -202,7 +214,8 @@ class TestLeaveDurationsOfHolidays(APITestCase):
             "name": "test",
             "date": TODAY + timedelta(days=2)
         }
-        self.client.post(self.holidays_add_url, data)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(self.holidays_add_url, data)
         leave = Leave.objects.get(id=self.leave.id)
         leave_allocation = LeaveAllocations.objects.get(id=self.leave_allocation.id)
         self.assertEquals(leave.duration, 5.00)
@@ -218,7 +231,8 @@ class TestLeaveDurationsOfHolidays(APITestCase):
             "name": "test",
             "date": TODAY + timedelta(days=9)
         }
-        self.client.post(self.holidays_add_url, data)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(self.holidays_add_url, data)
         leave = Leave.objects.get(id=self.leave.id)
         leave_allocation = LeaveAllocations.objects.get(id=self.leave_allocation.id)
         self.assertEquals(leave.duration, 5.00)
@@ -233,7 +247,8 @@ class TestLeaveDurationsOfHolidays(APITestCase):
             "name": "sty",
             "date": TODAY + timedelta(days=4)
         }
-        response = self.client.put(self.holidays_url, data)
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.put(self.holidays_url, data)
         body = response.json()
         self.assertEquals(response.status_code, 200, body)
 
@@ -245,7 +260,8 @@ class TestLeaveDurationsOfHolidays(APITestCase):
             "name": "styy",
             "date": TODAY + timedelta(days=1)
         }
-        response = self.client.put(self.holidays_url1, data)
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.put(self.holidays_url1, data)
         body = response.json()
         self.assertEquals(response.status_code, 200, body)
 
@@ -257,6 +273,73 @@ class TestLeaveDurationsOfHolidays(APITestCase):
             "name": "stui",
             "date": TODAY + timedelta(days=9)
         }
-        response = self.client.put(self.holidays_url2, data)
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.put(self.holidays_url2, data)
         body = response.json()
         self.assertEquals(response.status_code, 200, body)
+
+    def test_recompute_leave_duration_and_allocation(self):
+        """leave duration is recomputed from calendar and its change booked on allocation, second run changes nothing"""
+        Leave.objects.filter(id=self.leave.id).update(status="approved", duration=9)
+        calendar = WorkingCalendar.load()
+        results = recompute_all(calendar, user_ids=[self.user.id])
+        self.assertEquals((results['Leave'].changed, results['LeaveAllocations'].changed), (1, 1))
+        results = recompute_all(calendar, user_ids=[self.user.id])
+        self.assertEquals((results['Leave'].changed, results['LeaveAllocations'].changed), (0, 0))
+        leave = Leave.objects.get(id=self.leave.id)
+        self.assertEquals(leave.duration, calendar.count_working_days(leave.start_date, leave.end_date) * 0.5)
+        leave_allocation = LeaveAllocations.objects.get(id=self.leave_allocation.id)
+        self.assertEquals(leave_allocation.used_leave, 15 + leave.duration - 9)
+        self.assertEquals(leave_allocation.used_leave + leave_allocation.remaining_leave, 31)
+
+    def test_recompute_leave_duration_by_user_range_with_checkpoint(self):
+        """leave duration is recomputed range by range and checkpoint file is removed once run is finished"""
+        Leave.objects.filter(id=self.leave.id).update(duration=9)
+        calendar = WorkingCalendar.load()
+        with tempfile.TemporaryDirectory() as directory:
+            checkpoint_path = os.path.join(directory, 'recompute.json')
+            totals, _ = run_parallel_recompute(calendar, users_per_range=1, checkpoint_path=checkpoint_path)
+            self.assertFalse(os.path.exists(checkpoint_path))
+        self.assertEquals(totals['Leave'], [1, 1])
+        leave = Leave.objects.get(id=self.leave.id)
+        self.assertEquals(leave.duration, calendar.count_working_days(leave.start_date, leave.end_date) * 0.5)
+        # pending leave, allocation with an inverted period and days booked without leave rows is left alone
+        leave_allocation = LeaveAllocations.objects.get(id=self.leave_allocation.id)
+        self.assertEquals((leave_allocation.used_leave, leave_allocation.remaining_leave), (15, 16))
+
+
+class TestParallelRecompute(TransactionTestCase):
+    """recompute with worker processes, which need committed rows as they open their own connections"""
+
+    def setUp(self):
+        """users with drifted leave and work from home durations"""
+        seed_settings()
+        seed_holidays(40, TODAY, step=17)
+        self.user_ids = sorted(seed_users(4))
+        seed_requests(self.user_ids, 6)
+
+    def test_parallel_recompute_resumes_from_checkpoint(self):
+        """two workers recompute only ranges not yet done in checkpoint, then checkpoint file is removed"""
+        calendar = WorkingCalendar.load()
+        with tempfile.TemporaryDirectory() as directory:
+            checkpoint_path = os.path.join(directory, 'recompute.json')
+            # run interrupted after first range of one user
+            checkpoint = Checkpoint(checkpoint_path, {'since': None, 'user_ids': [], 'users_per_range': 1})
+            checkpoint.ranges = user_id_ranges(users_per_range=1)
+            checkpoint.mark_done(checkpoint.ranges[0], {})
+            totals, _ = run_parallel_recompute(calendar, workers=2, users_per_range=1,
+                                               checkpoint_path=checkpoint_path)
+            self.assertFalse(os.path.exists(checkpoint_path))
+        done_user, other_users = self.user_ids[0], self.user_ids[1:]
+        self.assertEquals(totals['Leave'][0], Leave.objects.filter(request_from__in=other_users).count())
+        # seeded allocations start unused and seeded leaves at zero days, so used leave is the approved days
+        for user_id in other_users:
+            allocation = LeaveAllocations.objects.get(user=user_id)
+            approved_days = sum(Leave.objects.filter(request_from=user_id, status="approved").values_list(
+                'duration', flat=True))
+            self.assertEquals((allocation.used_leave, allocation.remaining_leave),
+                              (approved_days, 24 - approved_days))
+        totals, _ = run_parallel_recompute(calendar, user_ids=other_users, dry_run=True)
+        self.assertEquals([changed for _, changed in totals.values()], [0] * len(totals))
+        totals, _ = run_parallel_recompute(calendar, user_ids=[done_user], dry_run=True)
+        self.assertGreater(totals['Leave'][1] + totals['WorkFromHome'][1], 0)
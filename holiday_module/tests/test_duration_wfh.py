@@ -3,9 +3,17 @@ from datetime import date, timedelta
 
 from django.contrib.auth import get_user_model
 from django.contrib.auth.models import Permission
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
 from rest_framework.reverse import reverse
 from rest_framework.test import APITestCase
-from holiday.holiday_module.models import Holidays
+from holiday.holiday_module.jobs import enqueue_holiday_change, process_holiday_jobs
+from holiday.holiday_module.models import Holidays, HolidayChangeJob
+from holiday.holiday_module.recompute import recompute_requests
+from holiday.holiday_module.validations import create_holiday_reduce_duration_wfh, \
+    delete_holiday_increment_duration_wfh
+from holiday.holiday_module.working_calendar import WorkingCalendar
 from holiday.holiday_module.tests.constants import EMAIL, USERNAME, USER_PASS, DELETE_PERMISSION, ADD_PERMISSION, CHANGE_PERMISSION
 from roles.models import Role
 from settings.models import CompanySettings, AttendanceSettings, SettingsCurrency, SettingsDateFormat, SettingsTimeZone, \
@@ -15,6 +23,7 @@ from work_from_home.models import WorkFromHomeRequestDefaultRole, WorkFromHome
 TODAY = date.today()
 
 
+@override_settings(HOLIDAY_JOBS_EAGER=True)
 class TestWFHDurationsOfHolidays(APITestCase):
     """test cases to create,delete,update Work from home duration according to Holiday """
     email = EMAIL
@@ -140,7 +149,8 @@ class TestWFHDurationsOfHolidays(APITestCase):
         """when holiday is deleted then increase work from duration """
         self.user.user_permissions.add(self.delete_permission)
         self.client.force_authenticate(user=self.user)
-        self.client.delete(self.holidays_url)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.delete(self.holidays_url)
         wfh = WorkFromHome.objects.get(id=self.work_from_home.id)
         self.assertEquals(wfh.duration, 5.5)
 
@@ -148,7 +158,8 @@ class TestWFHDurationsOfHolidays(APITestCase):
         """when holiday is deleted then increase work from duration """
         self.user.user_permissions.add(self.delete_permission)
         self.client.force_authenticate(user=self.user)
-        self.client.delete(self.holidays_url1)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.delete(self.holidays_url1)
         wfh = WorkFromHome.objects.get(id=self.work_from_home.id)
         self.assertEquals(wfh.duration, 5)
 
@@ -156,7 +167,8 @@ class TestWFHDurationsOfHolidays(APITestCase):
         """when holiday is deleted then increase work from duration """
         self.user.user_permissions.add(self.delete_permission)
         self.client.force_authenticate(user=self.user)
-        self.client.delete(self.holidays_url2)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.delete(self.holidays_url2)
         wfh = WorkFromHome.objects.get(id=self.work_from_home.id)
         self.assertEquals(wfh.duration, 5.00)
 
@@ -169,7 +181,8 @@ class TestWFHDurationsOfHolidays(APITestCase):
             "name": "test",
             "date": TODAY + timedelta(days=3)
         }
-        self.client.post(self.holidays_add_url, data)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(self.holidays_add_url, data)
         wfh = WorkFromHome.objects.get(id=self.work_from_home.id)
         self.assertEquals(int(wfh.duration), int(4.50))
 
@@ -182,7 +195,8 @@ class TestWFHDurationsOfHolidays(APITestCase):
             "name": "test",
             "date": TODAY + timedelta(days=1)
         }
-        self.client.post(self.holidays_add_url, data)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(self.holidays_add_url, data)
         wfh = WorkFromHome.objects.get(id=self.work_from_home.id)
         self.assertEquals(wfh.duration, 5.00)
 
@@ -195,7 +209,8 @@ class TestWFHDurationsOfHolidays(APITestCase):
             "name": "test",
             "date": TODAY + timedelta(days=9)
         }
-        self.client.post(self.holidays_add_url, data)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(self.holidays_add_url, data)
         wfh = WorkFromHome.objects.get(id=self.work_from_home.id)
         self.assertEquals(wfh.duration, 5.00)
 
@@ -207,7 +222,8 @@ class TestWFHDurationsOfHolidays(APITestCase):
             "name": "sty",
             "date": TODAY + timedelta(days=4)
         }
-        response = self.client.put(self.holidays_url, data)
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.put(self.holidays_url, data)
         body = response.json()
         self.assertEquals(response.status_code, 200, body)
 
@@ -220,7 +236,8 @@ class TestWFHDurationsOfHolidays(APITestCase):
             "name": "styy",
             "date": TODAY + timedelta(days=1)
         }
-        response = self.client.put(self.holidays_url1, data)
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.put(self.holidays_url1, data)
         body = response.json()
         self.assertEquals(response.status_code, 200, body)
 
@@ -232,6 +249,97 @@ class TestWFHDurationsOfHolidays(APITestCase):
             "name": "stui",
             "date": TODAY + timedelta(days=9)
         }
-        response = self.client.put(self.holidays_url2, data)
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.put(self.holidays_url2, data)
         body = response.json()
         self.assertEquals(response.status_code, 200, body)
+
+    def create_overlapping_wfh(self, count):
+        """create full day work from home requests around holiday dates"""
+        for _ in range(count):
+            WorkFromHome.objects.create(
+                requested_by_id=self.user.id,
+                request_from_id=self.user.id,
+                type="full",
+                start_date=TODAY + timedelta(days=3),
+                end_date=TODAY + timedelta(days=5),
+                return_date=TODAY + timedelta(days=5),
+                reason="test",
+                duration=2,
+                isadhoc_wfh=False,
+            )
+
+    def count_recalculation_queries(self, recalculation, date):
+        """return number of queries run by wfh recalculation for date"""
+        with CaptureQueriesContext(connection) as queries:
+            recalculation(date)
+        return len(queries)
+
+    def test_create_holiday_reduce_duration_wfh_query_count_is_constant(self):
+        """number of queries to reduce wfh duration does not depend on number of overlapping requests"""
+        date = TODAY + timedelta(days=5)
+        self.create_overlapping_wfh(1)
+        few_requests_queries = self.count_recalculation_queries(create_holiday_reduce_duration_wfh, date)
+        self.create_overlapping_wfh(25)
+        many_requests_queries = self.count_recalculation_queries(create_holiday_reduce_duration_wfh, date)
+        self.assertEquals(few_requests_queries, many_requests_queries)
+        self.assertEquals(WorkFromHome.objects.filter(duration=1).count(), 25)
+
+    def test_delete_holiday_increment_duration_wfh_query_count_is_constant(self):
+        """number of queries to increment wfh duration does not depend on number of overlapping requests"""
+        date = TODAY + timedelta(days=4)
+        self.create_overlapping_wfh(1)
+        few_requests_queries = self.count_recalculation_queries(delete_holiday_increment_duration_wfh, date)
+        self.create_overlapping_wfh(25)
+        many_requests_queries = self.count_recalculation_queries(delete_holiday_increment_duration_wfh, date)
+        self.assertEquals(few_requests_queries, many_requests_queries)
+        self.assertEquals(WorkFromHome.objects.filter(duration=3).count(), 25)
+
+    def test_eager_recalculation_waits_for_commit(self):
+        """eager recalculation of holiday change runs once the enqueuing transaction commits"""
+        with self.captureOnCommitCallbacks() as callbacks:
+            enqueue_holiday_change(TODAY + timedelta(days=3), HolidayChangeJob.ADDED)
+            self.assertEquals(WorkFromHome.objects.get(id=self.work_from_home.id).duration, 5)
+        self.assertEquals(len(callbacks), 1)
+        callbacks[0]()
+        self.assertEquals(int(WorkFromHome.objects.get(id=self.work_from_home.id).duration), int(4.50))
+        self.assertFalse(HolidayChangeJob.objects.filter(status=HolidayChangeJob.PENDING).exists())
+
+    @override_settings(HOLIDAY_JOBS_EAGER=False)
+    def test_create_holiday_reduce_duration_wfh_in_worker(self):
+        """when holiday is created then work from home duration is reduced by worker once"""
+        self.user.user_permissions.add(self.create_permission)
+        self.client.force_authenticate(user=self.user)
+        data = {
+            "created_by_id": self.user,
+            "name": "test",
+            "date": TODAY + timedelta(days=3)
+        }
+        response = self.client.post(self.holidays_add_url, data)
+        self.assertEquals(response.status_code, 201)
+        self.assertEquals(WorkFromHome.objects.get(id=self.work_from_home.id).duration, 5)
+        self.assertEquals(process_holiday_jobs(ignore_window=True), 1)
+        self.assertEquals(process_holiday_jobs(ignore_window=True), 0)
+        self.assertEquals(int(WorkFromHome.objects.get(id=self.work_from_home.id).duration), int(4.50))
+        self.assertFalse(HolidayChangeJob.objects.filter(status=HolidayChangeJob.PENDING).exists())
+
+    @override_settings(HOLIDAY_JOBS_EAGER=False)
+    def test_holiday_changes_on_same_date_collapse(self):
+        """holiday added and removed on same date in collapse window leave one job without change"""
+        date = TODAY + timedelta(days=3)
+        enqueue_holiday_change(date, HolidayChangeJob.ADDED)
+        enqueue_holiday_change(date, HolidayChangeJob.REMOVED)
+        self.assertEquals(list(HolidayChangeJob.objects.values_list('date', 'change')), [(date, 0)])
+        self.assertEquals(process_holiday_jobs(), 0)
+        self.assertEquals(process_holiday_jobs(ignore_window=True), 1)
+        self.assertEquals(WorkFromHome.objects.get(id=self.work_from_home.id).duration, 5)
+
+    def test_recompute_wfh_duration(self):
+        """drifted work from home duration and return date are recomputed from calendar, second run changes nothing"""
+        WorkFromHome.objects.filter(id=self.work_from_home.id).update(duration=9, return_date=TODAY)
+        calendar = WorkingCalendar.load()
+        self.assertEquals(recompute_requests(WorkFromHome, calendar).changed, 1)
+        self.assertEquals(recompute_requests(WorkFromHome, calendar).changed, 0)
+        wfh = WorkFromHome.objects.get(id=self.work_from_home.id)
+        self.assertEquals(wfh.duration, calendar.count_working_days(wfh.start_date, wfh.end_date) * 0.5)
+        self.assertEquals(wfh.return_date, wfh.end_date)
@@ -1,12 +1,21 @@
 import datetime
+import json
 from datetime import date, timedelta
+from dateutil.relativedelta import relativedelta
 from holiday.holiday_module.tests.constants import EMAIL, USERNAME, USER_PASS, VIEW_PERMISSION, LIST_PERMISSION
+from asgiref.sync import sync_to_async
 from django.contrib.auth import get_user_model
 from django.contrib.auth.models import Permission
+from django.core.cache import cache
+from django.http import QueryDict
+from django.test import AsyncClient, override_settings
 from rest_framework.reverse import reverse
 from rest_framework.test import APITestCase
+from rest_framework_simplejwt.tokens import AccessToken
+from holiday.holiday_module.conditional import bump_holiday_data_version
 from holiday.holiday_module.models import Holidays
-from holiday.holiday_module.tests.test_common import upload_image
+from holiday.holiday_module.public_payload import public_payload_key
+from holiday.holiday_module.tests.test_common import upload_image, QueryBudgetMixin
 from roles.models import Role
 from settings.models import CompanySettings, SettingsTimeZone, SettingsDateFormat, SettingsCurrency, AttendanceSettings, \
     SettingsTimeFormat
@@ -14,7 +23,7 @@ from holiday.holiday_module.tests.test_common import upload_image_company_logo,
 
 TODAY = date.today()
 
-class TestViewHolidays(APITestCase):
+class TestViewHolidays(QueryBudgetMixin, APITestCase):
     """test cases to view holidays"""
     all_holidays_url = reverse('list_create_holidays')
     email = EMAIL
@@ -103,7 +112,8 @@ class TestViewHolidays(APITestCase):
         """test cases to view holidays with valid id"""
         self.user.user_permissions.add(self.get_permission)
         self.client.force_authenticate(user=self.user)
-        response = self.client.get(self.holidays_url)
+        with self.assertMaxQueries(9):
+            response = self.client.get(self.holidays_url)
         self.assertEquals(response.status_code, 200)
 
     def test_get_holidays_with_invalid_id(self):
@@ -119,13 +129,192 @@ class TestViewHolidays(APITestCase):
         self.assertEquals(response.status_code, 401)
 
     def test_get_all_holidays(self):
-        """test cases to list holidays with valid id"""
+        """test cases to list a full page of holidays within a query budget independent of page size"""
         self.user.user_permissions.add(self.list_permission)
         self.client.force_authenticate(user=self.user)
-        response = self.client.get(self.all_holidays_url)
+        Holidays.objects.bulk_create(
+            Holidays(created_by_id=self.user.id, name=f"holiday {days}", date=TODAY + timedelta(days=days))
+            for days in range(10, 130, 10))
+        with self.assertMaxQueries(11):
+            response = self.client.get(self.all_holidays_url)
         self.assertEquals(response.status_code, 200)
+        self.assertEquals(len(response.json()['results']), 10)
+
+    def test_get_current_month_holidays(self):
+        """test cases to list current month holidays on dashboard within a query budget"""
+        self.user.is_superuser = True
+        self.user.save()
+        self.client.force_authenticate(user=self.user)
+        Holidays.objects.create(created_by_id=self.user.id, name="holiday", date=TODAY)
+        with self.assertMaxQueries(4):
+            response = self.client.get(reverse('current_month_holiday'))
+        self.assertEquals(response.status_code, 200)
+        self.assertEquals(response.json()['count'], 1)
 
     def test_get_all_holidays_with_user_having_no_permission(self):
         """test cases to list holidays with no permission"""
         response = self.client.get(self.all_holidays_url)
         self.assertEquals(response.status_code, 401)
+
+    def test_get_all_holidays_month_count(self):
+        """test cases to list holidays with active and inactive count of their month"""
+        self.user.user_permissions.add(self.list_permission)
+        self.client.force_authenticate(user=self.user)
+        month_start = TODAY.replace(day=1) + relativedelta(months=2)
+        Holidays.objects.create(created_by_id=self.user.id, name="holi", date=month_start)
+        Holidays.objects.create(created_by_id=self.user.id, name="duleti", date=month_start + timedelta(days=1),
+                                is_active=False)
+        response = self.client.get(self.all_holidays_url)
+        body = response.json()
+        self.assertEquals(response.status_code, 200, body)
+        self.assertEquals([holiday['count'] for holiday in body['results']],
+                          [{"active": 1, "inactive": 1}, {"active": 1, "inactive": 1}])
+
+    def test_get_all_holidays_not_modified(self):
+        """test cases to list holidays again with ETag of previous response"""
+        self.user.user_permissions.add(self.list_permission)
+        self.client.force_authenticate(user=self.user)
+        response = self.client.get(self.all_holidays_url)
+        self.assertEquals(response.status_code, 200)
+        response = self.client.get(self.all_holidays_url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEquals(response.status_code, 304)
+
+    def test_get_holidays_modified_after_update(self):
+        """test cases to view holiday with ETag taken before holiday was updated"""
+        self.user.user_permissions.add(self.get_permission)
+        self.client.force_authenticate(user=self.user)
+        response = self.client.get(self.holidays_url)
+        self.assertEquals(response.status_code, 200)
+        with self.captureOnCommitCallbacks(execute=True):
+            bump_holiday_data_version()
+        response = self.client.get(self.holidays_url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEquals(response.status_code, 200)
+
+    def test_get_holidays_modified_in_other_worker(self):
+        """test cases to view holiday with old ETag when update happened in a worker with its own local cache"""
+        self.user.user_permissions.add(self.get_permission)
+        self.client.force_authenticate(user=self.user)
+        response = self.client.get(self.holidays_url)
+        self.assertEquals(response.status_code, 200)
+        with self.captureOnCommitCallbacks(execute=True):
+            bump_holiday_data_version()
+        # local cache of this worker knows nothing of the bump
+        cache.clear()
+        response = self.client.get(self.holidays_url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEquals(response.status_code, 200)
+
+    def test_get_holidays_not_modified_with_any_etag(self):
+        """test cases to match If-None-Match * only for a holiday that exists"""
+        self.user.user_permissions.add(self.get_permission)
+        self.client.force_authenticate(user=self.user)
+        response = self.client.get(self.holidays_url, HTTP_IF_NONE_MATCH='*')
+        self.assertEquals(response.status_code, 304)
+        missing_url = reverse('retrieve_update_destroy_holidays', kwargs={'id': self.holidays.id + 1000})
+        response = self.client.get(missing_url, HTTP_IF_NONE_MATCH='*')
+        self.assertEquals(response.status_code, 404)
+
+    def test_get_public_holidays(self):
+        """test cases to list public holidays without list permission and again with ETag of previous response"""
+        self.client.force_authenticate(user=self.user)
+        with self.assertMaxQueries(7):
+            response = self.client.get(self.all_holidays_url, {'public_access': 'true'})
+        self.assertEquals(response.status_code, 200)
+        self.assertEquals(response['Content-Type'], 'application/json')
+        self.assertTrue(all(set(holiday) == {'id', 'date'} for holiday in response.json()))
+        response = self.client.get(self.all_holidays_url, {'public_access': 'true'},
+                                   HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEquals(response.status_code, 304)
+
+    def test_public_payload_key_of_read_parameters(self):
+        """test cases to key public payload on parameters the public list reads and not cache searches"""
+        key = public_payload_key(QueryDict('public_access=true'))
+        self.assertEquals(public_payload_key(QueryDict('public_access=true&page=3&ordering=name&junk=1')), key)
+        year_key = public_payload_key(QueryDict('public_access=true&start_year=2024&end_year=2025'))
+        self.assertNotEquals(year_key, key)
+        self.assertEquals(public_payload_key(QueryDict('end_year=2025&public_access=true&start_year=2024&junk=1')),
+                          year_key)
+        self.assertIsNone(public_payload_key(QueryDict('public_access=true&search=diwali')))
+        self.assertIsNone(public_payload_key(QueryDict('public_access=true&start_year=x&end_year=2025')))
+
+    def test_get_all_holidays_with_cursor_pagination(self):
+        """test cases to list holidays page by page with cursor ordered by date without count"""
+        self.user.user_permissions.add(self.list_permission)
+        self.client.force_authenticate(user=self.user)
+        for days in (30, 31):
+            Holidays.objects.create(created_by_id=self.user.id, name=f"holiday {days}", date=TODAY + timedelta(days=days))
+        holiday_ids = list(Holidays.objects.filter(date__gte=TODAY + timedelta(days=1), date__lte=TODAY + timedelta(
+            days=365)).order_by('date', 'id').values_list('id', flat=True))
+        response = self.client.get(self.all_holidays_url, {'pagination': 'cursor', 'ordering': 'date', 'page_size': 1,
+                                                           'count': 'none'})
+        body = response.json()
+        self.assertEquals(response.status_code, 200, body)
+        self.assertIsNone(body['count'])
+        page_ids = [holiday['id'] for holiday in body['results']]
+        while body['next']:
+            body = self.client.get(body['next']).json()
+            page_ids += [holiday['id'] for holiday in body['results']]
+        self.assertEquals(page_ids, holiday_ids)
+
+    def test_get_all_holidays_with_search(self):
+        """test cases to list holidays matching search by substring and by word prefix"""
+        self.user.user_permissions.add(self.list_permission)
+        self.client.force_authenticate(user=self.user)
+        for days, name in ((10, "Christmas Day"), (20, "Good Friday"), (30, "Independence Day")):
+            Holidays.objects.create(created_by_id=self.user.id, name=name, date=TODAY + timedelta(days=days))
+        response = self.client.get(self.all_holidays_url, {'search': 'christ'})
+        self.assertEquals(response.status_code, 200)
+        self.assertEquals([holiday['name'] for holiday in response.json()['results']], ["Christmas Day"])
+        response = self.client.get(self.all_holidays_url, {'search': 'fri', 'search_prefix': 'true'})
+        self.assertEquals(response.status_code, 200)
+        self.assertEquals([holiday['name'] for holiday in response.json()['results']], ["Good Friday"])
+
+    def test_get_all_holidays_with_search_and_cursor_pagination(self):
+        """test cases to list holidays matching search with cursor in cursor order, not ranked by similarity"""
+        self.user.user_permissions.add(self.list_permission)
+        self.client.force_authenticate(user=self.user)
+        for days, name in ((10, "Christmas"), (20, "Christmas Eve")):
+            Holidays.objects.create(created_by_id=self.user.id, name=name, date=TODAY + timedelta(days=days))
+        response = self.client.get(self.all_holidays_url, {'search': 'christmas', 'pagination': 'cursor'})
+        self.assertEquals(response.status_code, 200)
+        self.assertEquals([holiday['name'] for holiday in response.json()['results']], ["Christmas Eve", "Christmas"])
+
+    async def test_get_all_holidays_async(self):
+        """test cases to list holidays through async view as sync view lists them, and again with its ETag"""
+        await sync_to_async(self.user.user_permissions.add)(self.list_permission)
+        await sync_to_async(Holidays.objects.bulk_create)([
+            Holidays(created_by_id=self.user.id, name=f"holiday {days}", date=TODAY + timedelta(days=days))
+            for days in range(10, 130, 10)])
+        token = f'Bearer {await sync_to_async(AccessToken.for_user)(self.user)}'
+        async_client = AsyncClient()
+        response = await async_client.get(reverse('async_list_holidays'), authorization=token)
+        self.assertEquals(response.status_code, 200)
+        sync_response = await sync_to_async(self.client.get)(self.all_holidays_url, HTTP_AUTHORIZATION=token)
+        self.assertEquals(response.json()['count'], 12)
+        self.assertEquals(response.json()['results'], sync_response.json()['results'])
+        response = await async_client.get(reverse('async_list_holidays'), authorization=token,
+                                          if_none_match=response['ETag'])
+        self.assertEquals(response.status_code, 304)
+
+    async def test_get_all_holidays_async_traces_queries(self):
+        """test cases to trace async orm queries of async view with query tracer enabled"""
+        await sync_to_async(self.user.user_permissions.add)(self.list_permission)
+        await sync_to_async(Holidays.objects.create)(created_by_id=self.user.id, name="holiday",
+                                                     date=TODAY + timedelta(days=10))
+        token = f'Bearer {await sync_to_async(AccessToken.for_user)(self.user)}'
+        with override_settings(HOLIDAY_QUERY_TRACER=True, HOLIDAY_QUERY_REPEAT_THRESHOLD=0):
+            async_client = AsyncClient()
+            with self.assertLogs('holiday.holiday_module.query_tracer', level='WARNING') as logs:
+                response = await async_client.get(reverse('async_list_holidays'), authorization=token)
+        self.assertEquals(response.status_code, 200)
+        report = json.loads(logs.output[0].split('repeated queries ', 1)[1])
+        # acount of async view, run by the async orm
+        self.assertTrue(any(shape['sql'].startswith('SELECT COUNT(*) AS "__count" FROM "Holidays"')
+                            for shape in report['repeated']))
+
+    async def test_get_holidays_async_with_user_having_no_permission(self):
+        """test cases to list holidays and current month holidays through async views without credentials"""
+        async_client = AsyncClient()
+        response = await async_client.get(reverse('async_list_holidays'))
+        self.assertEquals(response.status_code, 401)
+        response = await async_client.get(reverse('async_current_month_holiday'))
+        self.assertEquals(response.status_code, 401)
@@ -0,0 +1,104 @@
+from datetime import date, timedelta
+from unittest import skipUnless
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.db.migrations.loader import MigrationLoader
+from django.test import SimpleTestCase, TestCase
+
+from holiday.holiday_module.models import Holidays
+from holiday.holiday_module.search import search_holidays
+from holiday.holiday_module.utils import month_date_range
+from holiday.holiday_module.validations import overlapping_requests
+from holiday.holiday_module.tests.constants import EMAIL, USERNAME, USER_PASS
+from leaves.models import Leave, LeaveAllocations
+from roles.models import Role
+from work_from_home.models import WorkFromHome
+
+TODAY = date.today()
+
+
+class TestInitialMigration(SimpleTestCase):
+    """initial migration can be faked on databases created before the app shipped migrations"""
+
+    def test_initial_migration_creates_only_holidays(self):
+        """test cases to create no table but Holidays in 0001, which existing databases already have"""
+        state = MigrationLoader(None, ignore_no_migrations=True).project_state(('holiday_module', '0001_initial'))
+        self.assertEquals([name for app_label, name in state.models if app_label == 'holiday_module'],
+                          ['holidays'])
+
+
+@skipUnless(connection.vendor == 'postgresql', 'EXPLAIN checks need PostgreSQL')
+class TestHotQueryIndexes(TestCase):
+    """hot holiday, leave and work from home queries are answered from an index, never a sequential scan"""
+
+    @classmethod
+    def setUpTestData(cls):
+        """seed holidays over several years and refresh planner statistics"""
+        Holidays.objects.bulk_create(
+            Holidays(name=f"holiday {day}", date=TODAY + timedelta(days=day), is_active=bool(day % 3))
+            for day in range(-1500, 1500)
+        )
+        with connection.cursor() as cursor:
+            for model in (Holidays, Leave, WorkFromHome, LeaveAllocations):
+                cursor.execute(f'ANALYZE "{model._meta.db_table}"')
+
+    def assertUsesIndex(self, queryset, index_name=None):
+        """plan of queryset with sequential scans disabled must not contain one, and use index_name when given"""
+        with connection.cursor() as cursor:
+            cursor.execute('SET LOCAL enable_seqscan = off')
+        plan = queryset.explain()
+        self.assertNotIn('Seq Scan', plan, plan)
+        if index_name:
+            self.assertIn(index_name, plan, plan)
+
+    def test_active_holidays_of_date_range(self):
+        """active holidays between two dates"""
+        self.assertUsesIndex(Holidays.objects.filter(is_active=True, date__range=[TODAY, TODAY + timedelta(days=365)]))
+
+    def test_holiday_name_search(self):
+        """holiday list search by substring, word prefix and similarity"""
+        self.assertUsesIndex(search_holidays(Holidays.objects.all(), 'holiday 12'), 'holidays_name_trgm_idx')
+        self.assertUsesIndex(search_holidays(Holidays.objects.all(), 'holi', prefix=True), 'holidays_name_trgm_idx')
+
+    def test_holidays_of_month(self):
+        """dashboard holidays of current month"""
+        month_start, next_month_start = month_date_range(TODAY)
+        self.assertUsesIndex(Holidays.objects.filter(date__gte=month_start, date__lt=next_month_start))
+
+    def test_holiday_name_in_financial_year(self):
+        """duplicate holiday name check"""
+        self.assertUsesIndex(Holidays.objects.filter(name="holiday 1", date__gte=TODAY,
+                                                     date__lte=TODAY + timedelta(days=365)))
+
+    def test_requests_overlapping_holiday_dates(self):
+        """leave and work from home requests overlapping holiday dates"""
+        dates = [TODAY + timedelta(days=10), TODAY + timedelta(days=40)]
+        self.assertUsesIndex(overlapping_requests(Leave.objects.all(), dates))
+        self.assertUsesIndex(overlapping_requests(WorkFromHome.objects.all(), dates))
+
+    def test_requests_overlapping_holiday_dates_use_date_range_index(self):
+        """leave and work from home requests overlapping holiday dates are found with GiST date range index"""
+        dates = [TODAY + timedelta(days=day) for day in range(0, 60, 7)]
+        self.assertUsesIndex(overlapping_requests(Leave.objects.all(), dates), 'leave_date_range_gist_idx')
+        self.assertUsesIndex(overlapping_requests(WorkFromHome.objects.all(), dates), 'wfh_date_range_gist_idx')
+
+    def test_request_ending_before_start_overlaps_nothing(self):
+        """request whose end date is before its start date is stored and overlaps no holiday date"""
+        role = Role.objects.create(name='Testing', code='TT', type='test')
+        user = get_user_model().objects.create_user(email=EMAIL, password=USER_PASS, username=USERNAME, role=role)
+        leave = Leave.objects.create(requested_by_id=user.id, request_from_id=user.id, type="full",
+                                     start_date=TODAY + timedelta(days=5), end_date=TODAY + timedelta(days=2),
+                                     reason="xyz", duration=0, isadhoc_leave=False, available_on_phone=False,
+                                     available_on_city=False, emergency_contact="+919877665456")
+        dates = [TODAY + timedelta(days=day) for day in range(7)]
+        self.assertFalse(overlapping_requests(Leave.objects.filter(id=leave.id), dates).exists())
+
+    def test_requests_returning_on_date(self):
+        """leave and work from home requests returning on a holiday date"""
+        self.assertUsesIndex(Leave.objects.filter(return_date=TODAY).exclude(status="cancelled"))
+        self.assertUsesIndex(WorkFromHome.objects.filter(return_date=TODAY).exclude(status="cancelled"))
+
+    def test_active_leave_allocation_of_user(self):
+        """active leave allocation of a user"""
+        self.assertUsesIndex(LeaveAllocations.objects.filter(user=1, is_active=True))
@@ -0,0 +1,101 @@
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.test import TestCase
+
+from holiday.holiday_module.validations import adjust_leave_durations, adjust_leaves_one_by_one
+from leaves.models import Leave, LeaveAllocations
+from roles.models import Role
+from holiday.holiday_module.tests.constants import USER_PASS
+
+# monday, far enough ahead for no holiday check to matter
+DAY = date(2030, 1, 7)
+# user: (remaining, exceed, [(leave type, status, start offset, end offset)])
+ALLOCATIONS = {
+    'no_exceed': (Decimal('16'), Decimal('0'), [('full', 'approved', 0, 2), ('half', 'pending', 1, 1)]),
+    'near_zero_remaining': (Decimal('0.5'), Decimal('0'), [('full', 'approved', 0, 1), ('full', 'approved', 1, 3)]),
+    'exceed_reaches_zero': (Decimal('0'), Decimal('1'), [('full', 'approved', 0, 2), ('full', 'approved', 1, 1),
+                                                         ('half', 'approved', 1, 4)]),
+    'exceed_crosses_zero': (Decimal('0'), Decimal('0.5'), [('full', 'approved', 1, 1), ('half', 'rejected', 0, 3),
+                                                           ('full', 'approved', 0, 2)]),
+    'exceed_stays_above_zero': (Decimal('0'), Decimal('3'), [('full', 'approved', 0, 2), ('half', 'approved', 1, 1)]),
+    'exceed_below_zero': (Decimal('0'), Decimal('-1'), [('full', 'approved', 0, 2), ('half', 'pending', 1, 1)]),
+    'no_allocation': (None, None, [('full', 'approved', 0, 2)]),
+}
+
+
+class RolledBack(Exception):
+    """raised to roll back changes after reading them"""
+
+
+class TestLeaveAllocationAdjustment(TestCase):
+    """set based leave adjustment gives the same leaves and allocations as leave by leave adjustment"""
+
+    @classmethod
+    def setUpTestData(cls):
+        """users with allocations near zero remaining and exceed leave, each with overlapping leaves"""
+        role = Role.objects.create(name='Testing', code='TT', type='test')
+        cls.user_ids = []
+        for name, (remaining, exceed, leaves) in ALLOCATIONS.items():
+            user = get_user_model().objects.create_user(email=f'{name}@user.com', password=USER_PASS, username=name,
+                                                        is_active=True, role=role)
+            cls.user_ids.append(user.id)
+            if remaining is not None:
+                LeaveAllocations.objects.create(user_id=user.id, total_leave=20, allocated_leave=20,
+                                                allocated_year=20, remaining_leave=remaining, exceed_leave=exceed,
+                                                used_leave=20 - remaining + exceed, is_active=True)
+            for type_, status, start, end in leaves:
+                days = end - start + 1
+                Leave.objects.create(requested_by_id=user.id, request_from_id=user.id, type=type_, status=status,
+                                     start_date=DAY + timedelta(days=start), end_date=DAY + timedelta(days=end),
+                                     duration=days if type_ == 'full' else days / 2, reason='xyz',
+                                     isadhoc_leave=False, available_on_phone=False, available_on_city=False,
+                                     emergency_contact='+919877665456')
+
+    def adjusted(self, adjust, date_signs):
+        """leaves and allocations after adjust, rolled back afterwards"""
+        try:
+            with transaction.atomic():
+                adjust(date_signs)
+                result = (
+                    list(Leave.objects.order_by('id').values_list('id', 'duration')),
+                    list(LeaveAllocations.objects.order_by('id').values_list(
+                        'id', 'remaining_leave', 'used_leave', 'exceed_leave')),
+                )
+                raise RolledBack
+        except RolledBack:
+            return result
+
+    def assertAdjustedAlike(self, date_signs):
+        """set based and leave by leave adjustment of all users end equal"""
+        self.assertEqual(
+            self.adjusted(adjust_leave_durations, date_signs),
+            self.adjusted(lambda signs: adjust_leaves_one_by_one(self.user_ids, signs), date_signs))
+
+    def test_holiday_added(self):
+        """test cases to reduce durations alike when holiday added"""
+        self.assertAdjustedAlike({DAY + timedelta(days=1): -1})
+
+    def test_holidays_added(self):
+        """test cases to reduce durations alike when several holidays added at once"""
+        self.assertAdjustedAlike({DAY: -1, DAY + timedelta(days=1): -1, DAY + timedelta(days=2): -1})
+
+    def test_holiday_removed(self):
+        """test cases to increment durations alike when holiday removed"""
+        self.assertAdjustedAlike({DAY + timedelta(days=1): 1})
+
+    def test_holiday_moved(self):
+        """test cases to adjust durations alike when holiday moved to another date"""
+        self.assertAdjustedAlike({DAY: 1, DAY + timedelta(days=1): -1})
+
+    def test_exceed_leave_crossing_zero(self):
+        """test cases to stop taking from exceed leave once an approved leave takes it below zero"""
+        allocation = LeaveAllocations.objects.get(user__username='exceed_crosses_zero')
+        adjust_leave_durations({DAY + timedelta(days=1): -1})
+        allocation.refresh_from_db()
+        self.assertEqual((allocation.exceed_leave, allocation.used_leave), (Decimal('-0.5'), Decimal('19.5')))
+        durations = list(Leave.objects.filter(request_from__username='exceed_crosses_zero').order_by('id').values_list(
+            'duration', flat=True))
+        self.assertEqual(durations, [Decimal('0'), Decimal('1.5'), Decimal('3')])
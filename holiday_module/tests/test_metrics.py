@@ -0,0 +1,69 @@
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+from django.test import SimpleTestCase, override_settings
+from rest_framework.reverse import reverse
+
+from holiday.holiday_module.metrics import MetricsRegistry, Counter, Histogram, FILE_PREFIX, AGGREGATE_FILE
+
+
+class TestMetrics(SimpleTestCase):
+    """test cases to expose metrics of every worker process in prometheus text format"""
+
+    def setUp(self):
+        """shared metrics directory for this test"""
+        metrics_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(metrics_dir.cleanup)
+        self.metrics_dir = metrics_dir.name
+        settings_override = override_settings(HOLIDAY_METRICS_DIR=metrics_dir.name, HOLIDAY_METRICS_TOKEN=None)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+    def test_metrics_of_worker_processes_are_summed(self):
+        """test cases to sum counters and histograms written by two processes"""
+        worker = MetricsRegistry()
+        registries = [MetricsRegistry(), worker]
+        counters = [Counter('test_rows', 'Rows.', registry=registry) for registry in registries]
+        histograms = [Histogram('test_seconds', 'Seconds.', buckets=(0.1, 1), registry=registry)
+                      for registry in registries]
+        for counter, histogram, value in zip(counters, histograms, (0.05, 0.5)):
+            counter.inc(2, model='leave')
+            histogram.observe(value, view='list')
+        worker.flush(force=True)
+        lines = registries[0].render().splitlines()
+        self.assertIn('# TYPE test_rows_total counter', lines)
+        self.assertIn('test_rows_total{model="leave"} 4', lines)
+        self.assertIn('test_seconds_bucket{view="list",le="0.1"} 1', lines)
+        self.assertIn('test_seconds_bucket{view="list",le="1.0"} 2', lines)
+        self.assertIn('test_seconds_bucket{view="list",le="+Inf"} 2', lines)
+        self.assertIn('test_seconds_count{view="list"} 2', lines)
+
+    def test_files_of_exited_processes_are_folded(self):
+        """test cases to fold metric files of exited processes into aggregate file keeping totals"""
+        registry = MetricsRegistry()
+        counter = Counter('test_rows', 'Rows.', registry=registry)
+        counter.inc(2, model='leave')
+        for _ in range(2):
+            exited = subprocess.run([sys.executable, '-c', 'import os; print(os.getpid())'], capture_output=True,
+                                    text=True, check=True)
+            pid = int(exited.stdout)
+            with open(os.path.join(self.metrics_dir, f'{FILE_PREFIX}{pid}_1.json'), 'w') as metric_file:
+                json.dump({'test_rows': [[{'model': 'leave'}, 3]]}, metric_file)
+        for _ in range(2):
+            self.assertIn('test_rows_total{model="leave"} 8', registry.render().splitlines())
+            files = sorted(name for name in os.listdir(self.metrics_dir) if name.endswith('.json'))
+            self.assertEqual(files, sorted([AGGREGATE_FILE, registry.file_name]))
+
+    def test_metrics_endpoint(self):
+        """test cases to read metrics endpoint with bearer token, not found while no token is set"""
+        url = reverse('holiday_metrics')
+        self.assertEquals(self.client.get(url).status_code, 404)
+        with override_settings(HOLIDAY_METRICS_TOKEN='secret'):
+            self.assertEquals(self.client.get(url).status_code, 401)
+            self.assertEquals(self.client.get(url, HTTP_AUTHORIZATION='Bearer wrong').status_code, 401)
+            response = self.client.get(url, HTTP_AUTHORIZATION='Bearer secret')
+        self.assertEquals(response.status_code, 200)
+        self.assertIn('# TYPE holiday_request_duration_seconds histogram', response.content.decode())
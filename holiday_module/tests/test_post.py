@@ -3,18 +3,20 @@ from datetime import date, timedelta
 from holiday.holiday_module.tests.constants import EMAIL, USERNAME, USER_PASS, ADD_PERMISSION
 from django.contrib.auth import get_user_model
 from django.contrib.auth.models import Permission
+from django.test import override_settings
 from rest_framework.reverse import reverse
 from rest_framework.test import APITestCase
+from holiday.holiday_module.constants import IMPORT_ENCODING, IMPORT_NAME_LENGTH
 from holiday.holiday_module.models import Holidays
-from holiday.holiday_module.tests.test_common import upload_image, upload_invalid_image
+from holiday.holiday_module.tests.test_common import upload_image, upload_invalid_image, upload_holiday_file
 from roles.models import Role
 from settings.models import CompanySettings, SettingsDateFormat, SettingsTimeZone, SettingsCurrency, AttendanceSettings, \
     SettingsTimeFormat
-from holiday.holiday_module.tests.test_common import upload_image_company_logo, upload_image_favicon
+from holiday.holiday_module.tests.test_common import upload_image_company_logo, upload_image_favicon, QueryBudgetMixin
 
 TODAY = date.today()
 
-class TestAddHolidays(APITestCase):
+class TestAddHolidays(QueryBudgetMixin, APITestCase):
     """test cases to create holidays"""
     holidays_url = reverse('list_create_holidays')
     email = EMAIL
@@ -107,6 +109,18 @@ class TestAddHolidays(APITestCase):
         body = response.json()
         self.assertEquals(response.status_code, 400, body)
 
+    def test_add_holidays_with_future_date(self):
+        """test cases to create holidays of a future working day within a query budget"""
+        self.user.user_permissions.add(self.add_permission)
+        self.client.force_authenticate(user=self.user)
+        holiday_date = TODAY + timedelta(days=40)
+        holiday_date += timedelta(days=(4 - holiday_date.weekday()) % 7)
+        with self.assertMaxQueries(15):
+            response = self.client.post(self.holidays_url, {"name": "test", "date": holiday_date})
+        body = response.json()
+        self.assertEquals(response.status_code, 201, body)
+        self.assertTrue(Holidays.objects.filter(name="test", date=holiday_date).exists())
+
     def test_add_holidays_with_no_data(self):
         """test cases to create holidays with no data"""
         self.user.user_permissions.add(self.add_permission)
@@ -178,3 +192,79 @@ class TestAddHolidays(APITestCase):
         body = response.json()
         self.assertEquals(response.status_code, 400, body)
 
+    def test_import_holidays_from_csv(self):
+        """test cases to import holidays from csv file"""
+        self.user.user_permissions.add(self.add_permission)
+        self.client.force_authenticate(user=self.user)
+        holiday_file = upload_holiday_file(
+            'holidays.csv', f"name,date\nimport one,{TODAY + timedelta(days=40)}\nimport two,{TODAY + timedelta(days=41)}\n")
+        response = self.client.post(f'{self.holidays_url}?import=true', {'file': holiday_file})
+        body = response.json()
+        self.assertEquals(response.status_code, 201, body)
+        self.assertEquals(body['count'], 2)
+        self.assertEquals(Holidays.objects.filter(name__startswith='import').count(), 2)
+
+    def test_import_holidays_from_ics(self):
+        """test cases to import holidays from icalendar file"""
+        self.user.user_permissions.add(self.add_permission)
+        self.client.force_authenticate(user=self.user)
+        holiday_date = TODAY + timedelta(days=40)
+        holiday_file = upload_holiday_file(
+            'holidays.ics', f"BEGIN:VCALENDAR\r\nBEGIN:VEVENT\r\nDTSTART;VALUE=DATE:{holiday_date:%Y%m%d}\r\n"
+                            f"SUMMARY:import one\r\nEND:VEVENT\r\nEND:VCALENDAR\r\n")
+        response = self.client.post(f'{self.holidays_url}?import=true', {'file': holiday_file})
+        body = response.json()
+        self.assertEquals(response.status_code, 201, body)
+        self.assertTrue(Holidays.objects.filter(name='import one', date=holiday_date).exists())
+
+    def test_import_holidays_with_invalid_rows(self):
+        """test cases to import holidays where one row is invalid, nothing is created"""
+        self.user.user_permissions.add(self.add_permission)
+        self.client.force_authenticate(user=self.user)
+        holiday_file = upload_holiday_file(
+            'holidays.csv', f"name,date\nimport one,{TODAY + timedelta(days=40)}\nimport two,not a date\n")
+        response = self.client.post(f'{self.holidays_url}?import=true', {'file': holiday_file})
+        body = response.json()
+        self.assertEquals(response.status_code, 400, body)
+        self.assertEquals(list(body['rows']), ['3'])
+        self.assertFalse(Holidays.objects.filter(name__startswith='import').exists())
+
+    def test_import_holidays_with_too_long_name(self):
+        """test cases to import holidays where one name is longer than holiday name field, nothing is created"""
+        self.user.user_permissions.add(self.add_permission)
+        self.client.force_authenticate(user=self.user)
+        holiday_file = upload_holiday_file(
+            'holidays.csv', f"name,date\nimport one,{TODAY + timedelta(days=40)}\nimport {'x' * 100},"
+                            f"{TODAY + timedelta(days=41)}\n")
+        response = self.client.post(f'{self.holidays_url}?import=true', {'file': holiday_file})
+        body = response.json()
+        self.assertEquals(response.status_code, 400, body)
+        self.assertEquals(body['rows'], {'3': {'name': IMPORT_NAME_LENGTH.format(max_length=100)}})
+        self.assertFalse(Holidays.objects.filter(name__startswith='import').exists())
+
+    def test_import_holidays_from_latin1_csv(self):
+        """test cases to import holidays from csv file which is not utf-8, nothing is created"""
+        self.user.user_permissions.add(self.add_permission)
+        self.client.force_authenticate(user=self.user)
+        holiday_file = upload_holiday_file(
+            'holidays.csv', f"name,date\nimport fête,{TODAY + timedelta(days=40)}\n", encoding='latin-1')
+        response = self.client.post(f'{self.holidays_url}?import=true', {'file': holiday_file})
+        body = response.json()
+        self.assertEquals(response.status_code, 400, body)
+        self.assertEquals(body['file'], [IMPORT_ENCODING])
+        self.assertFalse(Holidays.objects.filter(name__startswith='import').exists())
+
+    @override_settings(HOLIDAY_SERVER_TIMING=True)
+    def test_add_holidays_with_server_timing(self):
+        """test cases to create holiday and report time of each stage in Server-Timing header"""
+        self.user.user_permissions.add(self.add_permission)
+        self.client.force_authenticate(user=self.user)
+        holiday_date = TODAY + timedelta(days=40)
+        holiday_date += timedelta(days=(4 - holiday_date.weekday()) % 7)
+        response = self.client.post(self.holidays_url, {"name": "timed", "date": holiday_date})
+        body = response.json()
+        self.assertEquals(response.status_code, 201, body)
+        stages = [entry.split(';')[0] for entry in response['Server-Timing'].split(', ')]
+        self.assertEquals(stages[:3], ['check_weekday', 'check_holiday_exists', 'validate_image'])
+        self.assertIn('save', stages)
+        self.assertEquals(stages[-1], 'total')
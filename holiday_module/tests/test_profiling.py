@@ -0,0 +1,53 @@
+import os
+import tempfile
+import time
+from collections import Counter
+
+from django.http import HttpResponse
+from django.test import SimpleTestCase, RequestFactory, override_settings
+
+from holiday.holiday_module import views
+from holiday.holiday_module.middleware import ProfilingMiddleware
+from holiday.holiday_module.profiling import write_profile, PROFILE_SUFFIX
+
+
+def slow_view(request):
+    """view spending time in a function of its own"""
+    time.sleep(0.05)
+    return HttpResponse()
+
+
+class TestProfiling(SimpleTestCase):
+    """test cases to profile sampled requests into a bounded directory of collapsed stack files"""
+
+    def setUp(self):
+        """empty profile directory for this test"""
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.profile_dir = directory.name
+
+    def profiles(self):
+        return sorted(name for name in os.listdir(self.profile_dir) if name.endswith(PROFILE_SUFFIX))
+
+    def test_ring_buffer_keeps_newest_profiles(self):
+        """test cases to drop oldest profile files above max files"""
+        paths = [write_profile(self.profile_dir, f'GET /holiday/{index}', Counter({'a;b': 1}), max_files=3)
+                 for index in range(5)]
+        self.assertEquals(self.profiles(), [os.path.basename(path) for path in paths[2:]])
+
+    def test_request_with_profile_token(self):
+        """test cases to profile request carrying profile token and skip request without it"""
+        with override_settings(HOLIDAY_PROFILE_DIR=self.profile_dir, HOLIDAY_PROFILE_TOKEN='secret',
+                               HOLIDAY_PROFILE_SAMPLE_RATE=0.0, HOLIDAY_PROFILE_INTERVAL=0.001):
+            middleware = ProfilingMiddleware(lambda request: slow_view(request))
+            request = RequestFactory().get('/holiday/')
+            middleware.process_view(request, views.metrics, (), {})
+            self.assertFalse(middleware(request).has_header('X-Holiday-Profile'))
+            request = RequestFactory().get('/holiday/', HTTP_X_HOLIDAY_PROFILE='secret')
+            middleware.process_view(request, views.metrics, (), {})
+            response = middleware(request)
+        self.assertEquals(self.profiles(), [response['X-Holiday-Profile']])
+        with open(os.path.join(self.profile_dir, response['X-Holiday-Profile'])) as profile_file:
+            lines = profile_file.read().splitlines()
+        self.assertTrue(all(line.startswith('GET_/holiday/;') for line in lines))
+        self.assertTrue(any('test_profiling:slow_view' in line for line in lines))
@@ -6,7 +6,7 @@ from django.contrib.auth.models import Permission
 from rest_framework.reverse import reverse
 from rest_framework.test import APITestCase
 from holiday.holiday_module.models import Holidays
-from holiday.holiday_module.tests.test_common import update_image, upload_image
+from holiday.holiday_module.tests.test_common import update_image, upload_image, QueryBudgetMixin
 from roles.models import Role
 from settings.models import CompanySettings, SettingsDateFormat, SettingsTimeZone, SettingsCurrency, AttendanceSettings, \
     SettingsTimeFormat, ModuleSettings
@@ -14,7 +14,7 @@ from holiday.holiday_module.tests.test_common import upload_image_company_logo,
 
 TODAY = date.today()
 
-class TestUpdateHolidays(APITestCase):
+class TestUpdateHolidays(QueryBudgetMixin, APITestCase):
     """test cases to update holidays"""
     email = EMAIL
     username = USERNAME
@@ -118,7 +118,24 @@ class TestUpdateHolidays(APITestCase):
             "date": "2023-09-17",
             "holiday_image": update_image()
         }
-        response = self.client.put(self.holidays_url, data)
+        with self.assertMaxQueries(15):
+            response = self.client.put(self.holidays_url, data)
+        body = response.json()
+        self.assertEquals(response.status_code, 200, body)
+
+    def test_update_holidays_with_future_date(self):
+        """test cases to update holidays to a future working day within a query budget"""
+        self.user.user_permissions.add(self.put_permission)
+        self.client.force_authenticate(user=self.user)
+        holiday_date = TODAY + timedelta(days=40)
+        holiday_date += timedelta(days=(4 - holiday_date.weekday()) % 7)
+        data = {
+            "name": "Makarsankranti",
+            "date": holiday_date,
+            "holiday_image": update_image()
+        }
+        with self.assertMaxQueries(15):
+            response = self.client.put(self.holidays_url, data)
         body = response.json()
         self.assertEquals(response.status_code, 200, body)
 
@@ -0,0 +1,32 @@
+from datetime import date, timedelta
+
+from django.test import TestCase
+
+from holiday.holiday_module.models import Holidays
+from holiday.holiday_module.query_tracer import normalize_sql, trace_queries
+
+TODAY = date.today()
+
+
+class TestQueryTracer(TestCase):
+    """test cases to group traced queries by shape and call site"""
+
+    def test_normalize_sql(self):
+        """test cases to fold literals and placeholder lists of any length into one shape"""
+        self.assertEquals(normalize_sql('SELECT * FROM "Holidays" WHERE "id" IN (%s, %s, %s) AND "name" = \'a\'  '
+                                        'LIMIT 21'),
+                          normalize_sql('SELECT * FROM "Holidays"\n WHERE "id" IN (%s,%s) AND "name" = \'b\' LIMIT 5'))
+
+    def test_repeated_queries_are_logged(self):
+        """test cases to report query run once per row from one call site"""
+        holidays = Holidays.objects.bulk_create(
+            Holidays(name=f"holiday {days}", date=TODAY + timedelta(days=days)) for days in range(1, 6))
+        with self.assertLogs('holiday.holiday_module.query_tracer', level='WARNING') as logs:
+            with trace_queries(label='per row', threshold=3) as tracer:
+                for holiday in holidays:
+                    Holidays.objects.get(id=holiday.id)
+                Holidays.objects.count()
+        self.assertEquals(tracer.count, 6)
+        self.assertEquals([shape['count'] for shape in tracer.repeated()], [5])
+        self.assertIn('test_query_tracer.py', tracer.repeated()[0]['site'])
+        self.assertIn('"label":"per row"', logs.output[0])
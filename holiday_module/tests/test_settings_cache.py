@@ -0,0 +1,38 @@
+from django.core.cache import cache
+from django.db.models import F
+from django.test import TestCase
+
+from holiday.holiday_module.models import DataVersion
+from holiday.holiday_module.settings_cache import settings_version, bump_settings_version, cached_setting, \
+    SETTINGS_VERSION
+
+
+class TestSettingsVersion(TestCase):
+    """test cases to share settings version between processes through database"""
+
+    def test_bump_survives_local_cache_clear(self):
+        """test cases to read bumped version after local cache of this process is cleared"""
+        version = settings_version()
+        bump_settings_version()
+        cache.clear()
+        self.assertEqual(settings_version(), version + 1)
+
+    def test_bump_from_other_process_reloads_setting(self):
+        """test cases to reload process cached setting once another process bumped version"""
+        loads = []
+
+        def loader():
+            loads.append(1)
+            return len(loads)
+
+        self.assertEqual(cached_setting('test_setting', loader), 1)
+        self.assertEqual(cached_setting('test_setting', loader), 1)
+        # what bump_settings_version runs in another process
+        DataVersion.objects.filter(name=SETTINGS_VERSION).update(version=F('version') + 1)
+        self.assertEqual(cached_setting('test_setting', loader), 2)
+
+    def test_missing_version_row_is_created(self):
+        """test cases to start from current time when version row is missing"""
+        DataVersion.objects.all().delete()
+        self.assertGreater(settings_version(), 0)
+        self.assertTrue(DataVersion.objects.filter(name=SETTINGS_VERSION).exists())
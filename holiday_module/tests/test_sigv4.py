@@ -0,0 +1,62 @@
+import datetime
+from unittest import mock
+
+import boto3
+from botocore.config import Config
+from django.test import SimpleTestCase
+
+from holiday.holiday_module import sigv4
+from holiday.holiday_module.sigv4 import SigV4Presigner
+
+ACCESS_KEY = 'AKIDEXAMPLE'
+SECRET_KEY = 'wJalrXUtnFEMI/K7MDENG+bPxRfiCYEXAMPLEKEY'
+SESSION_TOKEN = 'session/token+='
+FIXED_NOW = datetime.datetime(2024, 3, 1, 12, 30, 45)
+OBJECT_KEYS = ['media/holiday_img/diwali.png', 'media/holiday img/ü a+b.png', 'media/a~b(1)!*.jpeg']
+
+
+class TestSigV4Presigner(SimpleTestCase):
+    """test cases to check offline presigned urls against boto3"""
+
+    def boto3_url(self, bucket, key, region, session_token=None, expires_in=300):
+        """presigned url generated by boto3 at fixed time"""
+        s3_client = boto3.client('s3', aws_access_key_id=ACCESS_KEY, aws_secret_access_key=SECRET_KEY,
+                                 aws_session_token=session_token, region_name=region,
+                                 config=Config(signature_version='s3v4'))
+        with mock.patch('botocore.auth.get_current_datetime', return_value=FIXED_NOW):
+            return s3_client.generate_presigned_url('get_object', Params={'Bucket': bucket, 'Key': key},
+                                                    ExpiresIn=expires_in)
+
+    def assert_same_urls(self, bucket, region, session_token=None):
+        """presigner and boto3 urls are identical for every object key"""
+        presigner = SigV4Presigner(ACCESS_KEY, SECRET_KEY, bucket, region, session_token)
+        for key in OBJECT_KEYS:
+            self.assertEquals(presigner.presign_get_object(key, 300, FIXED_NOW),
+                              self.boto3_url(bucket, key, region, session_token))
+
+    def test_presigned_url_same_as_boto3(self):
+        """test case to presign url of virtual hosted bucket in default region"""
+        self.assert_same_urls('holiday-bucket', 'us-east-1')
+
+    def test_presigned_url_same_as_boto3_in_other_region(self):
+        """test case to presign url of virtual hosted bucket in other region"""
+        self.assert_same_urls('holiday-bucket', 'ap-south-1')
+
+    def test_presigned_url_same_as_boto3_with_session_token(self):
+        """test case to presign url with temporary credentials"""
+        self.assert_same_urls('holiday-bucket', 'ap-south-1', SESSION_TOKEN)
+
+    def test_presigned_url_same_as_boto3_for_path_style_bucket(self):
+        """test case to presign url of bucket name with dots"""
+        self.assert_same_urls('holiday.bucket', 'us-east-1')
+        self.assert_same_urls('holiday.bucket', 'ap-south-1')
+
+    def test_signing_key_derived_once_per_day(self):
+        """test case to reuse signing key for same day"""
+        presigner = SigV4Presigner(ACCESS_KEY, SECRET_KEY, 'holiday-bucket')
+        with mock.patch.object(sigv4, '_hmac', wraps=sigv4._hmac) as derive:
+            presigner.presign_get_object(OBJECT_KEYS[0], 300, FIXED_NOW)
+            presigner.presign_get_object(OBJECT_KEYS[1], 300, FIXED_NOW + datetime.timedelta(hours=1))
+            self.assertEquals(derive.call_count, 4)
+            presigner.presign_get_object(OBJECT_KEYS[0], 300, FIXED_NOW + datetime.timedelta(days=1))
+            self.assertEquals(derive.call_count, 8)
@@ -1,5 +1,5 @@
 from django.urls import path
-from holiday.holiday_module import views
+from holiday.holiday_module import views, async_views
 
 urlpatterns = [
     path('', views.ListCreateAPIView.as_view(), name='list_create_holidays'),
@@ -7,4 +7,8 @@ urlpatterns = [
     path('dashboard/current_months/holidays', views.DashboardCurrentMonthHolidayListAPIView.as_view(),
          name='current_month_holiday'),
     path('dashboard/upcoming/holidays', views.DashboardUpcomingHolidayListAPIView.as_view(), name='upcoming_holiday'),
+    path('async/', async_views.AsyncHolidayListView.as_view(), name='async_list_holidays'),
+    path('async/dashboard/current_months/holidays', async_views.AsyncDashboardCurrentMonthHolidayListView.as_view(),
+         name='async_current_month_holiday'),
+    path('metrics', views.metrics, name='holiday_metrics'),
 ]
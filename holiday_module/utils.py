@@ -1,12 +1,19 @@
-import os
-import datetime
 import re
 
-import dateutil
-import boto3
+import dateutil.parser
+from dateutil.relativedelta import relativedelta
+from django.db.models import Count, Q
+from django.db.models.functions import TruncMonth
+from django.utils import timezone
+from rest_framework.exceptions import ValidationError
 
+from holiday.holiday_module.constants import ATTENDANCE_SETTING
+from holiday.holiday_module.metrics import S3_SECONDS
 from holiday.holiday_module.models import Holidays
+from holiday.holiday_module.s3 import get_s3_client, get_bucket_name, presigned_url_cache
 from holiday.holiday import settings
+from holiday.holiday_module.settings_cache import get_company_settings, get_off_days, cached_setting, \
+    COMPANY_FORMATS
 
 
 def get_aws_holiday_image_url(obj, expiration=settings.expiration_time):
@@ -15,19 +22,7 @@ def get_aws_holiday_image_url(obj, expiration=settings.expiration_time):
     """
     if image_name := obj.holiday_image:
         object_name = str(image_name)
-        s3_client = boto3.client(
-            's3',
-            aws_access_key_id=os.environ.get('AWS_ACCESS_KEY_ID'),
-            aws_secret_access_key=os.environ.get('AWS_SECRET_ACCESS_KEY')
-        )
-        return s3_client.generate_presigned_url(
-            'get_object',
-            Params={
-                'Bucket': os.environ.get('AWS_STORAGE_BUCKET_NAME'),
-                'Key': f'media/{object_name}',
-            },
-            ExpiresIn=expiration,
-        )
+        return presigned_url_cache.get_url(f'media/{object_name}', expiration)
 
 
 def delete_object_from_bucket(instance):
@@ -35,44 +30,41 @@ def delete_object_from_bucket(instance):
         deleting image from s3 bucket
     """
     image_name = str(instance.holiday_image)
-    s3_client = boto3.client(
-        's3',
-        aws_access_key_id=os.environ.get('AWS_ACCESS_KEY_ID'),
-        aws_secret_access_key=os.environ.get('AWS_SECRET_ACCESS_KEY')
-    )
-    s3_client.delete_object(
-        Bucket=os.environ.get('AWS_STORAGE_BUCKET_NAME'),
-        Key=f'media/{image_name}',
-    )
+    with S3_SECONDS.time(operation='delete'):
+        get_s3_client().delete_object(
+            Bucket=get_bucket_name(),
+            Key=f'media/{image_name}',
+        )
+    presigned_url_cache.invalidate(f'media/{image_name}')
 
 
 def attendance_setting_data():
     """
     this function validate attendance setting date according to active days
     """
-    active_days = AttendanceSettings.objects.values('monday', 'tuesday', 'wednesday', 'thursday', 'friday',
-                                                    'saturday',
-                                                    'sunday')
-    if not active_days:
-        raise ValidationError(ATTENDANCE_SETTING_ERROR)
-    weeks = {'monday': 0, 'tuesday': 1, 'wednesday': 2, 'thursday': 3, 'friday': 4,
-             'saturday': 5, 'sunday': 6}
-    return [weeks[key] for key, value in list(active_days)[0].items() if not value]
+    off_days = get_off_days()
+    if off_days is None:
+        raise ValidationError(ATTENDANCE_SETTING)
+    return off_days
+
+
+def load_working_calendar():
+    """
+    load working calendar index of active holidays and off days
+    """
+    from holiday.holiday_module.working_calendar import WorkingCalendar
+    return WorkingCalendar.load()
 
 
-def calculate_return_date(date, return_date, type, half_day_status):
+def calculate_return_date(date, return_date, type, half_day_status, calendar=None):
     """
     Function to calculate return date from start date and end date
     """
     if type != "half" or half_day_status != "firsthalf":
-        off_days = attendance_setting_data()
-        while True:
-            check_if_holiday = Holidays.objects.filter(is_active=True).values_list('date', flat=True).order_by(
-                'date')
-            if (return_date.weekday() not in off_days) and (
-                    return_date not in check_if_holiday) and date != return_date:
-                break
-            return_date = return_date + datetime.timedelta(days=1)
+        if calendar is None:
+            calendar = load_working_calendar()
+        while not calendar.is_working_day(return_date) or date == return_date:
+            return_date = calendar.next_working_day(return_date)
     return return_date
 
 
@@ -83,7 +75,7 @@ def convert_date_format(db_date):
     if db_date is None:
         return None
     try:
-        date_format = CompanySettings.objects.first().date_format.date_format
+        date_format = get_company_settings().date_format.date_format
     except AttributeError:
         return db_date
     db_date = dateutil.parser.parse(db_date)
@@ -97,8 +89,9 @@ def convert_time_format(db_time):
     if db_time is None:
         return None
     try:
-        time_format = CompanySettings.objects.first().time_format.time_format
-        time_type = CompanySettings.objects.first().time_type
+        company_settings = get_company_settings()
+        time_format = company_settings.time_format.time_format
+        time_type = company_settings.time_type
         if time_type == "12 Hour":
             time_format = time_format.replace("H", "I")
     except AttributeError:
@@ -107,18 +100,13 @@ def convert_time_format(db_time):
     return db_time.strftime(time_format)
 
 
-def calculate_next_working_date(date):
+def calculate_next_working_date(date, calendar=None):
     """
         function to calculate next working date
     """
-    off_days = attendance_setting_data()
-    while True:
-        date = date + datetime.timedelta(days=1)
-        check_if_holiday = Holidays.objects.filter(is_active=True).values_list('date', flat=True).order_by(
-            'date')
-        if (date.weekday() not in off_days) and (date not in check_if_holiday):
-            break
-    return date
+    if calendar is None:
+        calendar = load_working_calendar()
+    return calendar.next_working_day(date)
 
 
 def convert_datetime_format(db_datetime):
@@ -134,7 +122,79 @@ def convert_datetime_format(db_datetime):
         return db_datetime
 
 
+def load_company_formats():
+    """
+    company date format and time format with 12 hour rewrite applied, None when not configured
+    """
+    company_settings = get_company_settings()
+    date_format = getattr(getattr(company_settings, 'date_format', None), 'date_format', None)
+    time_format = getattr(getattr(company_settings, 'time_format', None), 'time_format', None)
+    if time_format and company_settings.time_type == "12 Hour":
+        time_format = time_format.replace("H", "I")
+    return date_format, time_format
+
+
+def company_formats():
+    """
+    cached company date format and time format
+    """
+    return cached_setting(COMPANY_FORMATS, load_company_formats)
+
+
+def format_date(value):
+    """
+    convert native date according to company date format setting
+    """
+    if value is None:
+        return None
+    if isinstance(value, str):
+        return convert_date_format(value)
+    date_format = company_formats()[0]
+    return value.strftime(date_format) if date_format else value.isoformat()
+
+
+def format_datetime(value):
+    """
+    convert native date time according to company date and time format setting
+    """
+    if not value:
+        return None
+    if isinstance(value, str):
+        return convert_datetime_format(value)
+    if timezone.is_aware(value):
+        value = timezone.localtime(value)
+    date_format, time_format = company_formats()
+    return f"{value.strftime(date_format or '%Y-%m-%d')} {value.strftime(time_format or '%H:%M:%S')}"
+
+
 def strip_string(data):
     if data:
         string_with_single_spaces = re.sub('\s+', ' ', data).strip()
         return string_with_single_spaces
+
+
+def month_date_range(date):
+    """first day of month of date and first day of next month, for sargable month filters"""
+    month_start = date.replace(day=1)
+    return month_start, month_start + relativedelta(months=1)
+
+
+def holiday_month_counts(dates):
+    """
+    return active and inactive holiday count of every month of given dates, keyed by (year, month),
+    computed with one grouped query
+    """
+    if not dates:
+        return {}
+    start_date = month_date_range(min(dates))[0]
+    end_date = month_date_range(max(dates))[1]
+    month_counts = Holidays.objects.filter(date__gte=start_date, date__lt=end_date).annotate(
+        month=TruncMonth('date')).order_by().values('month').annotate(
+        active=Count('id', filter=Q(is_active=True)), inactive=Count('id', filter=Q(is_active=False)))
+    return {
+        (month_count['month'].year, month_count['month'].month): {
+            "active": month_count['active'],
+            "inactive": month_count['inactive'],
+        }
+        for month_count in month_counts
+    }
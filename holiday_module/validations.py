@@ -1,16 +1,25 @@
 import os
 import datetime
+from collections import defaultdict
+from decimal import Decimal
+
 from dateutil.relativedelta import relativedelta
-from django.db.models import Q
+from django.db.models import Q, F, Case, When, Value, Sum, Min, Exists, OuterRef, Subquery
 from rest_framework import serializers
 from rest_framework.exceptions import ValidationError
 
 from holiday.holiday_module.constants import CHECK_WEEKEND, ATTENDANCE_SETTING, COMPANY_SETTING, HOLIDAY_DELETE_ERROR, \
-    DATE_MUST_BE_GREATER_THAN_TODAY, NAME_ERROR, BYTES
+    DATE_MUST_BE_GREATER_THAN_TODAY, NAME_ERROR, BYTES, IMPORT_NAME_REQUIRED, IMPORT_NAME_LENGTH, \
+    IMPORT_DATE_EXISTS
+from holiday.holiday_module.busday import batch_return_dates
+from holiday.holiday_module.date_ranges import overlapping_dates_filter
+from holiday.holiday_module.metrics import HOLIDAY_CHANGES, RECALCULATED_ROWS
 from holiday.holiday_module.models import Holidays
-from holiday.holiday_module.utils import calculate_return_date, calculate_next_working_date
+from holiday.holiday_module.server_timing import stage
+from holiday.holiday_module.settings_cache import get_company_settings, get_off_days
+from holiday.holiday_module.utils import calculate_next_working_date
+from holiday.holiday_module.working_calendar import WorkingCalendar
 from leaves.models import Leave, LeaveAllocations
-from settings.models import CompanySettings, AttendanceSettings
 from work_from_home.models import WorkFromHome
 
 
@@ -40,7 +49,7 @@ def validate_image_size(data):
         }
         return context
     upload_image_size = image_url.size
-    image_file_size = CompanySettings.objects.first()
+    image_file_size = get_company_settings()
     if image_file_size:
         size = image_file_size.image_size
         type_choice = image_file_size.image_type
@@ -72,26 +81,11 @@ def check_weekday(date):
     """
         check weekend for adding date
     """
-    if active_days := AttendanceSettings.objects.values(
-            'monday',
-            'tuesday',
-            'wednesday',
-            'thursday',
-            'friday',
-            'saturday',
-            'sunday',
-    ):
-        weeks = {'monday': 0, 'tuesday': 1, 'wednesday': 2, 'thursday': 3, 'friday': 4,
-                 'saturday': 5, 'sunday': 6}
-        off_days = [
-            weeks[key]
-            for key, value in list(active_days)[0].items()
-            if not value
-        ]
-        if date.weekday() in off_days:
-            raise serializers.ValidationError({"date": CHECK_WEEKEND})
-    else:
+    off_days = get_off_days()
+    if off_days is None:
         raise ValidationError({"validation_error": ATTENDANCE_SETTING})
+    if date.weekday() in off_days:
+        raise serializers.ValidationError({"date": CHECK_WEEKEND})
 
 
 def check_delete_date(date):
@@ -111,174 +105,260 @@ def date_before_today(data):
         raise serializers.ValidationError({"validation_error": DATE_MUST_BE_GREATER_THAN_TODAY})
 
 
-def delete_holiday_increment_duration_wfh(date):
-    """function for when we delete holidsettingsay then increment in wfh duration"""
-    work_from_home_request = WorkFromHome.objects.filter(start_date__lte=date, end_date__gte=date).exclude(
-        status="cancelled")
-    for wfh_obj in work_from_home_request:
-        if wfh_obj.type == "half":
-            wfh_obj.duration = float(wfh_obj.duration) + 0.5
-
-        else:
-            wfh_obj.duration = wfh_obj.duration + 1
-        wfh_obj.save()
-    next_working_date = calculate_next_working_date(date)
-    wfh_request_return_dates = WorkFromHome.objects.filter(
+def request_duration_delta(model, field_name, date_signs):
+    """
+    expression for change in request duration when holidays change,
+    date_signs map date to 1 when holiday removed from it and -1 when holiday added on it.
+    full day request change one per date in its range and half day request change half.
+    """
+    output_field = model._meta.get_field(field_name)
+    delta = Value(Decimal(0), output_field=output_field)
+    for date, sign in sorted(date_signs.items()):
+        day_weight = Case(When(type="full", then=Value(Decimal(sign))), default=Value(Decimal(sign) / 2),
+                          output_field=output_field)
+        delta = delta + Case(When(start_date__lte=date, end_date__gte=date, then=day_weight),
+                             default=Value(Decimal(0)), output_field=output_field)
+    return delta
+
+
+def overlapping_requests(queryset, dates):
+    """filter requests whose date range contains any of dates with one indexed range query"""
+    return overlapping_dates_filter(queryset, dates).exclude(status="cancelled")
+
+
+def returned_on_next_working_date(queryset, next_working_date):
+    """filter requests whose return date was moved to next working date by holiday"""
+    return queryset.filter(
         Q(return_date=next_working_date, type="full", duration__gt=1) | Q(return_date=next_working_date, type="half",
                                                                           duration__gte=1) | Q(
             return_date=next_working_date, type="half", duration=0.5, half_day_status="secondhalf") | Q(return_date=next_working_date, type="full", duration=1)).exclude(start_date=next_working_date, end_date=next_working_date).exclude(
         status="cancelled")
-    for wfh_obj in wfh_request_return_dates:
-        wfh_obj.return_date = date
-        wfh_obj.save()
 
 
-def create_holiday_reduce_duration_wfh(date):
-    """function for when we create holiday then decrement in wfh duration"""
-    work_from_home_request = WorkFromHome.objects.filter(start_date__lte=date, end_date__gte=date).exclude(
-        status="cancelled")
-    for wfh_obj in work_from_home_request:
-        if wfh_obj.type == "half":
-            wfh_obj.duration = float(wfh_obj.duration) - 0.5
-        else:
-            wfh_obj.duration = wfh_obj.duration - 1
-        wfh_obj.save()
-
-    wfh_request_return_dates = WorkFromHome.objects.filter(return_date=date).exclude(
-        status="cancelled")
-    for wfh_obj in wfh_request_return_dates:
-        wfh_obj.return_date = calculate_return_date(date, wfh_obj.return_date, wfh_obj.type, wfh_obj.half_day_status)
-        wfh_obj.save()
+def move_return_dates(queryset, dates, calendar):
+    """
+    move return date of requests returning on new holiday dates to next working date,
+    runs one update per distinct new return date. returns number of requests moved.
+    """
+    request_return_dates = queryset.filter(return_date__in=dates).exclude(status="cancelled")
+    new_return_dates = batch_return_dates(
+        list(request_return_dates.values_list('id', 'return_date', 'type', 'half_day_status')), dates, calendar)
+    request_ids_by_return_date = defaultdict(list)
+    for request_id, return_date in new_return_dates.items():
+        request_ids_by_return_date[return_date].append(request_id)
+    return sum(queryset.filter(id__in=request_ids).update(return_date=return_date)
+               for return_date, request_ids in request_ids_by_return_date.items())
 
 
-def update_holiday_update_duration_wfh(old_date, new_date):
-    """function for when we update holiday then update duration in wfh"""
-    if old_date != new_date:
-        delete_holiday_increment_duration_wfh(old_date)
-        create_holiday_reduce_duration_wfh(new_date)
+def adjust_wfh_durations(date_signs):
+    """set based update of work from home duration for holiday changes, returns number of requests updated"""
+    return overlapping_requests(WorkFromHome.objects.all(), date_signs).update(
+        duration=F('duration') + request_duration_delta(WorkFromHome, 'duration', date_signs))
 
 
-def delete_holiday_increment_duration_leave(date):
-    """function for when delete holiday then change duration in leave allocation and leave fields"""
-    leave_request = Leave.objects.filter(start_date__lte=date, end_date__gte=date).exclude(
-        status="cancelled")
+def delete_holiday_increment_duration_wfh(date, calendar=None):
+    """function for when we delete holiday then increment in wfh duration"""
+    adjust_wfh_durations({date: 1})
+    next_working_date = calculate_next_working_date(date, calendar or WorkingCalendar.load())
+    returned_on_next_working_date(WorkFromHome.objects.all(), next_working_date).update(return_date=date)
 
-    for leave_obj in leave_request:
-        user = leave_obj.request_from.id
-        leave_allocation = LeaveAllocations.objects.filter(user=user, is_active=True).first()
-        if leave_allocation:
-            if leave_obj.status == "approved":
-                if leave_obj.type == "full":
-                    if leave_allocation.exceed_leave == 0:
-                        leave_allocation.remaining_leave = leave_allocation.remaining_leave - 1
-                        leave_allocation.used_leave = leave_allocation.used_leave + 1
-                        leave_obj.duration = leave_obj.duration + 1
-                    elif leave_allocation.exceed_leave > 0:
-                        leave_allocation.exceed_leave = leave_allocation.exceed_leave + 1
-                        leave_allocation.used_leave = leave_allocation.used_leave + 1
-                        leave_obj.duration = leave_obj.duration + 1
-                else:
-                    if leave_allocation.exceed_leave == 0:
-                        leave_allocation.remaining_leave = float(leave_allocation.remaining_leave) - 0.5
-                        leave_allocation.used_leave = float(leave_allocation.used_leave) + 0.5
-                        leave_obj.duration = float(leave_obj.duration) + 0.5
-                    elif leave_allocation.exceed_leave > 0:
-                        leave_allocation.exceed_leave = float(leave_allocation.exceed_leave) + 0.5
-                        leave_allocation.used_leave = float(leave_allocation.used_leave) + 0.5
-                        leave_obj.duration = float(leave_obj.duration) + 0.5
-            elif leave_obj.status == "pending" or leave_obj.status == "rejected":
-                if leave_obj.type == "full":
-                    leave_obj.duration = leave_obj.duration + 1
-                else:
-                    leave_obj.duration = float(leave_obj.duration) + 0.5
-            Leave.objects.filter(id=leave_obj.id).update(duration=leave_obj.duration)
-            LeaveAllocations.objects.filter(id=leave_allocation.id).update(exceed_leave=leave_allocation.exceed_leave,
-                                                                           used_leave=leave_allocation.used_leave,
-                                                                           remaining_leave=leave_allocation.remaining_leave)
-
-    next_working_date = calculate_next_working_date(date)
-    leave_request_return_dates = Leave.objects.filter(
-        Q(return_date=next_working_date, type="full", duration__gt=1) | Q(return_date=next_working_date, type="half",
-                                                                          duration__gte=1) | Q(
-            return_date=next_working_date, type="half", duration=0.5, half_day_status="secondhalf") | Q(return_date=next_working_date, type="full", duration=1)).exclude(start_date=next_working_date, end_date=next_working_date).exclude(
-        status="cancelled")
 
-    for leave_obj in leave_request_return_dates:
-        Leave.objects.filter(id=leave_obj.id).update(return_date=date)
+def create_holiday_reduce_duration_wfh(date, calendar=None):
+    """function for when we create holiday then decrement in wfh duration"""
+    adjust_wfh_durations({date: -1})
+    move_return_dates(WorkFromHome.objects.all(), [date], calendar or WorkingCalendar.load())
 
 
-def create_holiday_reduce_duration_leave(date):
-    """function for when delete holiday then change duration in leave allocation and leave fields"""
+def leave_delta(leave, sign):
+    """change of leave duration for one holiday date, half for half day leave"""
+    return Decimal(sign) if leave.type == "full" else Decimal(sign) / 2
 
-    leave_request = Leave.objects.filter(start_date__lte=date, end_date__gte=date).exclude(
-        status="cancelled")
 
-    for leave_obj in leave_request:
-        user = leave_obj.request_from.id
-        leave_allocation = LeaveAllocations.objects.filter(user=user, is_active=True).first()
-        if leave_allocation:
-
-            if leave_obj.status == "approved":
-                if leave_obj.type == "full":
-                    if leave_allocation.exceed_leave == 0:
-                        leave_allocation.remaining_leave = leave_allocation.remaining_leave + 1
-                        leave_allocation.used_leave = leave_allocation.used_leave - 1
-                        leave_obj.duration = leave_obj.duration - 1
-                    elif leave_allocation.exceed_leave > 0:
-                        leave_allocation.exceed_leave = leave_allocation.exceed_leave - 1
-                        leave_allocation.used_leave = leave_allocation.used_leave - 1
-                        leave_obj.duration = leave_obj.duration - 1
-                else:
-                    if leave_allocation.exceed_leave == 0:
-                        leave_allocation.remaining_leave = float(leave_allocation.remaining_leave) + 0.5
-                        leave_allocation.used_leave = float(leave_allocation.used_leave) - 0.5
-                        leave_obj.duration = float(leave_obj.duration) - 0.5
-                    elif leave_allocation.exceed_leave > 0:
-                        leave_allocation.exceed_leave = float(leave_allocation.exceed_leave) - 0.5
-                        leave_allocation.used_leave = float(leave_allocation.used_leave) - 0.5
-                        leave_obj.duration = float(leave_obj.duration) - 0.5
-            elif leave_obj.status == "pending" or leave_obj.status == "rejected":
-                if leave_obj.type == "full":
-                    leave_obj.duration = leave_obj.duration - 1
+def adjust_leaves_one_by_one(user_ids, date_signs):
+    """
+    per leave update of leave duration and first active allocation of users, removed holidays before added ones
+    and leaves in id order. each approved leave takes remaining or exceed leave from allocation as left by the
+    previous one and is skipped while exceed leave is below zero.
+    returns number of allocations and number of leaves updated.
+    """
+    allocations = {allocation.user_id: allocation for allocation in LeaveAllocations.objects.filter(
+        id__in=LeaveAllocations.objects.filter(is_active=True, user__in=user_ids).order_by().values('user').annotate(
+            first_id=Min('id')).values('first_id'))}
+    leaves = 0
+    for date, sign in sorted(date_signs.items(), key=lambda date_sign: (-date_sign[1], date_sign[0])):
+        leave_request = overlapping_requests(Leave.objects.filter(request_from__in=allocations), {date: sign})
+        for leave in leave_request.filter(status__in=["approved", "pending", "rejected"]).order_by('id'):
+            allocation = allocations[leave.request_from_id]
+            delta = leave_delta(leave, sign)
+            if leave.status == "approved":
+                if allocation.exceed_leave == 0:
+                    allocation.remaining_leave -= delta
+                elif allocation.exceed_leave > 0:
+                    allocation.exceed_leave += delta
                 else:
-                    leave_obj.duration = float(leave_obj.duration) - 0.5
-            Leave.objects.filter(id=leave_obj.id).update(duration=leave_obj.duration)
-            LeaveAllocations.objects.filter(id=leave_allocation.id).update(exceed_leave=leave_allocation.exceed_leave,
-                                                                           used_leave=leave_allocation.used_leave,
-                                                                           remaining_leave=leave_allocation.remaining_leave)
+                    continue
+                allocation.used_leave += delta
+            leaves += Leave.objects.filter(id=leave.id).update(duration=F('duration') + delta)
+    for allocation in allocations.values():
+        allocation.save(update_fields=['used_leave', 'remaining_leave', 'exceed_leave'])
+    return len(allocations), leaves
 
-    leave_request_return_dates = Leave.objects.filter(return_date=date).exclude(
-        status="cancelled")
-    for leave_obj in leave_request_return_dates:
-        leave_obj.return_date = calculate_return_date(date, leave_obj.return_date, leave_obj.type,
-                                                      leave_obj.half_day_status)
-        Leave.objects.filter(id=leave_obj.id).update(return_date=leave_obj.return_date)
 
+def adjust_leave_durations(date_signs):
+    """
+    set based update of leave duration and leave allocation for holiday changes, same result as updating
+    leave by leave in `adjust_leaves_one_by_one`. two update statements whatever the number of leaves affected,
+    except users whose exceed leave would reach zero or below part way through their leaves, those are few and
+    updated leave by leave.
+    returns number of allocations and number of leaves updated.
+    """
+    leave_request = overlapping_requests(Leave.objects.all(), date_signs)
+    approved_leave = leave_request.filter(status="approved")
+    used_field = LeaveAllocations._meta.get_field('used_leave')
+
+    def user_leave_days(signs):
+        return Subquery(approved_leave.filter(request_from=OuterRef('user')).order_by().values(
+            'request_from').annotate(days=Sum(request_duration_delta(Leave, 'duration', signs))).values('days'),
+            output_field=used_field)
+
+    first_allocations = LeaveAllocations.objects.filter(id__in=LeaveAllocations.objects.filter(
+        is_active=True, user__in=approved_leave.values('request_from')).order_by().values('user').annotate(
+        first_id=Min('id')).values('first_id'))
+    added_signs = {date: sign for date, sign in date_signs.items() if sign < 0}
+    crossing_users = list(first_allocations.filter(exceed_leave__gt=0).annotate(
+        lowest_exceed_leave=F('exceed_leave') + user_leave_days(added_signs)).filter(
+        lowest_exceed_leave__lte=0).values_list('user', flat=True)) if added_signs else []
+
+    used_days = user_leave_days(date_signs)
+    # approved leaves of allocations with exceed leave below zero change nothing
+    allocations = first_allocations.exclude(user__in=crossing_users).filter(exceed_leave__gte=0).update(
+        used_leave=F('used_leave') + used_days,
+        remaining_leave=Case(When(exceed_leave=0, then=F('remaining_leave') - used_days),
+                             default=F('remaining_leave')),
+        exceed_leave=Case(When(exceed_leave__gt=0, then=F('exceed_leave') + used_days),
+                          default=F('exceed_leave')),
+    )
+
+    leave_allocation = LeaveAllocations.objects.filter(user=OuterRef('request_from'), is_active=True)
+    leaves = leave_request.filter(Exists(leave_allocation), status__in=["approved", "pending", "rejected"]).exclude(
+        request_from__in=crossing_users).exclude(
+        status="approved", request_from__in=first_allocations.filter(exceed_leave__lt=0).values('user')).update(
+        duration=F('duration') + request_duration_delta(Leave, 'duration', date_signs))
+    if crossing_users:
+        crossing_allocations, crossing_leaves = adjust_leaves_one_by_one(crossing_users, date_signs)
+        allocations += crossing_allocations
+        leaves += crossing_leaves
+    return allocations, leaves
+
+
+def delete_holiday_increment_duration_leave(date, calendar=None):
+    """function for when delete holiday then change duration in leave allocation and leave fields"""
+    adjust_leave_durations({date: 1})
+    next_working_date = calculate_next_working_date(date, calendar or WorkingCalendar.load())
+    returned_on_next_working_date(Leave.objects.all(), next_working_date).update(return_date=date)
 
-def update_holiday_update_duration_leave(old_date, new_date):
-    """update leave duration from holiday"""
-    if old_date != new_date:
-        delete_holiday_increment_duration_leave(old_date)
-        create_holiday_reduce_duration_leave(new_date)
 
+def create_holiday_reduce_duration_leave(date, calendar=None):
+    """function for when create holiday then change duration in leave allocation and leave fields"""
+    adjust_leave_durations({date: -1})
+    move_return_dates(Leave.objects.all(), [date], calendar or WorkingCalendar.load())
 
-def check_holiday_already_exists_or_not(holiday_name, new_date, holiday_id=None):
+
+def recalculate_return_dates(model, label, added_dates, removed_dates, calendar):
+    """reset return dates of requests of model moved by removed holidays and move those returning on added holidays"""
+    for date in removed_dates:
+        next_working_date = calculate_next_working_date(date, calendar)
+        RECALCULATED_ROWS.inc(returned_on_next_working_date(model.objects.all(), next_working_date).update(
+            return_date=date), model=label, field='return_date')
+    if added_dates:
+        RECALCULATED_ROWS.inc(move_return_dates(model.objects.all(), added_dates, calendar), model=label,
+                              field='return_date')
+
+
+def apply_holiday_changes(date_changes, calendar):
     """
-        checking duplicate name while adding holiday
+    recalculate leave and work from home requests for holidays added (1) or removed (-1) on dates,
+    durations are updated once for the whole date set and return dates once for all added dates.
     """
-    if not (company_settings := CompanySettings.objects.first()):
-        raise ValidationError({"validation_error": [COMPANY_SETTING]})
+    date_signs = {date: -1 if change > 0 else 1 for date, change in date_changes.items() if change}
+    if not date_signs:
+        return
+    added_dates = sorted(date for date, sign in date_signs.items() if sign < 0)
+    removed_dates = sorted(date for date, sign in date_signs.items() if sign > 0)
+    with stage('wfh_recalculation'):
+        RECALCULATED_ROWS.inc(adjust_wfh_durations(date_signs), model='work_from_home', field='duration')
+        recalculate_return_dates(WorkFromHome, 'work_from_home', added_dates, removed_dates, calendar)
+    with stage('leave_recalculation'):
+        allocations, leaves = adjust_leave_durations(date_signs)
+        RECALCULATED_ROWS.inc(allocations, model='leave_allocation', field='used_leave')
+        RECALCULATED_ROWS.inc(leaves, model='leave', field='duration')
+        recalculate_return_dates(Leave, 'leave', added_dates, removed_dates, calendar)
+    HOLIDAY_CHANGES.inc(len(added_dates), change='added')
+    HOLIDAY_CHANGES.inc(len(removed_dates), change='removed')
+
+
+def financial_year_window(date, company_settings):
+    """(start, end) of current or next financial year holding date, None when date is outside both"""
     financial_start_year = company_settings.financial_year_start_date
     financial_end_year = company_settings.financial_year_end_date
+    if financial_start_year <= date <= financial_end_year:
+        return financial_start_year, financial_end_year
+    next_financial_start_year = financial_start_year + relativedelta(years=1)
+    next_financial_end_year = financial_end_year + relativedelta(years=1)
+    if next_financial_start_year < date <= next_financial_end_year:
+        return next_financial_start_year, next_financial_end_year
+    return None
 
-    if financial_start_year <= new_date <= financial_end_year:
-        if Holidays.objects.filter(name=holiday_name, date__lte=financial_end_year,
-                                   date__gte=financial_start_year).exclude(id=holiday_id).first():
-            raise ValidationError({"name": NAME_ERROR})
-    else:
-        next_financial_end_year = financial_end_year + relativedelta(years=1)
-        next_financial_start_year = financial_start_year + relativedelta(years=1)
-        if next_financial_start_year < new_date <= next_financial_end_year and Holidays.objects.filter(
-                name=holiday_name, date__lte=next_financial_end_year, date__gte=next_financial_start_year).exclude(
+
+def check_holiday_already_exists_or_not(holiday_name, new_date, holiday_id=None):
+    """
+        checking duplicate name while adding holiday
+    """
+    if not (company_settings := get_company_settings()):
+        raise ValidationError({"validation_error": [COMPANY_SETTING]})
+    window = financial_year_window(new_date, company_settings)
+    if window and Holidays.objects.filter(name=holiday_name, date__gte=window[0], date__lte=window[1]).exclude(
             id=holiday_id).first():
-            raise ValidationError({"name": NAME_ERROR})
+        raise ValidationError({"name": NAME_ERROR})
+
+
+def validate_holiday_import_rows(rows):
+    """
+    validate (row number, name, date) rows of holiday import in one pass against one load of settings
+    and existing holidays, return {row number: errors} of invalid rows
+    """
+    if not (company_settings := get_company_settings()):
+        raise ValidationError({"validation_error": [COMPANY_SETTING]})
+    off_days = get_off_days()
+    if off_days is None:
+        raise ValidationError({"validation_error": ATTENDANCE_SETTING})
+    windows = {financial_year_window(date, company_settings) for _, _, date in rows} - {None}
+    window_names = defaultdict(set)
+    if windows:
+        existing_names = Holidays.objects.filter(date__gte=min(start for start, _ in windows),
+                                                 date__lte=max(end for _, end in windows)).values_list('name', 'date')
+        for name, date in existing_names:
+            window_names[financial_year_window(date, company_settings)].add(name)
+    taken_dates = set(Holidays.objects.filter(date__in=[date for _, _, date in rows]).values_list('date', flat=True))
+    name_length = Holidays._meta.get_field('name').max_length
+
+    row_errors = {}
+    for row_number, name, date in rows:
+        errors = {}
+        window = financial_year_window(date, company_settings)
+        if not name:
+            errors['name'] = IMPORT_NAME_REQUIRED
+        elif len(name) > name_length:
+            errors['name'] = IMPORT_NAME_LENGTH.format(max_length=name_length)
+        elif window and name in window_names[window]:
+            errors['name'] = NAME_ERROR
+        if date.weekday() in off_days:
+            errors['date'] = CHECK_WEEKEND
+        elif date in taken_dates:
+            errors['date'] = IMPORT_DATE_EXISTS
+        if errors:
+            row_errors[row_number] = errors
+        taken_dates.add(date)
+        if name and window:
+            window_names[window].add(name)
+    return row_errors
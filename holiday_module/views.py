@@ -1,26 +1,36 @@
 from datetime import date
+from django.conf import settings
+from django.db import transaction
+from django.http import HttpResponse
 from django.utils import timezone
+from django.utils.crypto import constant_time_compare
 from rest_framework import generics, status
 from rest_framework.exceptions import ValidationError
 from rest_framework.permissions import IsAuthenticated, DjangoModelPermissions
 from rest_framework.response import Response
 
-from holiday.holiday_module.pagination import CustomPagination
-from common.search import get_query
+from holiday.holiday_module.conditional import HolidayConditionalGetMixin, bump_holiday_data_version
+from holiday.holiday_module.pagination import CustomPagination, HolidayKeysetPagination
 from holiday.holiday_module.constants import HOLIDAYS_CREATED, HOLIDAYS_UPDATED_SUCCESSFULLY, HOLIDAYS_DELETED_SUCCESSFULLY, \
-    COMPANY_SETTING, PUBLIC_ACCESS
+    COMPANY_SETTING, PUBLIC_ACCESS, IMPORT, IMPORT_FILE_REQUIRED, HOLIDAYS_IMPORTED, PAGINATION, CURSOR_PAGINATION, \
+    SEARCH_PREFIX, METRICS_CONTENT_TYPE
 from holiday.holiday_module.filter import YearFilter
-from holiday.holiday_module.models import Holidays
+from holiday.holiday_module.importers import import_holidays
+from holiday.holiday_module.jobs import enqueue_holiday_change, enqueue_holiday_move
+from holiday.holiday_module.metrics import REGISTRY, SERIALIZATION_SECONDS
+from holiday.holiday_module.models import Holidays, HolidayChangeJob
 from holiday.holiday_module.serializers import HolidaysListCreateSerializer, HolidaysRetrieveUpdateSerializer, \
     DashboardHolidayListSerializer, HolidayPublicSerializer
-from holiday.holiday_module.utils import delete_object_from_bucket
-from holiday.holiday_module.validations import delete_holiday_increment_duration_wfh, check_delete_date, \
-    delete_holiday_increment_duration_leave
+from holiday.holiday_module.utils import delete_object_from_bucket, holiday_month_counts, month_date_range
+from holiday.holiday_module.validations import check_delete_date
 from holiday.holiday_module.permissions import IsAuthorizedForListModel, IsAuthorizedForModel
-from settings.models import CompanySettings
+from holiday.holiday_module.public_payload import get_public_payload, public_payload_response
+from holiday.holiday_module.search import search_holidays
+from holiday.holiday_module.server_timing import stage
+from holiday.holiday_module.settings_cache import get_company_settings
 
 
-class ListCreateAPIView(generics.ListCreateAPIView):
+class ListCreateAPIView(HolidayConditionalGetMixin, generics.ListCreateAPIView):
     """
     View to Add holiday and view list of holidays
     """
@@ -35,6 +45,8 @@ class ListCreateAPIView(generics.ListCreateAPIView):
         if self.request.GET.get(PUBLIC_ACCESS) == "true":
             self.pagination_class = None
             return Holidays.objects.filter(is_active=True).values('id', 'date').order_by("-id")
+        if self.request.GET.get(PAGINATION) == CURSOR_PAGINATION:
+            self.pagination_class = HolidayKeysetPagination
         return Holidays.objects.all().order_by('-id')
 
     def get_serializer_class(self):
@@ -43,42 +55,93 @@ class ListCreateAPIView(generics.ListCreateAPIView):
             return HolidayPublicSerializer
         return HolidaysListCreateSerializer
 
+    def get_permissions(self):
+        """public list only needs an authenticated user, skip model permission checks"""
+        if self.request.method == 'GET' and self.request.GET.get(PUBLIC_ACCESS) == "true":
+            return [IsAuthenticated()]
+        return super().get_permissions()
+
     def post(self, request, *args, **kwargs):
-        """post request to create holiday"""
+        """post request to create holiday, or to import holidays from csv or ics file"""
+        if request.GET.get(IMPORT) == "true":
+            return self.import_holidays(request)
         serializer = self.get_serializer(data=request.data)
         serializer.is_valid(raise_exception=True)
-        serializer.save(created_by_id=request.user.id)
-        return Response({'data': serializer.data, 'message': HOLIDAYS_CREATED},
+        with transaction.atomic():
+            with stage('save'):
+                holiday = serializer.save(created_by_id=request.user.id)
+            with stage('enqueue'):
+                enqueue_holiday_change(holiday.date, HolidayChangeJob.ADDED)
+            bump_holiday_data_version()
+        with stage('serialize'), SERIALIZATION_SECONDS.time(view='list_create_holidays'):
+            data = serializer.data
+        return Response({'data': data, 'message': HOLIDAYS_CREATED},
                         status=status.HTTP_201_CREATED)
 
+    def import_holidays(self, request):
+        """create every holiday of uploaded file at once"""
+        upload = request.FILES.get('file')
+        if not upload:
+            raise ValidationError({"file": IMPORT_FILE_REQUIRED})
+        holidays = import_holidays(upload.name, upload.read(), request.user.id)
+        return Response({'count': len(holidays), 'message': HOLIDAYS_IMPORTED}, status=status.HTTP_201_CREATED)
+
     def get(self, request, *args, **kwargs):
         """get request to view list of holiday"""
+        if request.GET.get(PUBLIC_ACCESS) == "true":
+            return self.get_public_list(request)
+        if not_modified := self.not_modified_response(request):
+            return not_modified
+        self.queryset = self.filter_list_queryset(request)
+        page = self.paginate_queryset(self.queryset)
+        if page is not None:
+            serializer = self.get_list_serializer(page)
+            with SERIALIZATION_SECONDS.time(view='list_create_holidays'):
+                data = serializer.data
+            res = self.get_paginated_response(data)
+            return res
+        serializer = self.get_list_serializer(self.queryset)
+        with SERIALIZATION_SECONDS.time(view='list_create_holidays'):
+            return Response(serializer.data)
+
+    def filter_list_queryset(self, request):
+        """holiday list filtered on financial year or requested years and search"""
         start_year = request.GET.get('start_year')
         end_year = request.GET.get('end_year')
         if start_year and end_year:
-            self.queryset = self.filter_queryset(self.get_queryset())
+            queryset = self.filter_queryset(self.get_queryset())
         else:
-            company_settings = CompanySettings.objects.first()
+            company_settings = get_company_settings()
             if company_settings:
                 financial_start_year = company_settings.financial_year_start_date
                 financial_end_year = company_settings.financial_year_end_date
-                self.queryset = self.get_queryset().filter(date__range=[financial_start_year, financial_end_year])
+                queryset = self.get_queryset().filter(date__range=[financial_start_year, financial_end_year])
             else:
                 raise ValidationError({"validation_error": [COMPANY_SETTING]})
         search = request.GET.get('search')
         if search:
-            entry_query = get_query(search, ['name'])
-            self.queryset = self.queryset.filter(entry_query)
-        page = self.paginate_queryset(self.queryset)
-        if page is not None:
-            serializer = self.get_serializer(page, many=True)
-            res = self.get_paginated_response(serializer.data)
-            return res
-        serializer = self.get_serializer(self.queryset, many=True)
-        return Response(serializer.data)
+            # rank by similarity unless client asked for an ordering, keyset pagination always orders by its
+            # cursor field so similarity would only be computed to be thrown away
+            rank = 'ordering' not in request.GET and request.GET.get(PAGINATION) != CURSOR_PAGINATION
+            queryset = search_holidays(queryset, search, prefix=request.GET.get(SEARCH_PREFIX) == "true", rank=rank)
+        return queryset
 
+    def get_public_list(self, request):
+        """public holiday list served as payload prebuilt once per data version and query"""
+        payload, etag = get_public_payload(
+            request.GET, lambda: HolidayPublicSerializer(self.filter_list_queryset(request), many=True).data)
+        return public_payload_response(request, payload, etag)
 
-class RetrieveUpdateDestroyAPIView(generics.RetrieveUpdateDestroyAPIView):
+    def get_list_serializer(self, holidays):
+        """serializer for list of holiday with month counts loaded in one query"""
+        context = self.get_serializer_context()
+        if self.get_serializer_class() is HolidaysListCreateSerializer:
+            holidays = list(holidays)
+            context['month_counts'] = holiday_month_counts([holiday.date for holiday in holidays])
+        return self.get_serializer(holidays, many=True, context=context)
+
+
+class RetrieveUpdateDestroyAPIView(HolidayConditionalGetMixin, generics.RetrieveUpdateDestroyAPIView):
     """
     View to retrieve, update and delete holiday
     """
@@ -87,15 +150,35 @@ class RetrieveUpdateDestroyAPIView(generics.RetrieveUpdateDestroyAPIView):
     permission_classes = [IsAuthenticated, IsAuthorizedForModel]
     lookup_field = 'id'
 
+    def get(self, request, *args, **kwargs):
+        """get request to retrieve holiday"""
+        if not_modified := self.not_modified_response(request):
+            return not_modified
+        return self.retrieve(request, *args, **kwargs)
+
+    def representation_exists(self):
+        """True when holiday of url exists, so `If-None-Match: *` of a missing holiday gets 404"""
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        return self.filter_queryset(self.get_queryset()).filter(
+            **{self.lookup_field: self.kwargs[lookup_url_kwarg]}).exists()
+
     def put(self, request, *args, **kwargs):
         """pu request to update holiday"""
         instance = self.get_object()
+        old_date = instance.date
         serializer = self.get_serializer(instance, data=request.data)
         serializer.is_valid(raise_exception=True)
         today = timezone.now()
         current_time = today.strftime('%Y-%m-%d %H:%M:%S.%f')
-        serializer.save(modified_by_id=request.user.id, modified_at=current_time)
-        return Response({'data': serializer.data, 'message': HOLIDAYS_UPDATED_SUCCESSFULLY},
+        with transaction.atomic():
+            with stage('save'):
+                holiday = serializer.save(modified_by_id=request.user.id, modified_at=current_time)
+            with stage('enqueue'):
+                enqueue_holiday_move(old_date, holiday.date)
+            bump_holiday_data_version()
+        with stage('serialize'), SERIALIZATION_SECONDS.time(view='retrieve_update_destroy_holidays'):
+            data = serializer.data
+        return Response({'data': data, 'message': HOLIDAYS_UPDATED_SUCCESSFULLY},
                         status=status.HTTP_200_OK)
 
     def delete(self, request, *args, **kwargs):
@@ -103,25 +186,46 @@ class RetrieveUpdateDestroyAPIView(generics.RetrieveUpdateDestroyAPIView):
         instance = self.get_object()
         check_delete_date(instance.date)
         if instance.holiday_image:
-            delete_object_from_bucket(instance)
-        delete_holiday_increment_duration_wfh(instance.date)
-        delete_holiday_increment_duration_leave(instance.date)
-        instance.delete()
+            with stage('s3_delete'):
+                delete_object_from_bucket(instance)
+        with transaction.atomic():
+            with stage('delete'):
+                instance.delete()
+            with stage('enqueue'):
+                enqueue_holiday_change(instance.date, HolidayChangeJob.REMOVED)
+            bump_holiday_data_version()
         return Response({'message': HOLIDAYS_DELETED_SUCCESSFULLY},
                         status=status.HTTP_200_OK)
 
 
-class DashboardCurrentMonthHolidayListAPIView(generics.ListAPIView):
+class DashboardCurrentMonthHolidayListAPIView(HolidayConditionalGetMixin, generics.ListAPIView):
     """
     View to list current and upcoming holiday.
     """
     serializer_class = DashboardHolidayListSerializer
     permission_classes = [IsAuthenticated, IsAuthorisedForViewDashboard]
     queryset = Holidays.objects.all()
+    etag_includes_today = True
 
     def get(self, request, *args, **kwargs):
         """get request to view list of current month holiday"""
-        self.queryset = self.queryset.filter(date__month=date.today().month, date__year=date.today().year)
+        if not_modified := self.not_modified_response(request):
+            return not_modified
+        month_start, next_month_start = month_date_range(date.today())
+        self.queryset = self.queryset.filter(date__gte=month_start, date__lt=next_month_start)
         count = self.queryset.count()
         serializer = self.get_serializer(self.queryset, many=True)
-        return Response({'count': count, 'data': serializer.data}, status=status.HTTP_200_OK)
\ No newline at end of file
+        return Response({'count': count, 'data': serializer.data}, status=status.HTTP_200_OK)
+
+
+def metrics(request):
+    """
+    prometheus text format metrics summed over every worker process, requires
+    `Authorization: Bearer <HOLIDAY_METRICS_TOKEN>` and answers 404 while the token is not set
+    """
+    token = getattr(settings, 'HOLIDAY_METRICS_TOKEN', None)
+    if not token:
+        return HttpResponse(status=status.HTTP_404_NOT_FOUND)
+    if not constant_time_compare(request.headers.get('Authorization', ''), f'Bearer {token}'):
+        return HttpResponse(status=status.HTTP_401_UNAUTHORIZED)
+    return HttpResponse(REGISTRY.render(), content_type=METRICS_CONTENT_TYPE)
@@ -0,0 +1,80 @@
+import bisect
+import datetime
+
+from holiday.holiday_module.models import Holidays
+from holiday.holiday_module.utils import attendance_setting_data
+
+ONE_DAY = datetime.timedelta(days=1)
+DAYS_IN_WEEK = 7
+
+
+class WorkingCalendar:
+    """
+    In-process index of the working calendar.
+
+    Holds the active holiday dates (sorted list plus set) and the weekly off-day
+    mask, so working day questions are answered without touching the database.
+    """
+
+    def __init__(self, holiday_dates, off_days):
+        self.holiday_set = frozenset(holiday_dates)
+        self.holidays = sorted(self.holiday_set)
+        self.off_days = frozenset(off_days)
+        # only holidays falling on a working weekday change the working day count
+        self.working_holidays = [day for day in self.holidays if day.weekday() not in self.off_days]
+        self.working_days_per_week = DAYS_IN_WEEK - len(self.off_days)
+
+    @classmethod
+    def load(cls):
+        """build calendar from active holidays and attendance settings"""
+        holiday_dates = Holidays.objects.filter(is_active=True).values_list('date', flat=True)
+        return cls(holiday_dates, attendance_setting_data())
+
+    def is_working_day(self, date):
+        """return True when date is neither an off day nor a holiday"""
+        return date.weekday() not in self.off_days and date not in self.holiday_set
+
+    def next_working_day(self, date):
+        """return first working day strictly after date"""
+        if not self.working_days_per_week:
+            raise ValueError("Attendance settings do not contain any working day.")
+        date = date + ONE_DAY
+        while not self.is_working_day(date):
+            date = date + ONE_DAY
+        return date
+
+    def count_working_days(self, start_date, end_date):
+        """return number of working days between start date and end date, both inclusive"""
+        if end_date < start_date:
+            return 0
+        total_days = (end_date - start_date).days + 1
+        weeks, remainder = divmod(total_days, DAYS_IN_WEEK)
+        count = weeks * self.working_days_per_week
+        first_weekday = (start_date.weekday() + weeks * DAYS_IN_WEEK) % DAYS_IN_WEEK
+        count += sum(
+            1 for offset in range(remainder)
+            if (first_weekday + offset) % DAYS_IN_WEEK not in self.off_days
+        )
+        lower = bisect.bisect_left(self.working_holidays, start_date)
+        upper = bisect.bisect_right(self.working_holidays, end_date)
+        return count - (upper - lower)
+
+    def add_working_days(self, date, days):
+        """return the date reached after moving forward given number of working days from date"""
+        if days <= 0:
+            return date
+        if not self.working_days_per_week:
+            raise ValueError("Attendance settings do not contain any working day.")
+        while days:
+            weeks = days // self.working_days_per_week
+            if weeks:
+                target = date + datetime.timedelta(weeks=weeks)
+                days -= self.count_working_days(date + ONE_DAY, target)
+                date = target
+            else:
+                date = self.next_working_day(date)
+                days -= 1
+        # jumping whole weeks can land on an off day after the last working day
+        while not self.is_working_day(date):
+            date = date - ONE_DAY
+        return date